@@ -0,0 +1,6 @@
+"""Benchmarks of Did.
+
+Run them as modules from the top directory of the repository, e.g.:
+
+    python -m benchmarks.bench_parser
+"""
@@ -0,0 +1,46 @@
+"""Compare loading the state needed to append a task to a job log: the whole
+log, or only the sessions at its end.
+
+    python -m benchmarks.bench_append [YEARS]
+"""
+import datetime
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did import did
+from did.log_cache import CACHE_SUFFIX
+from did.log_tail import tail_worklog
+from did.worklog import WorkLog
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        worklog = WorkLog(path)
+        now = worklog.end() + datetime.timedelta(minutes=1)
+        today = now.date()
+
+        def append_quietly():
+            nonlocal now
+            now += datetime.timedelta(seconds=1)
+            did.main(["--log-file", path, "-q", "coding"], now=now)
+
+        results = [
+            ("Whole log", best_time(lambda: WorkLog(path))),
+            ("Whole log with warm cache",
+             best_time(lambda: WorkLog(path, path + CACHE_SUFFIX))),
+            ("Sessions at the end", best_time(lambda: tail_worklog(path,
+                                                                   today))),
+            ("Sessions until last break",
+             best_time(lambda: tail_worklog(
+                 path, today,
+                 lambda worklog: worklog.last_break_interval() is not None))),
+            ("did -q TASK", best_time(append_quietly)),
+        ]
+
+    for name, seconds in results:
+        print("{:28s} {:.4f} s".format(name + ":", seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Compare loading the sessions of a recent day range from the whole job log
+and from a checkpoint of the index.
+
+    python -m benchmarks.bench_checkpoints [YEARS]
+"""
+import datetime
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.checkpoints import INDEX_SUFFIX, CheckpointIndex
+from did.worklog import WorkLog
+
+
+def load(path, checkpoint=None):
+    worklog = WorkLog(path, checkpoint=checkpoint)
+    worklog.compute_stats()
+    return worklog
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        index = CheckpointIndex(path + INDEX_SUFFIX)
+        index.update(path, load(path))
+        last_day = index.checkpoints[-1].date
+
+        def load_range(days):
+            index = CheckpointIndex(path + INDEX_SUFFIX)
+            index.load(path)
+            checkpoint = index.checkpoint_for(
+                last_day - datetime.timedelta(days=days))
+            load(path, checkpoint)
+
+        results = [("Whole log", best_time(lambda: load(path)))]
+        for days in [0, 7, 31, 365]:
+            results.append(("Last {} days from checkpoint".format(days),
+                            best_time(lambda: load_range(days))))
+
+    for name, seconds in results:
+        print("{:32s} {:.4f} s".format(name + ":", seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compare the wall time of "did" report commands run as new processes, with
+and without the daemon of the job log running.
+
+    python -m benchmarks.bench_daemon [YEARS]
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_startup import DID_SCRIPT, run
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.daemon import SOCKET_SUFFIX
+
+QUERIES = [
+    ("today", []),
+    ("-r 2015", ["-r", "2015"]),
+    ("-a -r ..", ["-a", "-r", ".."]),
+]
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        did = ("-c", DID_SCRIPT, "-f", path)
+        run(*did)
+        results = [("Without daemon, " + name,
+                    best_time(lambda: run(*did, *args), 3))
+                   for name, args in QUERIES]
+
+        daemon = subprocess.Popen([sys.executable, *did, "--daemon"])
+        try:
+            while not os.path.exists(path + SOCKET_SUFFIX):
+                time.sleep(0.01)
+            results += [("With daemon, " + name,
+                         best_time(lambda: run(*did, *args), 5))
+                        for name, args in QUERIES]
+        finally:
+            daemon.send_signal(signal.SIGINT)
+            daemon.wait()
+
+    for name, seconds in results:
+        print("{:28s} {:.1f} ms".format(name + ":", seconds * 1000))
+
+
+if __name__ == "__main__":
+    main()
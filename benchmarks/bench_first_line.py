@@ -0,0 +1,72 @@
+"""Measure how soon the first line of a long chronological report appears on
+a terminal, compared with the time of the whole report.
+
+    python -m benchmarks.bench_first_line [YEARS]
+"""
+import io
+import sys
+import time
+
+from benchmarks.synthetic_log import synthetic_log
+from did.day_range import DayRange
+from did.log_cache import CACHE_SUFFIX
+from did.renderer import TextRenderer
+from did.report import ChronologicalSessionDisplay, IntervalFilter
+from did.worklog import SessionStream, WorkLog
+
+
+class FakeTerminal(io.StringIO):
+    """Output pretending to be a terminal, noting when it's first written"""
+    def __init__(self):
+        super().__init__()
+        self.first_write = None
+
+    def isatty(self):
+        return True
+
+    def write(self, text):
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        return super().write(text)
+
+
+def report(make_worklog, repeat=3):
+    """Return the best time to the first line and of the whole report"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        worklog = make_worklog()
+        if not isinstance(worklog, SessionStream):
+            worklog.compute_stats()
+        out = FakeTerminal()
+        ChronologicalSessionDisplay(worklog, DayRange(".."), False,
+                                    IntervalFilter(),
+                                    TextRenderer(out)).display()
+        end = time.perf_counter()
+        times = (out.first_write - start, end - start)
+        if best is None or times < best:
+            best = times
+    return best
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        cache_file_name = path + CACHE_SUFFIX
+        WorkLog(path, cache_file_name)
+        results = [
+            ("Loaded, warm cache",
+             report(lambda: WorkLog(path, cache_file_name))),
+            ("Streamed, warm cache",
+             report(lambda: SessionStream(path, cache_file_name))),
+            ("Streamed, no cache", report(lambda: SessionStream(path))),
+        ]
+
+    print("{:24s} {:>12s} {:>12s}".format("", "First line", "Whole report"))
+    for name, (first_line, whole) in results:
+        print("{:24s} {:10.3f} s {:10.3f} s".format(
+            name + ":", first_line, whole))
+
+
+if __name__ == "__main__":
+    main()
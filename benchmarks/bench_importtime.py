@@ -0,0 +1,65 @@
+"""Measure the time spent on importing modules by each "did" command, using
+"python -X importtime", to catch the commands starting to import modules they
+don't need.
+
+    python -m benchmarks.bench_importtime [YEARS]
+"""
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import DID_SCRIPT
+from benchmarks.synthetic_log import synthetic_log
+
+COMMANDS = [
+    ("did --status", ["--status"]),
+    ("did --help", ["--help"]),
+    ("did -e", ["-e"]),
+    ("did -q TASK", ["-q", "coding"]),
+    ("did", []),
+    ("did -a -r ..", ["-a", "-r", ".."]),
+]
+
+
+def import_times(log_path, args):
+    """Return the total import time in seconds, the number of imported
+    modules, and the top-level modules taking the most time to import."""
+    env = dict(os.environ, EDITOR="true")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", DID_SCRIPT,
+         "-f", log_path, *args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env,
+        universal_newlines=True, check=True)
+    total = 0
+    modules = 0
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        modules += 1
+        if not name.startswith("  "):
+            top_level.append((int(cumulative_us), name.strip()))
+    top_level.sort(reverse=True)
+    return total / 1e6, modules, [name for _, name in top_level[:3]]
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    with synthetic_log(years) as path:
+        subprocess.run([sys.executable, "-c", DID_SCRIPT, "-f", path, "-q",
+                        "arrive"], stdout=subprocess.DEVNULL, check=True)
+        results = []
+        for name, args in COMMANDS:
+            # The best of several runs, to skip the cold caches
+            runs = [import_times(path, args) for _ in range(3)]
+            results.append((name, min(runs)))
+
+    for name, (seconds, modules, slowest) in results:
+        print("{:16s} {:6.1f} ms {:4d} modules   slowest: {}".format(
+            name + ":", seconds * 1000, modules, ", ".join(slowest)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compare computing the stats of all the sessions with computing only the
+running overtime, and the stats of the reported sessions.
+
+    python -m benchmarks.bench_lazy_stats [YEARS]
+"""
+import datetime
+import sys
+import time
+
+from benchmarks.synthetic_log import synthetic_log
+from did.checkpoints import INDEX_SUFFIX, CheckpointIndex
+from did.day_range import DayRange
+from did.worklog import WorkLog
+from did.worktime import WorkSessionStats
+
+
+def eager_stats(worklog, day_range):
+    """All the stats computed for every session, as before they were lazy"""
+    for session in worklog.sessions():
+        session.set_overhours(WorkSessionStats(session).overhours())
+    worklog.compute_stats()
+    for session in worklog.sessions_in_range(day_range):
+        session.stats()
+
+
+def lazy_stats(worklog, day_range):
+    worklog.compute_stats()
+    for session in worklog.sessions_in_range(day_range):
+        session.stats()
+
+
+def time_on_fresh_worklogs(path, func, index=None, repeat=5):
+    best = None
+    for _ in range(repeat):
+        worklog = WorkLog(path)
+        if index is not None:
+            index.restore_overhours(worklog)
+        first_day = worklog.end().date() - datetime.timedelta(days=365)
+        day_range = DayRange(first_day.isoformat() + "..")
+        start = time.perf_counter()
+        func(worklog, day_range)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        worklog = WorkLog(path)
+        worklog.compute_stats()
+        index = CheckpointIndex(path + INDEX_SUFFIX)
+        index.update(path, worklog)
+
+        results = [
+            ("Eager stats of all sessions",
+             time_on_fresh_worklogs(path, eager_stats)),
+            ("Lazy stats",
+             time_on_fresh_worklogs(path, lazy_stats)),
+            ("Lazy stats, overtime from index",
+             time_on_fresh_worklogs(path, lazy_stats, index)),
+        ]
+
+    print("Stats for a report of the last year of {} years:".format(years))
+    for name, seconds in results:
+        print("{:34s} {:.4f} s".format(name + ":", seconds))
+
+
+if __name__ == "__main__":
+    main()
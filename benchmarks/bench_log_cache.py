@@ -0,0 +1,54 @@
+"""Compare reading a job log with and without the parsed log cache.
+
+    python -m benchmarks.bench_log_cache [YEARS]
+"""
+import os
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.log_cache import CACHE_SUFFIX, cached_job_reader
+from did.worklog import WorkLog
+from did.worklog_file import job_reader
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        cache_file_name = path + CACHE_SUFFIX
+
+        def read_plain():
+            for _ in job_reader(path):
+                pass
+
+        def read_cached():
+            for _ in cached_job_reader(path, cache_file_name):
+                pass
+
+        def read_cold():
+            if os.path.exists(cache_file_name):
+                os.remove(cache_file_name)
+            read_cached()
+
+        def read_after_append():
+            with open(path, "a") as log_file:
+                log_file.write("# appended line\n")
+            read_cached()
+
+        results = [
+            ("Parse all lines", best_time(read_plain)),
+            ("Cold cache (rebuild)", best_time(read_cold)),
+            ("Warm cache", best_time(read_cached)),
+            ("Warm cache after an append", best_time(read_after_append)),
+            ("WorkLog without cache", best_time(lambda: WorkLog(path))),
+            ("WorkLog with warm cache",
+             best_time(lambda: WorkLog(path, cache_file_name))),
+        ]
+        cache_size = os.path.getsize(cache_file_name)
+
+    for name, seconds in results:
+        print("{:28s} {:.3f} s".format(name + ":", seconds))
+    print("{:28s} {} bytes".format("Cache size:", cache_size))
+
+
+if __name__ == "__main__":
+    main()
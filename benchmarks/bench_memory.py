@@ -0,0 +1,43 @@
+"""Measure the memory taken by a loaded job log.
+
+    python -m benchmarks.bench_memory [YEARS]
+"""
+import gc
+import sys
+import tracemalloc
+
+from benchmarks.synthetic_log import synthetic_log
+from did.worklog import WorkLog
+
+
+def measure(path):
+    """Return the memory allocated by a loaded WorkLog with computed stats,
+    and the peak memory allocated while loading it."""
+    gc.collect()
+    tracemalloc.start()
+    worklog = WorkLog(path)
+    worklog.compute_stats()
+    for session in worklog.sessions():
+        session.stats()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    intervals = sum(len(session.intervals()) for session in worklog.sessions())
+    return len(worklog.sessions()), intervals, current, peak
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        sessions, intervals, current, peak = measure(path)
+
+    mib = 1024 * 1024
+    print("Sessions:                {}".format(sessions))
+    print("Intervals:               {}".format(intervals))
+    print("Retained memory:         {:.1f} MiB".format(current / mib))
+    print("Peak memory:             {:.1f} MiB".format(peak / mib))
+    print("Bytes per interval:      {:.0f}".format(current / intervals))
+
+
+if __name__ == "__main__":
+    main()
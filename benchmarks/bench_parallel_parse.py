@@ -0,0 +1,47 @@
+"""Measure how parsing a job log in worker processes scales with their
+number, compared with parsing it line by line in one process.
+
+    python -m benchmarks.bench_parallel_parse [YEARS]
+"""
+import os
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.parallel_reader import parallel_job_reader
+from did.worklog import WorkLog
+from did.worklog_file import job_reader
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    cpus = os.cpu_count() or 1
+    job_counts = [1, 2, 4, 8]
+    job_counts += [cpus] if cpus not in job_counts else []
+    with synthetic_log(years) as path:
+        def parse_serially():
+            for _ in job_reader(path):
+                pass
+
+        def parse_in_parallel(jobs):
+            for _ in parallel_job_reader(path, jobs):
+                pass
+
+        serial = best_time(parse_serially, 3)
+        results = [("job_reader", serial)]
+        for jobs in sorted(job_counts):
+            results.append(("{} jobs".format(jobs),
+                            best_time(lambda: parse_in_parallel(jobs), 3)))
+        results.append(("WorkLog, serial parsing",
+                        best_time(lambda: WorkLog(path), 3)))
+        results.append(("WorkLog, {} jobs".format(max(cpus, 2)),
+                        best_time(lambda: WorkLog(path, jobs=max(cpus, 2)),
+                                  3)))
+
+    print("{} CPUs".format(cpus))
+    for name, seconds in results:
+        print("{:28s} {:.3f} s  (x{:.2f})".format(
+            name + ":", seconds, serial / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare job_reader, parsing the bytes read from the log, against parsing
+the lines read in text mode with the fast event line path, and against the
+regex-only parsing of all the lines.
+
+    python -m benchmarks.bench_parser [YEARS]
+"""
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.worklog_file import Parser, job_reader
+
+
+class RegexOnlyParser(Parser):
+    """Parser matching every line against the registered regexes, as all the
+    lines were parsed before the fast path for event lines was added."""
+    def process_line(self, line):
+        return self._process_line_with_registry(line)
+
+
+def text_mode_job_reader(path, parser_class=Parser):
+    """Parse the lines of the log read in text mode, as job_reader did before
+    it parsed the bytes"""
+    with open(path, "r") as f:
+        parser = parser_class()
+        for line in f:
+            result = parser.process_line(line)
+            if result is not None:
+                yield result
+
+
+def regex_only_job_reader(path):
+    return text_mode_job_reader(path, RegexOnlyParser)
+
+
+def count_actions(reader, path):
+    return sum(1 for _ in reader(path))
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        actions = count_actions(job_reader, path)
+        regex_time = best_time(
+            lambda: count_actions(regex_only_job_reader, path))
+        fast_time = best_time(
+            lambda: count_actions(text_mode_job_reader, path))
+        bytes_time = best_time(lambda: count_actions(job_reader, path))
+
+    print("Parsed actions:          {}".format(actions))
+    print("Regex-only job_reader:   {:.3f} s".format(regex_time))
+    print("Fast path job_reader:    {:.3f} s".format(fast_time))
+    print("Bytes job_reader:        {:.3f} s".format(bytes_time))
+    print("Speedup:                 {:.2f}x, {:.2f}x".format(
+        regex_time / fast_time, fast_time / bytes_time))
+
+
+if __name__ == "__main__":
+    main()
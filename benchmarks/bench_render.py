@@ -0,0 +1,58 @@
+"""Compare the throughput of rendering a long chronological report line by
+line with print() and through the block buffered renderer.
+
+    python -m benchmarks.bench_render [YEARS]
+"""
+import os
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.day_range import DayRange
+from did.renderer import TextRenderer
+from did.report import ChronologicalSessionDisplay, IntervalFilter
+from did.worklog import WorkLog
+
+
+class PrintWriter:
+    """Writes each line with its own print() call, as the reports used to"""
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, text):
+        print(text, end='', file=self.out)
+
+    def flush(self):
+        self.out.flush()
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        worklog = WorkLog(path)
+        worklog.compute_stats()
+        display = ChronologicalSessionDisplay(worklog, DayRange(".."), False,
+                                              IntervalFilter())
+
+    with open(os.devnull, 'w') as out:
+        def render(color, printed=False):
+            renderer = TextRenderer(out, color)
+            if printed:
+                renderer._writer = PrintWriter(out)
+            display.renderer = renderer
+            display.display()
+
+        results = [
+            ("print() per line, colored",
+             best_time(lambda: render(True, printed=True))),
+            ("Buffered, colored", best_time(lambda: render(True))),
+            ("Buffered, no colors", best_time(lambda: render(False))),
+        ]
+    lines = sum(len(session.intervals()) + 3 for session in worklog.sessions())
+
+    for name, seconds in results:
+        print("{:28s} {:.3f} s  {:8.0f} lines/s".format(
+            name + ":", seconds, lines / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Compare loading the sessions of the last month of a job log without the
+checkpoint index, as for the aggregated report: reading the whole log, with
+and without the parsed-log cache, against seeking the first day of the
+month in the log.
+
+    python -m benchmarks.bench_seek [YEARS]
+"""
+import datetime
+import os
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.day_range import DayRange
+from did.did import open_worklog
+from did.log_seek import seek_checkpoint
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        with open(path, 'rb') as log_file:
+            log_file.seek(-30, os.SEEK_END)
+            last_line = log_file.read().splitlines()[-1]
+        last_day = datetime.date.fromisoformat(last_line[:10].decode())
+        day_range = DayRange(last_day.strftime("%Y-%m"))
+
+        def load(use_cache=True, seek=False):
+            worklog, _ = open_worklog(path, day_range.first_day, use_cache,
+                                      stream=True, seek=seek)
+            return [session.stats().overhours()
+                    for session in worklog.sessions_in_range(day_range)]
+
+        assert load(seek=True) == load(use_cache=False)
+        results = [
+            ("Whole log parsed", best_time(lambda: load(use_cache=False), 3)),
+            ("Whole log from the cache", best_time(load, 3)),
+            ("Seeking the month", best_time(lambda: load(seek=True), 3)),
+            ("seek_checkpoint() only", best_time(
+                lambda: seek_checkpoint(path, day_range.first_day), 3)),
+        ]
+
+    for name, seconds in results:
+        print("{:28s} {:.3f} s".format(name + ":", seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Compare multi-year reports computed in one process and in several worker
+processes, each loading a shard of the job log.
+
+    python -m benchmarks.bench_shards [YEARS] [JOBS]
+"""
+import contextlib
+import io
+import os
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did import did
+
+REPORTS = [
+    ("-a -r ..", ["-a", "-r", ".."]),
+    ("-d -r ..", ["-d", "-r", ".."]),
+]
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    jobs = sys.argv[2] if len(sys.argv) > 2 else str(os.cpu_count() or 1)
+    with synthetic_log(years) as path:
+        def report(*args):
+            with contextlib.redirect_stdout(io.StringIO()):
+                did.main(cmdline_args=["-f", path, *args])
+
+        # Builds the checkpoint index, which the shards start at
+        report("-r", "..")
+        results = []
+        for name, args in REPORTS:
+            results.append(("{}, 1 job".format(name),
+                            best_time(lambda: report(*args), 3)))
+            results.append(("{}, {} jobs".format(name, jobs),
+                            best_time(lambda: report("-j", jobs, *args), 3)))
+
+    print("{} CPUs".format(os.cpu_count()))
+    for name, seconds in results:
+        print("{:28s} {:.3f} s".format(name + ":", seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare a job log kept in the text format against the same log kept in an
+SQLite database: converting it, loading all the sessions, loading the
+sessions of the last month as for the aggregated report, and appending an
+event.
+
+    python -m benchmarks.bench_sqlite [YEARS]
+"""
+import datetime
+import os
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.day_range import DayRange
+from did.did import open_worklog
+from did.sqlite_log import SqliteJobLog, SqliteJobListWriter
+from did.worklog import WorkLog
+from did.worklog_file import JobListWriter
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        db_path = path + ".db"
+        export_path = path + ".exported"
+
+        def convert():
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            with SqliteJobLog(db_path) as job_log:
+                job_log.import_text(path)
+
+        def export():
+            if os.path.exists(export_path):
+                os.remove(export_path)
+            with SqliteJobLog(db_path) as job_log:
+                job_log.export_text(export_path)
+
+        results = [("Import to the database", best_time(convert, 3)),
+                   ("Export from the database", best_time(export, 3))]
+        with open(path, 'rb') as log_file, \
+                open(export_path, 'rb') as export_file:
+            assert log_file.read() == export_file.read()
+
+        with SqliteJobLog(db_path) as job_log:
+            last_time = next(job_log.session_starts_backwards())[1]
+        last_day = datetime.date.fromisoformat(last_time[:10])
+        day_range = DayRange(last_day.strftime("%Y-%m"))
+
+        def load_month(file_name, use_cache=True):
+            worklog, _ = open_worklog(file_name, day_range.first_day,
+                                      use_cache, stream=True, seek=True)
+            return [session.stats().overhours()
+                    for session in worklog.sessions_in_range(day_range)]
+
+        assert load_month(db_path) == load_month(path, use_cache=False)
+        results += [
+            ("Whole text log parsed", best_time(lambda: WorkLog(path), 3)),
+            ("Whole database read", best_time(lambda: WorkLog(db_path), 3)),
+            ("Month seeked in text", best_time(
+                lambda: load_month(path), 3)),
+            ("Month queried in database", best_time(
+                lambda: load_month(db_path), 3)),
+        ]
+
+        moment = datetime.datetime.combine(last_day, datetime.time(23))
+
+        def append(writer):
+            nonlocal moment
+            moment += datetime.timedelta(seconds=1)
+            writer.append(moment, "appended task")
+
+        results += [
+            ("Append to text", best_time(
+                lambda: append(JobListWriter(path)), 20)),
+            ("Append to database", best_time(
+                lambda: append(SqliteJobListWriter(db_path)), 20)),
+        ]
+        sizes = [("Text log size", os.path.getsize(path)),
+                 ("Database size", os.path.getsize(db_path))]
+
+    for name, seconds in results:
+        print("{:28s} {:.3f} s".format(name + ":", seconds))
+    for name, size in sizes:
+        print("{:28s} {} bytes".format(name + ":", size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Measure the wall time of "did" commands run as new processes, as they are
+run from shell prompts.
+
+    python -m benchmarks.bench_startup [YEARS]
+"""
+import datetime
+import subprocess
+import sys
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.worklog import WorkLog
+
+
+# Like the script installed for the "did" entry point
+DID_SCRIPT = ("import sys\n"
+              "from did.__main__ import main\n"
+              "sys.argv[0] = 'did'\n"
+              "sys.exit(main())\n")
+
+
+def run(*args):
+    subprocess.run([sys.executable, *args], stdout=subprocess.DEVNULL,
+                   check=True)
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        # Record a task now, to save the status and have a current session
+        now = datetime.datetime.now()
+        if WorkLog(path).end() < now:
+            run("-c", DID_SCRIPT, "-f", path, "-q", "arrive")
+        did = ("-c", DID_SCRIPT, "-f", path)
+        run(*did)
+
+        results = [
+            ("Python startup", best_time(lambda: run("-c", "pass"), 10)),
+            ("did --status", best_time(lambda: run(*did, "--status"), 10)),
+            ("did --status --no-cache",
+             best_time(lambda: run(*did, "--status", "--no-cache"))),
+            ("did (today's report)", best_time(lambda: run(*did))),
+        ]
+
+    for name, seconds in results:
+        print("{:28s} {:.1f} ms".format(name + ":", seconds * 1000))
+
+
+if __name__ == "__main__":
+    main()
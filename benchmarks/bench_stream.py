@@ -0,0 +1,78 @@
+"""Compare the peak memory of an aggregated range report of a loaded job log
+and of a streamed one, also when the parsed-log cache and the checkpoint
+index exist, as for "did -a".
+
+    python -m benchmarks.bench_stream [YEARS]
+"""
+import contextlib
+import gc
+import io
+import sys
+import tracemalloc
+
+from benchmarks.synthetic_log import best_time, synthetic_log
+from did.day_range import DayRange
+from did.did import open_worklog
+from did.report import AggregateRangeDisplay, IntervalFilter
+from did.worklog import SessionStream, WorkLog
+
+
+def report(worklog):
+    if not isinstance(worklog, SessionStream):
+        worklog.compute_stats()
+    with contextlib.redirect_stdout(io.StringIO()):
+        display = AggregateRangeDisplay(worklog, DayRange(".."), False,
+                                        IntervalFilter(None))
+        display.display()
+
+
+def peak_memory(func):
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with synthetic_log(years) as path:
+        def loaded():
+            report(WorkLog(path))
+
+        def streamed():
+            report(SessionStream(path))
+
+        def loaded_cached():
+            worklog, _ = open_worklog(path, DayRange("..").first_day)
+            report(worklog)
+
+        def streamed_cached():
+            worklog, _ = open_worklog(path, DayRange("..").first_day,
+                                      stream=True, seek=True)
+            report(worklog)
+
+        results = [
+            ("Loaded", peak_memory(loaded), best_time(loaded, 3)),
+            ("Streamed", peak_memory(streamed), best_time(streamed, 3)),
+        ]
+        # Create the cache and the index
+        worklog, index = open_worklog(path, None)
+        worklog.compute_stats()
+        index.update(path, worklog)
+        results += [
+            ("Loaded, cache", peak_memory(loaded_cached),
+             best_time(loaded_cached, 3)),
+            ("Streamed, cache", peak_memory(streamed_cached),
+             best_time(streamed_cached, 3)),
+        ]
+
+    mib = 1024 * 1024
+    for name, peak, seconds in results:
+        print("{:17s} peak {:6.1f} MiB   {:.3f} s".format(
+            name + ":", peak / mib, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Compare the aggregated report of several job logs computed in one process
+and in a pool of worker processes.
+
+    python -m benchmarks.bench_team [LOGS] [YEARS]
+"""
+import datetime
+import io
+import os
+import sys
+import tempfile
+
+from benchmarks.synthetic_log import best_time, generate_log
+from did.day_range import DayRange
+from did.renderer import TextRenderer
+from did.report import AggregateRangeDisplay, IntervalFilter
+from did.team import aggregate_logs
+
+
+def main():
+    logs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    now = datetime.datetime.now()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = [os.path.join(temp_dir, "joblog{}".format(index))
+                 for index in range(logs)]
+        for index, path in enumerate(paths):
+            generate_log(path, years, seed=index)
+
+        def report(max_workers):
+            display = AggregateRangeDisplay(
+                None, DayRange(".."), False, IntervalFilter(),
+                TextRenderer(io.StringIO()))
+            aggregate_logs(display, paths, False, now, max_workers)
+            display.display_sessions([])
+
+        results = [("One process", best_time(lambda: report(1), 3)),
+                   ("Process pool", best_time(lambda: report(None), 3))]
+
+    print("{} logs of {} years, {} CPUs".format(logs, years, os.cpu_count()))
+    for name, seconds in results:
+        print("{:28s} {:.3f} s".format(name + ":", seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Generator of synthetic job logs used by the benchmarks."""
+import datetime
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+WORK_TASKS = [
+    "emails",
+    "stand-up",
+    "team meeting",
+    "coding project-foo",
+    "coding project-bar",
+    "testing project-foo",
+    "review project-bar",
+    "support customer-{}",
+    "planning sprint-{}",
+]
+
+BREAK_TASKS = [
+    ".coffee",
+    ".lunch",
+    ".tea",
+    "walk **",
+]
+
+
+def generate_log(path: str, years: int = 10, tasks_per_day: int = 20,
+                 seed: int = 1234) -> int:
+    """Write a chronological job log spanning given number of years.
+
+    Return the number of lines written.
+    """
+    rng = random.Random(seed)
+    day = datetime.date(2010, 1, 4)
+    last_day = day + datetime.timedelta(days=365 * years)
+    lines = 0
+    with open(path, "w") as log_file:
+        log_file.write("# Synthetic job log\n")
+        log_file.write("config daily_work_time = 8h\n")
+        lines += 2
+        while day < last_day:
+            if day.weekday() >= 5 and rng.random() > 0.05:
+                day += datetime.timedelta(days=1)
+                continue
+            if day.day == 1 and day.month == 1:
+                hours = rng.choice([6, 7, 8])
+                log_file.write("config daily_work_time = {}h\n".format(hours))
+                lines += 1
+            arrive = "arrive" if day.weekday() < 5 else "arrive ooo"
+            moment = datetime.datetime.combine(day, datetime.time(8, 0)) \
+                + datetime.timedelta(seconds=rng.randrange(2 * 3600))
+            log_file.write("{}: {}\n".format(
+                moment.strftime("%Y-%m-%d %H:%M:%S"), arrive))
+            for _ in range(tasks_per_day):
+                moment += datetime.timedelta(seconds=rng.randrange(60, 2400))
+                if rng.random() < 0.2:
+                    name = rng.choice(BREAK_TASKS)
+                else:
+                    name = rng.choice(WORK_TASKS).format(rng.randrange(20))
+                log_file.write("{}: {}\n".format(
+                    moment.strftime("%Y-%m-%d %H:%M:%S"), name))
+            lines += tasks_per_day + 1
+            day += datetime.timedelta(days=1)
+    return lines
+
+
+@contextmanager
+def synthetic_log(years: int = 10, tasks_per_day: int = 20
+                  ) -> Iterator[str]:
+    """Context manager yielding a path of a temporary synthetic job log."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "joblog")
+        generate_log(path, years, tasks_per_day)
+        yield path
+
+
+def best_time(func, repeat: int = 5) -> float:
+    """Return the best wall time (in seconds) of several runs of func()."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
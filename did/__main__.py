@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import sys
+
+from did.daemon import query_daemon
+from did.status import print_status
+
+
+def main():
+    """Entry point of the "did" command.  Status queries are answered from
+    the status file, and report queries by the daemon, if possible, without
+    importing the rest of Did."""
+    cmdline_args = sys.argv[1:]
+    if print_status(cmdline_args) or query_daemon(cmdline_args):
+        return
+    from did.did import main as did_main
+    did_main(cmdline_args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Callable, Optional
+
+
+def write_file_atomically(file_name: str,
+                          write: Callable[[BinaryIO], Any]) -> Optional[int]:
+    """Replace the file with the contents written by write(file), so that
+    readers see either the old or the new file.  Return the size of the new
+    file, or None if it couldn't be written."""
+    directory = os.path.dirname(os.path.abspath(file_name))
+    try:
+        handle, temp_file_name = tempfile.mkstemp(dir=directory,
+                                                  prefix='.did-')
+    except OSError:
+        return None
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            write(temp_file)
+            size = temp_file.tell()
+        os.replace(temp_file_name, file_name)
+        return size
+    except OSError:
+        try:
+            os.remove(temp_file_name)
+        except OSError:
+            pass
+        return None
+
+
+def write_json_atomically(file_name: str, data: Any) -> Optional[int]:
+    """Replace the file with the data encoded in JSON, like
+    write_file_atomically."""
+    text = json.dumps(data, separators=(',', ':'))
+    return write_file_atomically(file_name, lambda f: f.write(text.encode()))
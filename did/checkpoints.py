@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import bisect
+import datetime
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from did.atomic_file import write_json_atomically
+from did.log_cache import LogPrefix, file_stat
+from did.worktime import Accounting, duration_from_data, duration_to_data
+
+INDEX_SUFFIX = '.didindex'
+"""Suffix appended to the job log file name to make the index file name"""
+
+INDEX_FORMAT_VERSION = 4
+
+SESSION_START_REGEX = re.compile(
+    rb'^(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}(?::\d{2})?: arrive( ooo)?\r?$',
+    re.MULTILINE)
+"""Regex of the lines starting sessions in a job log, capturing the date and
+the " ooo" suffix of the sessions that aren't workdays"""
+
+CONFIG_LINE_REGEX = re.compile(rb'^\s*config\b', re.MULTILINE)
+"""Regex of the config lines in a job log"""
+
+
+def arrive_line_offsets(data: bytes, base_offset: int = 0) -> List[int]:
+    """Return the offsets of all the lines starting sessions in the given
+    part of a job log, which starts at base_offset in the file."""
+    return [base_offset + match.start()
+            for match in SESSION_START_REGEX.finditer(data)]
+
+
+class Checkpoint:
+    """The state needed to load a job log starting from a session.
+
+    Attributes:
+        offset - Offset in the log file of the line starting the session,
+            or its line number if the log is kept in an SQLite database.
+        date - The date when the session starts.
+        total_overtime - Sum of the overtime of all the preceding sessions.
+        accounting - The Accounting in effect for the session.
+        line_number - Number of the line starting the session, used to
+            report errors, or None if it isn't known.
+    """
+    def __init__(self,
+                 offset: int,
+                 date: datetime.date,
+                 total_overtime: datetime.timedelta,
+                 accounting: Accounting,
+                 line_number: Optional[int] = None):
+        self.offset = offset
+        self.date = date
+        self.total_overtime = total_overtime
+        self.accounting = accounting
+        self.line_number = line_number
+
+
+def checkpoints_to_data(checkpoints: List[Checkpoint]) -> dict:
+    """Return the checkpoints as plain data, which can be saved in JSON.  The
+    accountings, which are shared by many sessions, are stored once."""
+    accountings: Dict[Accounting, int] = {}
+    rows = []
+    for checkpoint in checkpoints:
+        accounting_id = accountings.setdefault(checkpoint.accounting,
+                                               len(accountings))
+        rows.append([checkpoint.offset, checkpoint.line_number,
+                     checkpoint.date.isoformat(),
+                     duration_to_data(checkpoint.total_overtime),
+                     accounting_id])
+    return {'accountings': [accounting.to_data()
+                            for accounting in accountings],
+            'checkpoints': rows}
+
+
+def checkpoints_from_data(data) -> List[Checkpoint]:
+    """Return the checkpoints saved by checkpoints_to_data().  Raise
+    ValueError if the data is invalid, including checkpoints which aren't in
+    the order of the log."""
+    if (not isinstance(data, dict) or
+            not isinstance(data.get('accountings'), list) or
+            not isinstance(data.get('checkpoints'), list)):
+        raise ValueError("Invalid checkpoints")
+    accountings = [Accounting.from_data(accounting_data)
+                   for accounting_data in data['accountings']]
+    checkpoints: List[Checkpoint] = []
+    last_line_number = 0
+    for row in data['checkpoints']:
+        if (not isinstance(row, list) or len(row) != 5 or
+                type(row[0]) is not int or type(row[1]) is not int or
+                not isinstance(row[2], str) or type(row[4]) is not int or
+                not 0 <= row[4] < len(accountings)):
+            raise ValueError("Invalid checkpoint: {!r}".format(row))
+        offset, line_number = row[0], row[1]
+        checkpoint = Checkpoint(offset, datetime.date.fromisoformat(row[2]),
+                                duration_from_data(row[3]),
+                                accountings[row[4]], line_number)
+        if checkpoints and (offset <= checkpoints[-1].offset or
+                            line_number <= last_line_number or
+                            checkpoint.date <= checkpoints[-1].date):
+            raise ValueError("Checkpoints out of order")
+        checkpoints.append(checkpoint)
+        last_line_number = line_number
+    return checkpoints
+
+
+class CheckpointIndex:
+    """Index of checkpoints at the start of every session in a job log.
+
+    It lets a report for a range of days start parsing the log at the first
+    session in the range, instead of at the beginning of the file.
+
+    The checkpoints depend only on the part of the log preceding the last
+    checkpoint, so the index stays valid as long as that part of the log is
+    unchanged.
+    """
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.checkpoints: List[Checkpoint] = []
+        self.prefix = LogPrefix(0, hashlib.sha1().hexdigest(), (-1, -1))
+        self._dates: List[datetime.date] = []
+        self._digest: Optional['hashlib._Hash'] = None
+        self._is_valid = False
+
+    def load(self, log_file_name: str) -> bool:
+        """Load the index and check if it's valid for the given log file.
+        Return True if the index can be used.
+
+        The index is plain data in JSON, which is checked while loading, so
+        an invalid index is ignored like a missing one.
+        """
+        try:
+            with open(self.file_name, 'rb') as index_file:
+                contents = json.loads(index_file.read())
+            if (not isinstance(contents, dict) or
+                    contents.get('version') != INDEX_FORMAT_VERSION):
+                return False
+            prefix = LogPrefix.from_data(contents.get('prefix'))
+            checkpoints = checkpoints_from_data(contents)
+        except (OSError, RecursionError, ValueError):
+            return False
+        try:
+            with open(log_file_name, 'rb') as log_file:
+                self._is_valid, self._digest = prefix.matches(
+                    log_file, file_stat(log_file))
+        except OSError:
+            return False
+        if self._is_valid:
+            self.prefix = prefix
+            self.checkpoints = checkpoints
+            self._dates = [checkpoint.date for checkpoint in self.checkpoints]
+        return self._is_valid
+
+    def checkpoint_for(self, day: datetime.date) -> Optional[Checkpoint]:
+        """Return the checkpoint of the first session starting on the given
+        day or later, or of the last session if there is no such session.
+        Return None if all the sessions need to be loaded to report sessions
+        since that day."""
+        index = bisect.bisect_left(self._dates, day)
+        if index == 0:
+            return None
+        return self.checkpoints[min(index, len(self.checkpoints) - 1)]
+
+    def checkpoints_between(self, first_day: datetime.date,
+                            last_day: datetime.date
+                            ) -> Tuple[List[Checkpoint], Optional[int]]:
+        """Return the checkpoints of the sessions which need to be loaded to
+        report the sessions starting on the days from first_day to last_day:
+        from the checkpoint_for(first_day) (or the first one) to the last one
+        in the range.  Also return the offset of the following session, where
+        loading can stop, or None if the log needs to be read to its end."""
+        if not self.checkpoints:
+            return [], None
+        first = min(bisect.bisect_left(self._dates, first_day),
+                    len(self.checkpoints) - 1)
+        last = bisect.bisect_right(self._dates, last_day)
+        if last < len(self.checkpoints):
+            return self.checkpoints[first:last], self.checkpoints[last].offset
+        return self.checkpoints[first:], None
+
+    def restore_overhours(self, worklog):
+        """Set the overtime of the sessions in a WorkLog, which is already known
+        from the checkpoints, so that it doesn't need to be computed."""
+        first = bisect.bisect_left(
+            [checkpoint.offset for checkpoint in self.checkpoints],
+            worklog.start_offset)
+        for session, checkpoint, next_checkpoint in zip(
+                worklog.sessions(), self.checkpoints[first:],
+                self.checkpoints[first + 1:]):
+            if session.start.date() != checkpoint.date:
+                break
+            session.set_overhours(next_checkpoint.total_overtime -
+                                  checkpoint.total_overtime)
+
+    def update(self, log_file_name: str, worklog):
+        """Add the checkpoints of the sessions appended to the log since the
+        index was saved.  The given WorkLog must have its overtime computed,
+        and must contain all those sessions.
+
+        Failures are ignored, because the index is only an optimization.
+        """
+        if self._is_valid:
+            read_offset = self.prefix.size
+        elif worklog.start_offset == 0:
+            read_offset = 0
+        else:
+            return
+        try:
+            with open(log_file_name, 'rb') as log_file:
+                stat = file_stat(log_file)
+                if self._is_valid and stat == self.prefix.stat:
+                    return
+                log_file.seek(read_offset)
+                data = log_file.read()
+        except OSError:
+            return
+
+        offsets = arrive_line_offsets(data, read_offset)
+        sessions = worklog.sessions()
+        if not offsets or len(offsets) > len(sessions):
+            # The log has been modified in the meantime
+            return
+        new_sessions = sessions[len(sessions) - len(offsets):]
+
+        if self._is_valid:
+            last = self.checkpoints[-1]
+            if (self._digest is None or offsets[0] != last.offset or
+                    new_sessions[0].start.date() != last.date or
+                    last.line_number is None):
+                return
+            digest = self._digest
+            line_number = last.line_number
+            del self.checkpoints[-1]
+        else:
+            digest = hashlib.sha1()
+            line_number = 1
+            self.checkpoints = []
+
+        position = 0
+        for offset, session in zip(offsets, new_sessions):
+            line_number += data.count(b'\n', position, offset - read_offset)
+            position = offset - read_offset
+            self.checkpoints.append(Checkpoint(
+                offset, session.start.date(),
+                session.total_overtime() - session.overhours(),
+                session.accounting(), line_number))
+        digest.update(data[:offsets[-1] - read_offset])
+        self.prefix = LogPrefix(offsets[-1], digest.hexdigest(), stat)
+        self._dates = [checkpoint.date for checkpoint in self.checkpoints]
+        self._digest = digest
+        self._is_valid = True
+        contents = checkpoints_to_data(self.checkpoints)
+        contents.update(version=INDEX_FORMAT_VERSION,
+                        prefix=self.prefix.to_data())
+        write_json_atomically(self.file_name, contents)
@@ -37,3 +37,17 @@ class Foreground(object):
 class Attributes(object):
     reset = ecma48(0)
     bold = ecma48(1)
+
+
+class NoForeground(Foreground):
+    """Foreground without the escape codes, for the output which isn't
+    colored"""
+    black = red = green = brown = blue = magenta = cyan = white = ""
+
+
+class NoAttributes(Attributes):
+    reset = bold = ""
+
+
+CLEAR_SCREEN = "\x1B[H\x1B[2J"
+"""Moves the cursor to the top left corner and clears the whole screen"""
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import os
+import sys
+
+from did.status import default_log_file_name
+
+# The client runs before every "did" command, so this module imports only
+# what the client needs, and the server imports the rest in its methods.
+
+SOCKET_SUFFIX = '.didsocket'
+"""Suffix appended to the job log file name to make the name of the socket
+of the daemon serving its reports"""
+
+_REPORT_FLAGS = {'-a', '--aggregate', '-d', '--aggregate-day',
+                 '-p', '--percentage', '-s', '--split-breaks'}
+_REPORT_OPTIONS = {'-r', '--range', '-g', '--grep', '--format', '--color'}
+_LOG_FILE_OPTIONS = {'-f', '--log-file'}
+
+QUERY_TIMEOUT = 2.0
+"""Seconds the client waits for the daemon, e.g. busy with another query,
+before making the report by itself"""
+
+# The protocol: the client sends "1" or "0", telling if its standard output
+# is a terminal, then the command line arguments, each terminated by a null
+# byte, and shuts down its side of the connection.  The daemon replies with
+# "0" and the report, or with "1" if the client should make the report by
+# itself.
+_ANSWERED = b'0'
+_NOT_ANSWERED = b'1'
+
+
+class DaemonRunningError(Exception):
+    def __init__(self, socket_name: str):
+        super().__init__("A daemon is already listening on {}"
+                         .format(socket_name))
+
+
+def report_log_file_name(args):
+    """Check if the arguments are a report query, which a daemon can answer:
+    only the -r, -a, -d, -g, -p, -s, --format, --color and -f options.
+
+    Return the name of the log file to report, or None if the arguments
+    aren't a report query.  Reports of several log files aren't queries, nor
+    are the reports with --no-cache, which must read the log file.
+    """
+    log_file_name = None
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        name = arg.split('=', 1)[0]
+        if arg in _REPORT_FLAGS:
+            pass
+        elif name in _REPORT_OPTIONS or name in _LOG_FILE_OPTIONS:
+            if '=' in arg:
+                value = arg.split('=', 1)[1]
+            elif index + 1 < len(args):
+                index += 1
+                value = args[index]
+            else:
+                return None
+            if name in _LOG_FILE_OPTIONS:
+                if log_file_name is not None or _has_glob_magic(value):
+                    return None
+                log_file_name = value
+        elif (len(arg) > 2 and arg[0] == '-' and arg[1] != '-' and
+              all('-' + flag in _REPORT_FLAGS for flag in arg[1:])):
+            # Short flags given together, like -ap
+            pass
+        else:
+            return None
+        index += 1
+    if log_file_name is None:
+        return default_log_file_name()
+    return log_file_name
+
+
+def _has_glob_magic(file_name: str) -> bool:
+    return any(char in file_name for char in '*?[')
+
+
+def query_daemon(args, out=None) -> bool:
+    """Write the report answered by the daemon, if the arguments are a report
+    query, and the daemon of the log file is running.  Return False if it
+    wasn't possible."""
+    log_file_name = report_log_file_name(args)
+    if log_file_name is None:
+        return False
+    socket_name = log_file_name + SOCKET_SUFFIX
+    if not os.path.exists(socket_name):
+        return False
+    if out is None:
+        out = sys.stdout.buffer
+
+    import socket
+    report = []
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(QUERY_TIMEOUT)
+            sock.connect(socket_name)
+            is_terminal = b'1' if sys.stdout.isatty() else b'0'
+            sock.sendall(is_terminal + b''.join(
+                arg.encode() + b'\0' for arg in args))
+            sock.shutdown(socket.SHUT_WR)
+            if sock.recv(1) != _ANSWERED:
+                return False
+            while True:
+                data = sock.recv(64 * 1024)
+                if not data:
+                    break
+                report.append(data)
+    except (socket.timeout, OSError):
+        # The report is written only once it's complete, so that it can be
+        # made locally instead
+        return False
+    out.write(b''.join(report))
+    out.flush()
+    return True
+
+
+class DidDaemon:
+    """
+    Serves the reports of a job log to the clients connecting to its socket.
+
+    The WorkLog is kept loaded between the queries, and updated with the
+    lines appended to the file before answering each query.  The reports of
+    the ranges of days ending before the last session can't change until the
+    file is rewritten, so they are kept and sent again when asked for.  The
+    aggregated reports of the ranges including the last session keep their
+    trees of all the other sessions, which don't change either.
+    """
+
+    def __init__(self, log_file_name: str, load, encoding: str = 'utf-8'):
+        """
+        Constructor.
+
+        load - Function loading the WorkLog from the file.
+
+        encoding - Encoding of the reports sent to the clients.
+        """
+        from did.watch import LogWatcher
+
+        self.log_file_name = log_file_name
+        self.socket_name = log_file_name + SOCKET_SUFFIX
+        self.encoding = encoding
+        self._watcher = LogWatcher(log_file_name, load)
+        self._reload_count = self._watcher.reload_count
+        self._reports: dict = {}
+        # The aggregated range displays of all the sessions in their ranges
+        # but the last one, with the number of the sessions added to them
+        self._aggregates: dict = {}
+        self._socket = None
+
+    def bind(self):
+        """Start listening on the socket, replacing it if it was left by a
+        daemon which isn't running anymore."""
+        import socket
+
+        if os.path.exists(self.socket_name):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(self.socket_name)
+                except OSError:
+                    os.unlink(self.socket_name)
+                else:
+                    raise DaemonRunningError(self.socket_name)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.socket_name)
+        self._socket.listen()
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            os.unlink(self.socket_name)
+
+    def serve_forever(self):
+        self.bind()
+        try:
+            while True:
+                self.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def handle_request(self):
+        """Wait for a client and answer its query.  A client which doesn't
+        send its query or read the answer in time is dropped, not to block the
+        other clients."""
+        import socket
+
+        connection, _ = self._socket.accept()
+        with connection:
+            connection.settimeout(QUERY_TIMEOUT)
+            try:
+                self._answer(connection)
+            except (socket.timeout, OSError):
+                pass
+
+    def _answer(self, connection):
+        """Receive the query from the connected client and send the answer."""
+        request = b''
+        while True:
+            data = connection.recv(64 * 1024)
+            if not data:
+                break
+            request += data
+        try:
+            report = self.report(request[:1] == b'1',
+                                 request[1:].decode().split('\0')[:-1])
+        except Exception:
+            import traceback
+            traceback.print_exc()
+            report = None
+        if report is None:
+            connection.sendall(_NOT_ANSWERED)
+        else:
+            connection.sendall(_ANSWERED + report)
+
+    def report(self, is_terminal: bool, args):
+        """Return the report asked for with the command line arguments, or
+        None if it isn't a report of this daemon's log."""
+        import datetime
+        import io
+        from did.day_range import DayRange
+        from did.did import DidApplication
+
+        log_file_name = report_log_file_name(args)
+        if (log_file_name is None or os.path.abspath(log_file_name) !=
+                os.path.abspath(self.log_file_name)):
+            return None
+        now = datetime.datetime.now()
+        app = DidApplication(args, now)
+        try:
+            app.parse_options()
+        except SystemExit:
+            return None
+
+        self._watcher.refresh(now)
+        if self._watcher.reload_count != self._reload_count:
+            self._reload_count = self._watcher.reload_count
+            self._reports.clear()
+            self._aggregates.clear()
+        app.worklog = self._watcher.worklog
+
+        day_range = DayRange(app.args.range)
+        options = dict(vars(app.args), range=None)
+        key = (day_range.first_day, day_range.last_day, is_terminal,
+               repr(sorted(options.items())))
+        sessions = app.worklog.sessions()
+        last_day = sessions[-1].start.date() if sessions else None
+        is_past = last_day is not None and day_range.last_day < last_day
+        if is_past and key in self._reports:
+            return self._reports[key]
+
+        out = io.StringIO()
+        display = app.make_display(day_range, out, is_terminal)
+        if (app.args.aggregate_range and last_day is not None and
+                day_range.first_day <= last_day <= day_range.last_day):
+            self._display_aggregate(key, display)
+        else:
+            display.display()
+        report = out.getvalue().encode(self.encoding)
+        if is_past:
+            self._reports[key] = report
+        return report
+
+    def _display_aggregate(self, key, display):
+        """Display an aggregated report of a range including the last
+        session, adding only the last session to the kept tree of the other
+        sessions."""
+        sessions = list(display.worklog.sessions_in_range(display.day_range))
+        aggregate, count = self._aggregates.get(key, (display, 0))
+        for session in sessions[count:-1]:
+            aggregate.add_session(session)
+        self._aggregates[key] = (aggregate, len(sessions) - 1)
+        aggregate.copy(display.renderer).display_sessions(sessions[-1:])
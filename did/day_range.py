@@ -17,11 +17,19 @@ Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
 Fifth Floor, Boston, MA  02110-1301  USA
 """
 import datetime
-from typing import Tuple
+from typing import Optional, Tuple
 
 from did.dispatchers import RegexDispatcher, UnhandledDispatchError
 
-today = datetime.date.today()
+today: Optional[datetime.date] = None
+"""The date used as today if set, e.g. in tests.  Otherwise the current date
+is taken when a range is parsed."""
+
+
+def current_date() -> datetime.date:
+    if today is not None:
+        return today
+    return datetime.date.today()
 
 
 def date_from_isocalendar(iso_year: int,
@@ -121,26 +129,28 @@ def _pattern_yyyy_mm_dd(groups: Tuple[str, ...]
 @_parse_day_range.register(r'^(0?[1-9]|1[012])-(0[1-9]|[12][0-9]|3[01])$')
 def _pattern_mm_dd(groups: Tuple[str, ...]
                    ) -> Tuple[datetime.date, datetime.date]:
+    current = current_date()
     month = int(groups[0])
     day = int(groups[1])
 
-    if month > today.month or (month == today.month and day > today.day):
+    if month > current.month or (month == current.month and day > current.day):
         # Month-day is past today in this year.  Use the last year.
-        year = today.year - 1
+        year = current.year - 1
     else:
         # Month-day is today or less.  Use the current year.
-        year = today.year
+        year = current.year
 
     return _one_day_range(datetime.date(year, month, day))
 
 
 @_parse_day_range.register(r'^(0?[1-9]|[12][0-9]|3[01])$')
 def _pattern_dd(groups: Tuple[str, ...]) -> Tuple[datetime.date, datetime.date]:
-    year = today.year
-    month = today.month
+    current = current_date()
+    year = current.year
+    month = current.month
     day = int(groups[0])
 
-    if day > today.day:
+    if day > current.day:
         month = month - 1
         if month < 1:
             month = 12
@@ -160,14 +170,14 @@ def _pattern_iso_week_date(groups: Tuple[str, ...]
 @_parse_day_range.register(r'^-(0|[1-9][0-9]*)$')
 def _pattern_x_days_ago(groups: Tuple[str, ...]
                         ) -> Tuple[datetime.date, datetime.date]:
-    return _one_day_range(today - datetime.timedelta(int(groups[0])))
+    return _one_day_range(current_date() - datetime.timedelta(int(groups[0])))
 
 
 @_parse_day_range.register(r'^0$')
 def _pattern_today(groups: Tuple[str, ...]
                    ) -> Tuple[datetime.date, datetime.date]:
     # pylint: disable=unused-argument
-    return _one_day_range(today)
+    return _one_day_range(current_date())
 
 
 @_parse_day_range.register(r'^([12][0-9]{3})-?[wW](0[1-9]|[1-4][0-9]|5[0-3])$')
@@ -180,7 +190,8 @@ def _pattern_iso_week(groups: Tuple[str, ...]
 @_parse_day_range.register(r'^[wW](0?[1-9]|[1-4][0-9]|5[0-3])$')
 def _pattern_w_ww(groups: Tuple[str, ...]
                   ) -> Tuple[datetime.date, datetime.date]:
-    (today_year, today_week) = today.isocalendar()[0:2]
+    current = current_date()
+    (today_year, today_week) = current.isocalendar()[0:2]
     week = int(groups[0])
 
     if week > today_week:
@@ -198,14 +209,16 @@ def _pattern_w_ww(groups: Tuple[str, ...]
 def _pattern_current_week(groups: Tuple[str, ...]
                           ) -> Tuple[datetime.date, datetime.date]:
     # pylint: disable=unused-argument
-    return (today - datetime.timedelta(today.weekday()),
-            today + datetime.timedelta(6 - today.weekday()))
+    current = current_date()
+    return (current - datetime.timedelta(current.weekday()),
+            current + datetime.timedelta(6 - current.weekday()))
 
 
 @_parse_day_range.register(r'^[wW]-([1-9][0-9]*)$')
 def _pattern_x_weeks_ago(groups: Tuple[str, ...]
                          ) -> Tuple[datetime.date, datetime.date]:
-    start = today - datetime.timedelta(today.weekday() + 7 * int(groups[0]))
+    current = current_date()
+    start = current - datetime.timedelta(current.weekday() + 7 * int(groups[0]))
     return start, start + datetime.timedelta(6)
 
 
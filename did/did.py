@@ -28,12 +28,12 @@ import os
 import sys
 
 from did.argument_parser import ArgumentParser
-from did.editor import open_editor
-from did.worklog import WorkLog
-from did.worklog_file import JobListWriter
-from did.report import ChronologicalSessionDisplay, AggregateSessionDisplay, \
-    AggregateRangeDisplay, ReportTimePercent, IntervalFilter
-from did.day_range import DayRange
+from did.status import DEFAULT_STATUS_FORMAT, STATUS_FIELDS, STATUS_SUFFIX, \
+    SessionStatus, config_dir, default_log_file_name, format_status, \
+    load_status, save_status
+
+# The other modules are imported only by the methods that need them, so that
+# each command imports only what it uses, to start quickly.
 
 
 class DidApplication:
@@ -44,27 +44,152 @@ class DidApplication:
         self.args = None
         self.cmdline_args = cmdline_args
         self.now = now
+        self.worklog = None
 
     def run(self):
         self.parse_options()
 
         if self.args.run_editor:
+            from did.editor import open_editor
             open_editor(self.args.logfile)
             sys.exit()
 
+        if len(self.args.logfiles) > 1:
+            self.print_team_report()
+            return
+
         if not os.path.exists(self.args.logfile):
             self.create_file(self.args.logfile)
 
-        self.worklog = WorkLog(file_name=self.args.logfile)
+        if self.args.status_format is not None:
+            self.print_status()
+            return
 
         if 0 < len(self.args.current_task):
             self.append_event(" ".join(self.args.current_task))
-        elif self.worklog.end():
-            if self.worklog.end().date() == self.now.date():
-                self.worklog.append_assumed_interval(self.now)
+            if self.args.quiet:
+                return
+
+        if self.args.daemon:
+            self.serve()
+        elif self.args.watch is not None:
+            self.watch()
+        else:
+            self.print_report()
+
+    def print_report(self):
+        from did.day_range import DayRange
+
+        day_range = DayRange(self.args.range)
+        assume_until = self.now if 0 == len(self.args.current_task) else None
+        if self.args.jobs > 1:
+            if self.print_sharded_report(day_range, assume_until):
+                return
+        if self.args.aggregate_range and self.args.jobs == 1:
+            # The aggregated report doesn't need the sessions after adding
+            # them up, so they are streamed instead of loaded all at once.
+            # Nor does it need their running total of overtime, so without
+            # the index the first day can be found by seeking it in the log.
+            # The report in several processes needs the checkpoint index,
+            # which is updated only when the sessions are loaded.
+            self.load_worklog(day_range.first_day, stream=True,
+                              assume_until=assume_until,
+                              seek=self.args.use_cache)
+        else:
+            self.load_worklog(day_range.first_day)
+            if assume_until is not None and self.worklog.end():
+                if self.worklog.end().date() == assume_until.date():
+                    self.worklog.append_assumed_interval(assume_until)
+
+            self.worklog.compute_stats()
+            if self.index is not None:
+                self.index.update(self.args.logfile, self.worklog)
+        self.display_report(day_range)
+
+    def print_sharded_report(self, day_range, assume_until):
+        """Print the report computed in several worker processes, each
+        loading a part of the log starting at a checkpoint of the index.
+        Return False, without printing anything, if the index isn't valid or
+        there are too few sessions to split."""
+        from did.checkpoints import INDEX_SUFFIX, CheckpointIndex
+        from did.shards import display_sharded
+
+        if not self.args.use_cache:
+            return False
+        index = CheckpointIndex(self.args.logfile + INDEX_SUFFIX)
+        if not index.load(self.args.logfile):
+            return False
+        return display_sharded(self.make_display(day_range),
+                               self.args.logfile, index, self.args.jobs,
+                               assume_until)
+
+    def print_team_report(self):
+        """Print the aggregated report of several log files"""
+        from did.day_range import DayRange
+        from did.team import aggregate_logs
+
+        day_range = DayRange(self.args.range)
+        display = self.make_display(day_range)
+        aggregate_logs(display, self.args.logfiles, self.args.use_cache,
+                       self.now)
+        display.display_sessions([])
+
+    def watch(self):
+        """Display the report again every few seconds, updating the work log
+        with the lines appended to the file."""
+        import time
+        from did.console_codes import CLEAR_SCREEN
+        from did.day_range import DayRange
+        from did.watch import LogWatcher
 
-        self.worklog.compute_stats()
+        def load():
+            self.load_worklog(DayRange(self.args.range).first_day)
+            return self.worklog
 
+        watcher = LogWatcher(self.args.logfile, load)
+        try:
+            while True:
+                watcher.refresh(datetime.datetime.now())
+                self.worklog = watcher.worklog
+                if sys.stdout.isatty():
+                    sys.stdout.write(CLEAR_SCREEN)
+                self.display_report(DayRange(self.args.range))
+                time.sleep(self.args.watch)
+        except KeyboardInterrupt:
+            pass
+
+    def serve(self):
+        """Answer the report queries of the clients until interrupted"""
+        from did.daemon import DidDaemon
+
+        def load():
+            # The queries may ask for any range, so all the sessions are kept
+            self.load_worklog(None)
+            return self.worklog
+
+        DidDaemon(self.args.logfile, load).serve_forever()
+
+    def display_report(self, day_range, out=None, is_terminal=None):
+        """Display the report of the range of days from self.worklog.  The
+        arguments are the same as of make_display()."""
+        self.make_display(day_range, out, is_terminal).display()
+
+    def make_display(self, day_range, out=None, is_terminal=None):
+        """Return the Display of the report of the range of days from
+        self.worklog, chosen by the command line options.
+
+        out - Text stream to write the report to, instead of sys.stdout.
+
+        is_terminal - Whether the report is shown on a terminal, if it's
+            different than what out tells.
+        """
+        from did.report import ChronologicalSessionDisplay, \
+            AggregateSessionDisplay, AggregateRangeDisplay, ReportTimePercent, \
+            IntervalFilter
+        from did.renderer import make_renderer
+
+        color = {"auto": is_terminal, "always": True, "never": False}[
+            self.args.color]
         if self.args.aggregate_range:
             cls = AggregateRangeDisplay
         elif self.args.aggregate_day:
@@ -73,14 +198,23 @@ class DidApplication:
             cls = ChronologicalSessionDisplay
 
         session_display = cls(self.worklog,
-                              DayRange(self.args.range),
+                              day_range,
                               adjusted=self.args.split_breaks,
-                              filter=IntervalFilter(self.args.grep_pattern))
+                              filter=IntervalFilter(self.args.grep_pattern),
+                              renderer=make_renderer(self.args.output_format,
+                                                     out, color))
 
         if self.args.percentage and (self.args.aggregate_range or
                                      self.args.aggregate_day):
             session_display.set_unit(ReportTimePercent(self.args.split_breaks))
-        session_display.display()
+        return session_display
+
+    def load_worklog(self, first_day, stream=False, assume_until=None,
+                     seek=False):
+        """Load the work log into self.worklog, with open_worklog()"""
+        self.worklog, self.index = open_worklog(
+            self.args.logfile, first_day, self.args.use_cache, stream,
+            assume_until, self.args.jobs, seek)
 
     def parse_options(self):
         parser = ArgumentParser(
@@ -88,10 +222,45 @@ class DidApplication:
             usage='%(prog)s [options] [CURRENT-TASK]')
         parser.add_argument("-f", "--log-file",
                             metavar="FILE",
-                            dest="logfile",
-                            default=self.get_config_dir() + "/joblog",
-                            action="store",
-                            help="set the task database file")
+                            dest="logfiles",
+                            default=None,
+                            action="append",
+                            help="set the task database file; with -a it "
+                                 "can be given several times, or as a glob "
+                                 "pattern, to report the files together")
+        parser.add_argument("--no-cache", action="store_false",
+                            dest="use_cache",
+                            help="parse the whole task database file, "
+                                 "instead of using the cache of its already "
+                                 "parsed part and the index of its sessions")
+        parser.add_argument("-q", "--quiet", action="store_true",
+                            dest="quiet",
+                            help="only record the current task, without "
+                                 "printing the report")
+        parser.add_argument("--status",
+                            metavar="FORMAT",
+                            nargs="?",
+                            const=DEFAULT_STATUS_FORMAT,
+                            default=None,
+                            dest="status_format",
+                            help="print the status of the current session, "
+                                 "formatted with the fields {task}, {start}, "
+                                 "{last}, {since}, {work}, {break} and "
+                                 "{overtime} (default: \"{task} {work}\")")
+        parser.add_argument("--watch",
+                            metavar="SECONDS",
+                            nargs="?",
+                            type=float,
+                            const=2.0,
+                            default=None,
+                            help="keep displaying the report, updated every "
+                                 "SECONDS (2 by default) with the tasks "
+                                 "appended to the task database file")
+        parser.add_argument("--daemon", action="store_true",
+                            dest="daemon",
+                            help="keep the task database loaded and answer "
+                                 "the report queries of other did commands, "
+                                 "until interrupted")
         parser.add_argument("-e", "--edit", action="store_true",
                             dest="run_editor",
                             help="open the task database file in an editor")
@@ -125,15 +294,59 @@ class DidApplication:
                             help="account the break time that is treated as "
                                  "work time evenly across all work jobs in a "
                                  "session")
+        parser.add_argument("--format",
+                            choices=["text", "jsonl", "csv"],
+                            default="text",
+                            dest="output_format",
+                            help="output format of the report: colored text, "
+                                 "JSON Lines or CSV records")
+        parser.add_argument("--color",
+                            choices=["auto", "always", "never"],
+                            default="auto",
+                            help="color the text report always, never, or "
+                                 "only when writing to a terminal (default)")
+        parser.add_argument("-j", "--jobs",
+                            metavar="N",
+                            type=int,
+                            default=1,
+                            help="compute the report in N worker processes, "
+                                 "each reading a part of the task database "
+                                 "file (1 by default)")
         parser.add_argument('current_task',
                             nargs=argparse.REMAINDER,
                             help='What have you just been doing?')
         self.args = parser.parse_args(self.cmdline_args)
 
+        if self.args.logfiles is None:
+            self.args.logfiles = [default_log_file_name()]
+        else:
+            self.args.logfiles = expand_log_file_names(self.args.logfiles)
+            if not self.args.logfiles:
+                parser.error("no task database file matches the pattern")
+        self.args.logfile = self.args.logfiles[0]
+        if len(self.args.logfiles) > 1 and not (
+                self.args.aggregate_range and not self.args.current_task and
+                self.args.status_format is None and not self.args.run_editor
+                and self.args.watch is None and not self.args.daemon):
+            parser.error("several task database files can only be reported "
+                         "together with -a")
+        if self.args.status_format is not None:
+            try:
+                format_status(self.args.status_format, None, self.now)
+            except (KeyError, IndexError, ValueError):
+                parser.error("invalid status format {!r}, the fields are {}"
+                             .format(self.args.status_format,
+                                     ", ".join("{" + field + "}"
+                                               for field in STATUS_FIELDS)))
+        if self.args.run_editor or self.args.watch is not None or \
+                self.args.daemon:
+            from did.log_format import is_sqlite_log
+            if is_sqlite_log(self.args.logfile):
+                parser.error("-e, --watch and --daemon need a task database "
+                             "file in the text format")
+
     def get_config_dir(self):
-        if 'HOME' in os.environ:
-            return os.environ['HOME'] + "/.config/did"
-        return "."
+        return config_dir()
 
     def mkdir_p(self, path):
         try:
@@ -150,24 +363,170 @@ class DidApplication:
             pass
 
     def append_event(self, name):
+        """Append an event to the log, checking it against only the sessions at
+        the end of the log."""
+        from did.log_format import is_sqlite_log
+        from did.worklog_file import JobListWriter
+
         if name == ".":
             # Last break interval
-            last_break = self.worklog.last_break_interval()
+            worklog = self.load_worklog_tail(
+                lambda worklog: worklog.last_break_interval() is not None)
+            last_break = worklog.last_break_interval()
             if last_break is None:
                 name = ".break"
             else:
                 name = last_break.name
         elif name == ",":
             # Last work interval
-            last_work = self.worklog.last_work_interval()
+            worklog = self.load_worklog_tail(
+                lambda worklog: worklog.last_work_interval() is not None)
+            last_work = worklog.last_work_interval()
             if last_work is None:
                 name = "work"
             else:
                 name = last_work.name
+        else:
+            worklog = self.load_worklog_tail()
+
+        worklog.append_log_event(self.now, name)
+        if is_sqlite_log(self.args.logfile):
+            from did.sqlite_log import SqliteJobListWriter
+            writer_class = SqliteJobListWriter
+        else:
+            writer_class = JobListWriter
+        writer = writer_class(self.args.logfile, self.status_file_name())
+        writer.append(self.now, name, worklog.sessions()[-1])
+
+    def load_worklog_tail(self, is_enough=None):
+        """Load the sessions at the end of the log, which are needed to append
+        an event.  Their accounting, needed to save the status, is taken from
+        the status file.  If it's out of date, the log is loaded from the
+        checkpoint index instead."""
+        from did.log_tail import tail_worklog
+        from did.log_format import is_sqlite_log
+
+        if is_sqlite_log(self.args.logfile):
+            from did.sqlite_log import tail_sqlite_worklog
+            return tail_sqlite_worklog(self.args.logfile, self.now.date(),
+                                       is_enough)
+        if self.status_file_name() is None:
+            return tail_worklog(self.args.logfile, self.now.date(), is_enough)
+        status = load_status(self.status_file_name(), self.args.logfile)
+        accounting = status.accounting() if status is not None else None
+        if accounting is not None:
+            return tail_worklog(self.args.logfile, self.now.date(), is_enough,
+                                accounting)
+        self.load_worklog(self.now.date())
+        if is_enough is not None and not is_enough(self.worklog):
+            self.load_worklog(None)
+        return self.worklog
+
+    def status_file_name(self):
+        """Return the name of the status file, or None if it's not used."""
+        if not self.args.use_cache:
+            return None
+        return self.args.logfile + STATUS_SUFFIX
+
+    def print_status(self):
+        """Print the status of the current session, computing it from the log,
+        and save it in the status file."""
+        self.load_worklog(self.now.date())
+        status = None
+        if self.worklog.sessions():
+            status = SessionStatus.from_session(self.worklog.sessions()[-1])
+            if self.status_file_name() is not None:
+                save_status(self.status_file_name(), self.args.logfile,
+                            self.worklog.sessions()[-1])
+        print(format_status(self.args.status_format, status, self.now))
+
+
+def expand_log_file_names(patterns):
+    """Return the names of the log files given with the -f options, which can
+    be glob patterns, without repetitions."""
+    import glob
+
+    file_names = []
+    for pattern in patterns:
+        pattern = os.path.expanduser(pattern)
+        if os.path.exists(pattern) or not glob.has_magic(pattern):
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern))
+        for file_name in matches:
+            if file_name not in file_names:
+                file_names.append(file_name)
+    return file_names
+
+
+def open_worklog(file_name, first_day, use_cache=True, stream=False,
+                 assume_until=None, jobs=1, seek=False):
+    """Load a work log, skipping the sessions before first_day if that's
+    possible using the checkpoint index.  Return the WorkLog, and the
+    CheckpointIndex if the cache files are used, or None.
+
+    If stream is True, the work log is a SessionStream, which reads the
+    sessions only while they are iterated over, extending the last one until
+    assume_until.  It doesn't use the cache, to keep the memory used
+    independent of the length of the log.
+
+    The parts of the log which aren't read from the cache are parsed in up to
+    the given number of jobs, i.e. worker processes.
+
+    If seek is True and the index isn't valid, the sessions before first_day
+    are skipped by seeking the day in the log.  The running total of overtime
+    of the loaded sessions then starts from zero, so it must not be needed.
+    A log kept in an SQLite database has no index, but the day is found with
+    its index of the dates.
+
+    If use_cache is False, the cache files next to the log are neither read
+    nor written, but the first day is still sought in the log if seek is
+    True.
+    """
+    from did.checkpoints import INDEX_SUFFIX, CheckpointIndex
+    from did.log_cache import CACHE_SUFFIX
+    from did.worklog import SessionStream, WorkLog
+    from did.log_format import is_sqlite_log
+
+    if stream:
+        def worklog_class(**kwargs):
+            return SessionStream(assume_until=assume_until, jobs=jobs,
+                                 **kwargs)
+    else:
+        def worklog_class(**kwargs):
+            return WorkLog(jobs=jobs, **kwargs)
+
+    if not use_cache and not seek:
+        return worklog_class(file_name=file_name), None
+
+    if is_sqlite_log(file_name):
+        # The database is indexed by the dates instead of the cache files
+        checkpoint = None
+        if first_day is not None and seek:
+            from did.sqlite_log import sqlite_checkpoint
+            checkpoint = sqlite_checkpoint(file_name, first_day)
+        return worklog_class(file_name=file_name, checkpoint=checkpoint), None
 
-        writer = JobListWriter(self.args.logfile)
-        writer.append(self.now, name)
-        self.worklog.append_log_event(self.now, name)
+    index = CheckpointIndex(file_name + INDEX_SUFFIX) if use_cache else None
+    checkpoint = None
+    if first_day is not None:
+        if index is not None and index.load(file_name):
+            checkpoint = index.checkpoint_for(first_day)
+        elif seek:
+            from did.log_seek import seek_checkpoint
+            checkpoint = seek_checkpoint(file_name, first_day)
+    if checkpoint is None and (stream or index is None):
+        # The cache would be loaded into memory all at once, while the log is
+        # parsed line by line
+        worklog = worklog_class(file_name=file_name)
+    elif checkpoint is None:
+        worklog = worklog_class(file_name=file_name,
+                                cache_file_name=file_name + CACHE_SUFFIX)
+    else:
+        worklog = worklog_class(file_name=file_name, checkpoint=checkpoint)
+    if index is not None and not stream:
+        index.restore_overhours(worklog)
+    return worklog, index
 
 
 def main(cmdline_args=None, now=None):
@@ -19,7 +19,7 @@ Fifth Floor, Boston, MA  02110-1301  USA
 """
 
 import datetime
-from typing import Optional
+from typing import Dict, Optional, Tuple, Union
 
 
 def interval_name_denotes_a_break(name: str) -> bool:
@@ -27,32 +27,77 @@ def interval_name_denotes_a_break(name: str) -> bool:
     return name.startswith(".") or "**" in name
 
 
+class TaskName:
+    """A task name together with the properties derived from it.
+
+    Attributes:
+        text - The name, as written in the log.
+        words - The name split into words.
+        is_break - True if the name denotes a break.
+    """
+
+    __slots__ = ('text', 'words', 'is_break')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.words: Tuple[str, ...] = tuple(text.split())
+        self.is_break = interval_name_denotes_a_break(text)
+
+    def __repr__(self):
+        return 'TaskName({})'.format(repr(self.text))
+
+
+class TaskNameTable:
+    """Table of distinct task names, so that each one is analyzed and stored
+    only once, however many intervals have it."""
+
+    def __init__(self):
+        self._names: Dict[str, TaskName] = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def intern(self, text: str) -> TaskName:
+        task_name = self._names.get(text)
+        if task_name is None:
+            task_name = TaskName(text)
+            self._names[text] = task_name
+        return task_name
+
+
 class Interval:
     """The smallest unit of tracking time during which one activity was
     performed.
     """
 
+    __slots__ = ('_start', '_end', 'task_name', 'is_assumed', 'is_break',
+                 '_accounted_break_seconds')
+
     def __init__(self,
                  start: datetime.datetime,
                  end: datetime.datetime,
-                 name: str,
+                 name: Union[str, TaskName],
                  is_assumed: bool = False,
                  is_break: Optional[bool] = None):
         """Make a new interval.
 
+        The name may be given as a TaskName shared with other intervals.
+
         If "is_break" is not provided explicitly, then it will be inferred
         from the name, treating this interval as a break in cases when the name
         starts with a "." or if it contains "**".
         """
+        if isinstance(name, str):
+            name = TaskName(name)
         self._start = start
         self._end = end
-        self.name = name
+        self.task_name = name
         self.is_assumed = is_assumed
         self._accounted_break_seconds = 0
         if is_break is not None:
             self.is_break = is_break
         else:
-            self.is_break = interval_name_denotes_a_break(self.name)
+            self.is_break = name.is_break
 
     def __repr__(self):
         return ('Interval(start="{}", end="{}", name={}, is_assumed={}, '
@@ -70,6 +115,10 @@ class Interval:
                 self.is_break == other.is_break and
                 self._accounted_break_seconds == other._accounted_break_seconds)
 
+    @property
+    def name(self) -> str:
+        return self.task_name.text
+
     @property
     def start(self):
         return self._start
@@ -96,3 +145,6 @@ class Interval:
 
     def account_work_duration(self, seconds):
         self._accounted_break_seconds -= seconds
+
+    def reset_accounted_duration(self):
+        self._accounted_break_seconds = 0
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import datetime
+import hashlib
+import io
+import json
+import os
+from typing import Any, BinaryIO, Dict, Generator, List, Optional, Tuple
+
+from did.atomic_file import write_file_atomically
+from did.worklog_file import BytesParser, DeletePaidBreak, Event, \
+    ParsedActionType, SetParam, read_blocks
+from did.worktime import PaidBreakConfig
+
+CACHE_SUFFIX = '.didcache'
+"""Suffix appended to the job log file name to make the cache file name"""
+
+CACHE_FORMAT_VERSION = 2
+
+_READ_BLOCK_SIZE = 1 << 20
+
+FileStat = Tuple[int, int]
+
+
+def file_stat(f: BinaryIO) -> FileStat:
+    """Return the (size, modification time) pair identifying the file
+    contents, unless the file is modified in the same nanosecond."""
+    stat = os.fstat(f.fileno())
+    return stat.st_size, stat.st_mtime_ns
+
+
+def prefix_digest(f: BinaryIO, size: int) -> 'hashlib._Hash':
+    """Return a SHA-1 hash object fed with the first "size" bytes of a file.
+    """
+    digest = hashlib.sha1()
+    f.seek(0)
+    remaining = size
+    while remaining > 0:
+        block = f.read(min(remaining, _READ_BLOCK_SIZE))
+        if not block:
+            break
+        digest.update(block)
+        remaining -= len(block)
+    return digest
+
+
+class LogPrefix:
+    """Fingerprint of the first "size" bytes of a job log file.
+
+    The job log is append-only, so data derived from its beginning stays valid
+    as long as that beginning is unchanged.  It's verified with a SHA-1 digest,
+    unless the whole file is known to be unchanged since it was fingerprinted,
+    judging by its size and modification time.
+    """
+    def __init__(self, size: int, digest: str, stat: FileStat):
+        self.size = size
+        self.digest = digest
+        self.stat = stat
+
+    def matches(self, f: BinaryIO, stat: FileStat
+                ) -> Tuple[bool, Optional['hashlib._Hash']]:
+        """Check if the file starts with the fingerprinted prefix.
+
+        Return a (matches, digest) tuple.  The digest is a hash object fed with
+        the prefix if it was needed to compute it, otherwise it's None.
+        """
+        if stat == self.stat:
+            return True, None
+        if stat[0] < self.size:
+            return False, None
+        digest = prefix_digest(f, self.size)
+        return digest.hexdigest() == self.digest, digest
+
+    def to_data(self) -> list:
+        """Return the fingerprint as plain data, which can be saved e.g. in
+        JSON."""
+        return [self.size, self.digest, list(self.stat)]
+
+    @classmethod
+    def from_data(cls, data) -> 'LogPrefix':
+        """Return the fingerprint saved by to_data().  Raise ValueError if the
+        data is invalid."""
+        if (not isinstance(data, list) or len(data) != 3 or
+                type(data[0]) is not int or not isinstance(data[1], str) or
+                not isinstance(data[2], list) or len(data[2]) != 2 or
+                any(type(value) is not int for value in data[2])):
+            raise ValueError("Invalid log prefix: {!r}".format(data))
+        return cls(data[0], data[1], (data[2][0], data[2][1]))
+
+
+CachedAction = Any
+"""A cached log action.  Events are kept as (timestamp, text) tuples, which
+take less memory than the Event objects."""
+
+
+_TIMESTAMP_LENGTH = len("YYYY-MM-DD HH:MM:SS")
+
+
+def _other_action_to_data(action: CachedAction):
+    """Return an action other than an event as plain data, a dictionary with
+    a single key naming its kind."""
+    if isinstance(action, SetParam):
+        return {'set': [action.name, action.value]}
+    if isinstance(action, PaidBreakConfig):
+        return {'break': action.to_data()}
+    if isinstance(action, DeletePaidBreak):
+        return {'delete': action.name}
+    raise TypeError("Unexpected action: {!r}".format(action))
+
+
+def _other_action_from_data(data) -> CachedAction:
+    """Return the action saved by _other_action_to_data().  Raise ValueError
+    if the data is invalid."""
+    if isinstance(data, dict) and len(data) == 1:
+        kind, value = next(iter(data.items()))
+        if (kind == 'set' and isinstance(value, list) and len(value) == 2 and
+                isinstance(value[0], str) and isinstance(value[1], str)):
+            return SetParam(value[0], value[1])
+        if kind == 'break':
+            return PaidBreakConfig.from_data(value)
+        if kind == 'delete' and isinstance(value, str):
+            return DeletePaidBreak(value)
+    raise ValueError("Invalid cached action: {!r}".format(data))
+
+
+def _chunk_line(start: int, prefix: LogPrefix,
+                actions: List[CachedAction]) -> bytes:
+    """Return a chunk of the cache file, holding the actions parsed from the
+    log since the start offset up to the prefix.
+
+    The events are stored by columns, like in a ParsedChunk of the parallel
+    reader: their timestamps concatenated, and the indices of their texts,
+    each stored once.  The other actions, which are rare, are stored with
+    their positions.
+    """
+    names: Dict[str, int] = {}
+    timestamps = []
+    name_ids = []
+    others = []
+    for position, action in enumerate(actions):
+        if isinstance(action, tuple):
+            timestamps.append(str(action[0]))
+            name_ids.append(names.setdefault(action[1], len(names)))
+        else:
+            others.append([position, _other_action_to_data(action)])
+    chunk = {'version': CACHE_FORMAT_VERSION,
+             'start': start,
+             'prefix': prefix.to_data(),
+             'timestamps': ''.join(timestamps),
+             'names': list(names),
+             'name_ids': name_ids,
+             'others': others}
+    return json.dumps(chunk, separators=(',', ':')).encode() + b'\n'
+
+
+def _chunk_actions(chunk: dict, shared_names: Dict[str, str]
+                   ) -> List[CachedAction]:
+    """Return the actions of a chunk saved by _chunk_line(), sharing equal
+    event texts through the shared_names dictionary.  Raise ValueError if the
+    chunk is invalid."""
+    timestamps = chunk.get('timestamps')
+    names = chunk.get('names')
+    name_ids = chunk.get('name_ids')
+    others = chunk.get('others')
+    if (not isinstance(timestamps, str) or not isinstance(names, list) or
+            not isinstance(name_ids, list) or not isinstance(others, list) or
+            len(timestamps) != _TIMESTAMP_LENGTH * len(name_ids) or
+            not all(isinstance(name, str) for name in names) or
+            not all(type(name_id) is int and 0 <= name_id < len(names)
+                    for name_id in name_ids)):
+        raise ValueError("Invalid cache chunk")
+    names = [shared_names.setdefault(name, name) for name in names]
+    from_string = datetime.datetime.fromisoformat
+    actions: List[CachedAction] = list(zip(
+        [from_string(timestamps[position:position + _TIMESTAMP_LENGTH])
+         for position in range(0, len(timestamps), _TIMESTAMP_LENGTH)],
+        [names[name_id] for name_id in name_ids]))
+    last_position = -1
+    for other in others:
+        if (not isinstance(other, list) or len(other) != 2 or
+                type(other[0]) is not int or
+                not last_position < other[0] <= len(actions)):
+            raise ValueError("Invalid cached action: {!r}".format(other))
+        actions.insert(other[0], _other_action_from_data(other[1]))
+        last_position = other[0]
+    return actions
+
+
+class ParsedLogCache:
+    """File keeping the actions parsed from the beginning of a job log.
+
+    The file is a sequence of chunks, each one a line of JSON, which is
+    plain data checked while loading.  Each chunk holds the actions
+    parsed from the lines appended to the log since the previous chunk, and
+    the fingerprint of the log prefix covered so far.  This way an update
+    after a few lines were appended to the log writes just a small chunk at
+    the end of the file.  Once there are too many chunks, they are compacted
+    into one.
+    """
+    MAX_CHUNKS = 64
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.reset()
+
+    def load(self):
+        """Read all the consecutive valid chunks of the cache file.  Chunks
+        following an invalid or truncated one are ignored."""
+        names: Dict[str, str] = {}
+        try:
+            with open(self.file_name, 'rb') as cache_file:
+                for line in cache_file:
+                    if not line.endswith(b'\n'):
+                        break
+                    chunk = json.loads(line)
+                    if (not isinstance(chunk, dict) or
+                            chunk.get('version') != CACHE_FORMAT_VERSION or
+                            chunk.get('start') != self.prefix.size):
+                        break
+                    prefix = LogPrefix.from_data(chunk.get('prefix'))
+                    actions = _chunk_actions(chunk, names)
+                    self.actions.extend(actions)
+                    self.prefix = prefix
+                    self._valid_size += len(line)
+                    self._chunk_count += 1
+        except (OSError, RecursionError, ValueError):
+            pass
+
+    def reset(self):
+        """Forget the loaded contents, e.g. when the log has been modified."""
+        self.actions: List[CachedAction] = []
+        self.prefix = LogPrefix(0, hashlib.sha1().hexdigest(), (-1, -1))
+        self._valid_size = 0
+        self._chunk_count = 0
+
+    def extend(self, actions: List[CachedAction], prefix: LogPrefix):
+        """Store the actions parsed after the current prefix, ending at the
+        new prefix.  Failures are ignored, because the cache is only an
+        optimization."""
+        chunk = _chunk_line(self.prefix.size, prefix, actions)
+        self.actions.extend(actions)
+        self.prefix = prefix
+        if 0 < self._chunk_count < self.MAX_CHUNKS:
+            try:
+                with open(self.file_name, 'r+b') as cache_file:
+                    cache_file.truncate(self._valid_size)
+                    cache_file.seek(self._valid_size)
+                    cache_file.write(chunk)
+                    self._valid_size = cache_file.tell()
+                self._chunk_count += 1
+                return
+            except OSError:
+                pass
+        self._rewrite(_chunk_line(0, prefix, self.actions))
+
+    def _rewrite(self, chunk: bytes):
+        """Atomically replace the cache file with a single chunk."""
+        size = write_file_atomically(self.file_name, lambda f: f.write(chunk))
+        if size is not None:
+            self._valid_size = size
+            self._chunk_count = 1
+
+
+def _to_cached_action(action: ParsedActionType,
+                      names: Dict[str, str]) -> CachedAction:
+    if isinstance(action, Event):
+        # Share equal names, so that each one is kept only once
+        text = names.setdefault(action.text, action.text)
+        return action.timestamp, text
+    return action
+
+
+def _from_cached_action(action: CachedAction) -> ParsedActionType:
+    if isinstance(action, tuple):
+        return Event(*action)
+    return action
+
+
+def _parse_bytes(data: bytes) -> Generator[ParsedActionType, None, None]:
+    parser = BytesParser()
+    for block in read_blocks(io.BytesIO(data)):
+        yield from parser.process_block(block)
+
+
+def cached_job_reader(path: str, cache_file_name: str
+                      ) -> Generator[ParsedActionType, None, None]:
+    """
+    Generator reading actions from a work log file, like job_reader() does,
+    but using a cache file of already parsed actions.
+
+    Only the lines appended to the log since the cache was saved are parsed.
+    If the beginning of the log has been modified, then the whole log is parsed
+    again.  The cache is updated once all the actions are consumed.
+    """
+    try:
+        log_file = open(path, 'rb')
+    except IOError as err:
+        print("Error opening/reading from file '{0}': {1}"
+              .format(err.filename, err.strerror))
+        return
+
+    cache = ParsedLogCache(cache_file_name)
+    with log_file:
+        stat = file_stat(log_file)
+        cache.load()
+        matches, digest = cache.prefix.matches(log_file, stat)
+        if not matches:
+            cache.reset()
+            digest = None
+
+        for action in cache.actions:
+            yield _from_cached_action(action)
+
+        log_file.seek(cache.prefix.size)
+        data = log_file.read()
+
+    # Only complete lines are cached, the last one might be still written
+    complete_size = data.rfind(b'\n') + 1
+    names: Dict[str, str] = {}
+    new_actions: List[CachedAction] = []
+    for action in _parse_bytes(data[:complete_size]):
+        new_actions.append(_to_cached_action(action, names))
+        yield action
+    for action in _parse_bytes(data[complete_size:]):
+        yield action
+
+    if complete_size == 0 and stat == cache.prefix.stat:
+        return
+    if digest is None:
+        if cache.prefix.size == 0:
+            digest = hashlib.sha1()
+        else:
+            with open(path, 'rb') as log_file:
+                digest = prefix_digest(log_file, cache.prefix.size)
+    digest.update(data[:complete_size])
+    cache.extend(new_actions,
+                 LogPrefix(cache.prefix.size + complete_size,
+                           digest.hexdigest(), stat))
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+
+SQLITE_HEADER = b'SQLite format 3\x00'
+"""The header of an SQLite database file, which may keep a job log instead of
+the text format"""
+
+
+def is_sqlite_log(path) -> bool:
+    """Return True if the job log is kept in an SQLite database."""
+    try:
+        with open(path, "rb") as log_file:
+            return log_file.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
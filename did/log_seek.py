@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import datetime
+import os
+import re
+from typing import BinaryIO, Optional, Tuple
+
+from did.checkpoints import CONFIG_LINE_REGEX, Checkpoint, \
+    arrive_line_offsets
+from did.worklog import SessionStream, WorkLogReader
+from did.worklog_file import Parser, read_blocks
+
+_BLOCK_SIZE = 4096
+
+_TIMESTAMP_LINE_REGEX = re.compile(
+    rb'^(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}(?::\d{2})?: ', re.MULTILINE)
+
+
+def next_timestamp(log_file: BinaryIO, offset: int, size: int
+                   ) -> Optional[Tuple[int, datetime.date]]:
+    """Return the offset and the date of the first line with a timestamp
+    starting at the given offset or later, or None if there is no such line.
+    """
+    if offset > 0:
+        # Resynchronize to the beginning of the next line
+        log_file.seek(offset - 1)
+        log_file.readline()
+        offset = log_file.tell()
+    block_size = _BLOCK_SIZE
+    while offset < size:
+        log_file.seek(offset)
+        data = log_file.read(block_size)
+        match = _TIMESTAMP_LINE_REGEX.search(data)
+        if match is not None:
+            return (offset + match.start(),
+                    datetime.date.fromisoformat(match.group(1).decode()))
+        if offset + len(data) >= size:
+            break
+        # Continue from the last line, which may be incomplete
+        complete_size = data.rfind(b'\n') + 1
+        if complete_size == 0:
+            block_size *= 2
+        offset += complete_size
+    return None
+
+
+def seek_date(log_file: BinaryIO, size: int, day: datetime.date) -> int:
+    """Return the offset of the first line with a timestamp on the given day
+    or later in a chronological job log, or its size if there is none.
+
+    It's found by bisecting the byte offsets, reading only a few lines at
+    each step.
+    """
+    low, high = 0, size
+    while low < high:
+        middle = (low + high) // 2
+        found = next_timestamp(log_file, middle, size)
+        if found is None or found[1] >= day:
+            high = middle
+        else:
+            # The lines up to the one found are all before the day
+            low = found[0] + 1
+    found = next_timestamp(log_file, low, size)
+    return size if found is None else found[0]
+
+
+def seek_session_start(log_file: BinaryIO, size: int, day: datetime.date
+                       ) -> Optional[Tuple[int, datetime.date]]:
+    """Return the offset and the date of the first session starting on the
+    given day or later, or None if there is no such session."""
+    offset = seek_date(log_file, size, day)
+    block_size = _BLOCK_SIZE
+    while offset < size:
+        log_file.seek(offset)
+        data = log_file.read(block_size)
+        complete_size = data.rfind(b'\n') + 1
+        if offset + len(data) >= size:
+            complete_size = len(data)
+        elif complete_size == 0:
+            block_size *= 2
+            continue
+        starts = arrive_line_offsets(data[:complete_size])
+        if starts:
+            date = data[starts[0]:starts[0] + len("YYYY-MM-DD")]
+            return (offset + starts[0],
+                    datetime.date.fromisoformat(date.decode()))
+        offset += complete_size
+    return None
+
+
+def seek_checkpoint(file_name: str, day: datetime.date
+                    ) -> Optional[Checkpoint]:
+    """Make a checkpoint of the first session starting on the given day or
+    later, without an index, by seeking the day in the job log.  The
+    accounting is set by all the config lines preceding the session, but the
+    total overtime of the preceding sessions isn't known, so it's zero.
+
+    Return None if there is no such session, or if the log needs to be
+    parsed from the beginning anyway.
+    """
+    try:
+        with open(file_name, 'rb') as log_file:
+            size = os.fstat(log_file.fileno()).st_size
+            found = seek_session_start(log_file, size, day)
+            if found is None or found[0] == 0:
+                return None
+            offset, date = found
+            # The prefix is scanned in blocks, keeping only the config lines
+            log_file.seek(0)
+            line_number = 1
+            config_lines = []
+            for block in read_blocks(log_file, offset):
+                line_number += block.count(b'\n')
+                for match in CONFIG_LINE_REGEX.finditer(block):
+                    start = block.rfind(b'\n', 0, match.end()) + 1
+                    end = block.find(b'\n', match.end())
+                    config_lines.append(block[start:end if end >= 0 else None])
+    except (OSError, ValueError):
+        # Let the log be read as usual to report the error
+        return None
+
+    # The config lines are applied to a work log which isn't loaded
+    worklog = SessionStream(file_name)
+    reader = WorkLogReader(worklog)
+    parser = Parser()
+    try:
+        for line in config_lines:
+            reader.handle(parser.process_line(
+                line.rstrip(b'\r').decode() + '\n'))
+    except Exception:
+        # Let the log be parsed to report the error with its line number
+        return None
+    return Checkpoint(offset, date, datetime.timedelta(0), worklog.accounting,
+                      line_number)
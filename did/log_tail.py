@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import datetime
+import os
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
+
+from did.checkpoints import CONFIG_LINE_REGEX, SESSION_START_REGEX, \
+    Checkpoint
+from did.worklog import WorkLog
+from did.worktime import Accounting, make_preset_accounting
+
+_BLOCK_SIZE = 64 * 1024
+
+
+def session_starts_backwards(log_file: BinaryIO, size: int
+                             ) -> Iterator[Tuple[int, datetime.date, bool]]:
+    """Generate the (offset, date, is_workday) tuples of the lines starting
+    sessions in a job log, from the last one to the first one."""
+    end = size
+    block_size = _BLOCK_SIZE
+    while end > 0:
+        start = max(0, end - block_size)
+        log_file.seek(start)
+        data = log_file.read(end - start)
+        skip = 0
+        if start > 0:
+            # The first line may be incomplete, so leave it for the next block
+            skip = data.find(b'\n') + 1
+            if skip == 0 or skip == len(data):
+                # No complete line in the block
+                block_size *= 2
+                continue
+        matches = list(SESSION_START_REGEX.finditer(data, skip))
+        for match in reversed(matches):
+            yield (start + match.start(),
+                   datetime.date.fromisoformat(match.group(1).decode()),
+                   match.group(2) is None)
+        end = start + skip
+
+
+def tail_worklog(file_name: str,
+                 day: datetime.date,
+                 is_enough: Optional[Callable[[WorkLog], bool]] = None,
+                 accounting: Optional[Accounting] = None) -> WorkLog:
+    """Load only the sessions at the end of a job log, which are needed to
+    append an event on the given day.
+
+    These are the last session, and all the sessions since the last workday
+    session if that started on the given day.  If "is_enough" is given, more
+    sessions are loaded until it returns True for the loaded WorkLog.
+
+    The part of the log which is loaded must consist of events only, as the
+    configuration in effect isn't known.  If it isn't the case, or there is no
+    session, the whole log is loaded.  The accounting of the last session may
+    be given if it's known, to get the right stats of the loaded sessions.
+    """
+    if accounting is None:
+        # It doesn't matter if the stats aren't needed
+        accounting = make_preset_accounting('default')
+    with open(file_name, 'rb') as log_file:
+        size = os.fstat(log_file.fileno()).st_size
+        starts = session_starts_backwards(log_file, size)
+        offset = None
+        for offset, date, is_workday in starts:
+            if is_workday or date < day:
+                break
+
+        while offset is not None:
+            log_file.seek(offset)
+            if CONFIG_LINE_REGEX.search(log_file.read(size - offset)):
+                break
+            worklog = WorkLog(file_name, checkpoint=Checkpoint(
+                offset, date, datetime.timedelta(0), accounting))
+            if is_enough is None or is_enough(worklog):
+                return worklog
+            # Load twice as many sessions
+            for _ in worklog.sessions():
+                start = next(starts, None)
+                if start is None:
+                    return WorkLog(file_name)
+                offset, date, is_workday = start
+    return WorkLog(file_name)
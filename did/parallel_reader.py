@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import datetime
+import io
+import os
+from array import array
+from itertools import repeat
+from typing import Dict, IO, Iterator, List, Optional
+
+from did.worklog_file import Event, NumberedAction, ParsedActionType, \
+    Parser, count_lines
+
+MIN_CHUNK_SIZE = 256 * 1024
+"""Parts of the log smaller than this aren't worth parsing in a separate
+process"""
+
+_TIMESTAMP_LENGTH = len("YYYY-MM-DD HH:MM:SS")
+
+
+class ParsedChunk:
+    """The actions parsed from a part of a job log, stored compactly, so that
+    they can be cheaply sent from a worker process, and turned back into
+    actions.
+
+    Attributes:
+        line_count - Number of lines in the part of the log.
+        line_numbers - Number of the line of each action, counted from 1 at
+            the beginning of the part.
+        name_ids - Index of the text of each event in names, or -1 minus the
+            index of the other actions in others.
+        timestamps - The "YYYY-MM-DD HH:MM:SS" timestamps of the events,
+            concatenated.  They are much faster to convert back to datetimes
+            than numbers of seconds.
+        names - Texts of the events, each one stored once.
+        others - The actions other than events, which are rare.
+        error_line - Text of the line which couldn't be parsed, or None.  The
+            part isn't parsed past this line, which is the last one counted.
+    """
+    def __init__(self):
+        self.line_count = 0
+        self.line_numbers = array('l')
+        self.name_ids = array('l')
+        self.timestamps = ''
+        self.names: List[str] = []
+        self.others: List[ParsedActionType] = []
+        self.error_line: Optional[str] = None
+
+    def actions(self, first_line_number: int = 1
+                ) -> Iterator[NumberedAction]:
+        """Generate the actions with the numbers of their lines, with the
+        first line of the part having the given number."""
+        base = first_line_number - 1
+        names = self.names
+        others = self.others
+        timestamps = self.timestamps
+        from_string = datetime.datetime.fromisoformat
+        position = 0
+        for line_number, name_id in zip(self.line_numbers, self.name_ids):
+            if name_id < 0:
+                yield base + line_number, others[-1 - name_id]
+            else:
+                end = position + _TIMESTAMP_LENGTH
+                yield base + line_number, Event(
+                    from_string(timestamps[position:end]), names[name_id])
+                position = end
+
+
+def parse_chunk_bytes(data: bytes) -> ParsedChunk:
+    """Parse a part of a job log, consisting of complete lines."""
+    chunk = ParsedChunk()
+    parser = Parser()
+    name_ids: Dict[str, int] = {}
+    timestamps = []
+    line_number = 0
+    # Decode the same way as a file opened in text mode
+    for line in io.TextIOWrapper(io.BytesIO(data)):
+        line_number += 1
+        try:
+            action = parser.process_line(line)
+        except Exception:
+            chunk.error_line = line
+            break
+        if action is None:
+            continue
+        chunk.line_numbers.append(line_number)
+        if isinstance(action, Event):
+            name_id = name_ids.get(action.text)
+            if name_id is None:
+                name_id = name_ids[action.text] = len(chunk.names)
+                chunk.names.append(action.text)
+            chunk.name_ids.append(name_id)
+            if line[16:17] == ':' and line[19:20] == ':':
+                # A complete timestamp, already checked by the parser
+                timestamps.append(line[:_TIMESTAMP_LENGTH])
+            else:
+                timestamps.append(str(action.timestamp))
+        else:
+            chunk.name_ids.append(-1 - len(chunk.others))
+            chunk.others.append(action)
+    chunk.line_count = line_number
+    chunk.timestamps = ''.join(timestamps)
+    return chunk
+
+
+def parse_chunk(path: str, start: int, end: int) -> ParsedChunk:
+    """Parse the part of a job log between the given offsets, which must be
+    the beginnings of lines.  This is run in the worker processes."""
+    with open(path, 'rb') as log_file:
+        log_file.seek(start)
+        return parse_chunk_bytes(log_file.read(end - start))
+
+
+def chunk_offsets(path: str, count: int, offset: int = 0) -> List[int]:
+    """Return the offsets splitting the job log from the given offset to its
+    end into at most count parts of similar size, ending with complete
+    lines."""
+    with open(path, 'rb') as log_file:
+        size = os.fstat(log_file.fileno()).st_size
+        count = max(1, min(count, (size - offset) // MIN_CHUNK_SIZE))
+        offsets = [offset]
+        for index in range(1, count):
+            log_file.seek(offset + index * (size - offset) // count - 1)
+            log_file.readline()
+            boundary = log_file.tell()
+            if offsets[-1] < boundary < size:
+                offsets.append(boundary)
+    offsets.append(max(size, offset))
+    return offsets
+
+
+def parallel_job_reader(path: str, jobs: int, offset: int = 0,
+                        line_number: Optional[int] = 1
+                        ) -> Iterator[NumberedAction]:
+    """
+    Generator reading actions from a work log file, like job_reader() does,
+    but parsing parts of the file in up to the given number of worker
+    processes.  Each action comes with the number of its line, the line at
+    the offset having the given number, which is counted if it's None.
+
+    An error in a line is raised only after all the actions preceding it are
+    generated, just like when reading the lines one by one.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    try:
+        if line_number is None:
+            with open(path, 'rb') as binary_file:
+                line_number = 1 + count_lines(binary_file, offset)
+        offsets = chunk_offsets(path, jobs, offset)
+        if len(offsets) <= 2:
+            with open(path, 'rb') as binary_file:
+                binary_file.seek(offset)
+                with io.TextIOWrapper(binary_file) as f:
+                    yield from _numbered_lines(path, f, line_number)
+            return
+    except IOError as err:
+        print("Error opening/reading from file '{0}': {1}"
+              .format(err.filename, err.strerror))
+        return
+
+    with ProcessPoolExecutor(len(offsets) - 1) as executor:
+        chunks = executor.map(parse_chunk, repeat(path), offsets[:-1],
+                              offsets[1:])
+        for chunk in chunks:
+            yield from chunk.actions(line_number)
+            line_number += chunk.line_count
+            if chunk.error_line is not None:
+                _print_error_location(path, line_number - 1)
+                # Parse the line again, to raise the original error
+                Parser().process_line(chunk.error_line)
+
+
+def _numbered_lines(path: str, f: IO[str], first_line_number: int
+                    ) -> Iterator[NumberedAction]:
+    """Parse the lines of a file in this process"""
+    parser = Parser()
+    for line_number, line in enumerate(f, start=first_line_number):
+        try:
+            action = parser.process_line(line)
+        except Exception:
+            _print_error_location(path, line_number)
+            raise
+        if action is not None:
+            yield line_number, action
+
+
+def _print_error_location(path: str, line_number: int):
+    print("Error while parsing file \"{}\", line {}:"
+          .format(path, line_number))
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2011-2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+
+import csv
+import datetime
+import json
+import sys
+from typing import Any, Dict, List, Optional, TextIO
+
+from did.console_codes import Foreground, Attributes, NoForeground, \
+    NoAttributes
+from did.interval import interval_name_denotes_a_break, Interval
+
+
+class ReportRenderer:
+    """
+    Receives the parts of a report from a Display, as they are produced, and
+    writes them out in some format.
+
+    The durations are timedelta objects, and the units are the
+    ReportTimeUnit objects which the Display would use to show them.
+    """
+    def __init__(self, out: Optional[TextIO] = None):
+        self.out = out if out is not None else sys.stdout
+        self._writer = BlockWriter(self.out)
+        # Whether someone watches the report appear, as opposed to reading
+        # it after it's complete
+        self._is_interactive = self.out.isatty()
+
+    def session_header(self, day: datetime.date, is_workday: bool):
+        raise NotImplementedError()
+
+    def arrival(self, time: datetime.datetime):
+        """A session without any intervals."""
+        raise NotImplementedError()
+
+    def interval(self, interval: Interval, duration: datetime.timedelta,
+                 unit):
+        raise NotImplementedError()
+
+    def aggregate(self, label: str, name: str, depth: int,
+                  duration: datetime.timedelta, unit):
+        """A node of an aggregate tree.  The label is what the node adds to
+        the name of its parent, and the name is the complete task name."""
+        raise NotImplementedError()
+
+    def session_matched(self, work_time: datetime.timedelta,
+                        break_time: datetime.timedelta, unit):
+        raise NotImplementedError()
+
+    def session_totals(self, work_time: datetime.timedelta,
+                       break_time: datetime.timedelta,
+                       overtime: datetime.timedelta,
+                       total_overtime: datetime.timedelta, unit):
+        raise NotImplementedError()
+
+    def range_totals(self, work_time: datetime.timedelta,
+                     break_time: datetime.timedelta,
+                     overtime: datetime.timedelta, unit,
+                     matched_work_time: Optional[datetime.timedelta],
+                     matched_break_time: Optional[datetime.timedelta],
+                     matched_unit):
+        """The totals of the whole report.  The matched times are None if no
+        filter is used."""
+        raise NotImplementedError()
+
+    def session_done(self):
+        """Called after all the parts of a session are rendered.  When the
+        output is a terminal, the session is written out right away."""
+        if self._is_interactive:
+            self._writer.flush()
+
+    def finish(self):
+        """Called after the whole report is rendered, to write out all the
+        buffered output."""
+        self._writer.flush()
+
+
+class TextRenderer(ReportRenderer):
+    """Renders the report as text for the terminal, colored unless the output
+    isn't a terminal."""
+
+    def __init__(self, out: Optional[TextIO] = None,
+                 color: Optional[bool] = None):
+        """
+        Constructor.
+
+        color - Whether to use the color escape codes, or None to use them
+            only if the output is a terminal.
+        """
+        ReportRenderer.__init__(self, out)
+        if color is None:
+            color = self._is_interactive
+        self.fg = Foreground if color else NoForeground
+        self.attr = Attributes if color else NoAttributes
+
+    def session_header(self, day, is_workday):
+        self._writer.write("\n%s%s %s%s\n" % (
+                self.fg.green,
+                day,
+                "" if is_workday else "  (Out of office) ",
+                self.attr.reset))
+
+    def arrival(self, time):
+        self._write_log_line(
+                "", time_as_string(time), self.fg.red, "arrive", "", "")
+
+    def interval(self, interval, duration, unit):
+        name = interval.name
+        if interval.is_assumed:
+            name += " (assumed)"
+
+        self._write_log_line(
+                time_as_string(interval.start),
+                time_as_string(interval.end),
+                self.name_color(interval.is_break, interval.is_assumed),
+                name,
+                self.duration_color(interval.is_break, interval.is_assumed),
+                unit.to_string(duration))
+
+    def _write_log_line(
+            self, start, end, name_color, name, duration_color, duration):
+        reset = self.attr.reset
+        self._writer.write("  %5s .. %5s  %s%-30s%s  %s%s%s\n" % (
+                start,
+                end,
+                name_color,
+                name,
+                reset,
+                duration_color,
+                duration,
+                reset))
+
+    def aggregate(self, label, name, depth, duration, unit):
+        is_break = interval_name_denotes_a_break(label)
+        is_assumed = (label == "(assumed)")
+        reset = self.attr.reset
+        self._writer.write("   %s%s%-6s%s  %s%s%s\n" % (
+                "     " * depth,
+                self.duration_color(is_break, is_assumed),
+                unit.to_string(duration),
+                reset,
+                self.name_color(is_break, is_assumed),
+                label,
+                reset))
+
+    def session_matched(self, work_time, break_time, unit):
+        self._writer.write("  Matched: Work %-6s   Break %-6s\n" % (
+                unit.to_string(work_time),
+                unit.to_string(break_time)))
+
+    def session_totals(self, work_time, break_time, overtime, total_overtime,
+                       unit):
+        self._writer.write("  Worktime %-6s   Slacktime %-6s   Overtime %-6s "
+                           "(running total %s)\n" % (
+                               unit.to_string(work_time),
+                               unit.to_string(break_time),
+                               unit.to_string(overtime),
+                               unit.to_string(total_overtime)))
+
+    def range_totals(self, work_time, break_time, overtime, unit,
+                     matched_work_time, matched_break_time, matched_unit):
+        self._writer.write("\n")
+        if matched_work_time is not None:
+            self._writer.write("Matched:  Work %-6s   Break %-6s\n" % (
+                    matched_unit.to_string(matched_work_time),
+                    matched_unit.to_string(matched_break_time)))
+        self._writer.write(
+            "Overall:  Worktime %-6s   Slacktime %-6s   Overtime %-6s\n" % (
+                unit.to_string(work_time),
+                unit.to_string(break_time),
+                unit.to_string(overtime)))
+
+    def name_color(self, is_break, is_assumed):
+        if is_break:
+            return self.fg.black + self.attr.bold
+        elif is_assumed:
+            return self.fg.brown
+        else:
+            return self.fg.brown + self.attr.bold
+
+    def duration_color(self, is_break, is_assumed):
+        if is_break:
+            return ""
+        elif is_assumed:
+            return self.fg.magenta
+        else:
+            return self.fg.magenta + self.attr.bold
+
+
+class RecordRenderer(ReportRenderer):
+    """
+    Renders the report as a sequence of flat records, written one by one.
+
+    The durations are in seconds, and the times are in ISO 8601 format.  The
+    units are ignored, so the records don't depend on the -p option.
+    """
+
+    FIELDS = ['type', 'date', 'start', 'end', 'name', 'depth', 'is_break',
+              'is_assumed', 'is_workday', 'duration', 'work_time',
+              'break_time', 'overtime', 'total_overtime']
+    """All the fields of the records, each record having some of them"""
+
+    def __init__(self, out: Optional[TextIO] = None):
+        ReportRenderer.__init__(self, out)
+        self._day: Optional[datetime.date] = None
+
+    def write_record(self, record: Dict[str, Any]):
+        """This method must be overridden in a subclass"""
+        raise NotImplementedError()
+
+    def _record(self, record_type: str, **fields):
+        record: Dict[str, Any] = {'type': record_type}
+        if self._day is not None:
+            record['date'] = self._day.isoformat()
+        for name, value in fields.items():
+            if isinstance(value, datetime.timedelta):
+                value = round(value.total_seconds())
+            elif isinstance(value, datetime.datetime):
+                value = value.isoformat()
+            record[name] = value
+        self.write_record(record)
+
+    def session_header(self, day, is_workday):
+        self._day = day
+        self._record('session', is_workday=is_workday)
+
+    def arrival(self, time):
+        self._record('arrival', start=time)
+
+    def interval(self, interval, duration, unit):
+        self._record('interval', start=interval.start, end=interval.end,
+                     name=interval.name, is_break=interval.is_break,
+                     is_assumed=interval.is_assumed, duration=duration)
+
+    def aggregate(self, label, name, depth, duration, unit):
+        self._record('aggregate', name=name, depth=depth,
+                     is_break=interval_name_denotes_a_break(label),
+                     is_assumed=(label == "(assumed)"), duration=duration)
+
+    def session_matched(self, work_time, break_time, unit):
+        self._record('session_matched', work_time=work_time,
+                     break_time=break_time)
+
+    def session_totals(self, work_time, break_time, overtime, total_overtime,
+                       unit):
+        self._record('session_totals', work_time=work_time,
+                     break_time=break_time, overtime=overtime,
+                     total_overtime=total_overtime)
+
+    def range_totals(self, work_time, break_time, overtime, unit,
+                     matched_work_time, matched_break_time, matched_unit):
+        self._day = None
+        if matched_work_time is not None:
+            self._record('matched', work_time=matched_work_time,
+                         break_time=matched_break_time)
+        self._record('totals', work_time=work_time, break_time=break_time,
+                     overtime=overtime)
+
+
+class JsonLinesRenderer(RecordRenderer):
+    """Renders each record as a JSON object on its own line."""
+
+    def write_record(self, record):
+        self._writer.write(json.dumps(record) + '\n')
+
+
+class CsvRenderer(RecordRenderer):
+    """Renders the records as CSV rows with the header of all the fields."""
+
+    def __init__(self, out: Optional[TextIO] = None):
+        RecordRenderer.__init__(self, out)
+        self._csv_writer: Optional[csv.DictWriter] = None
+
+    def write_record(self, record):
+        if self._csv_writer is None:
+            self._csv_writer = csv.DictWriter(self._writer, self.FIELDS,
+                                              lineterminator='\n')
+            self._csv_writer.writeheader()
+        self._csv_writer.writerow(record)
+
+
+class BlockWriter:
+    """Collects the written text, to write it out in large blocks instead of
+    line by line."""
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self._parts: List[str] = []
+        self._size = 0
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.BLOCK_SIZE:
+            self._write_block()
+
+    def _write_block(self):
+        self.out.write(''.join(self._parts))
+        self._parts = []
+        self._size = 0
+
+    def flush(self):
+        self._write_block()
+        self.out.flush()
+
+
+def make_renderer(output_format: str, out: Optional[TextIO] = None,
+                  color: Optional[bool] = None) -> ReportRenderer:
+    """Return a renderer of the format with the given name: text, jsonl or
+    csv.  The color option is used only by the text renderer."""
+    if output_format == 'text':
+        return TextRenderer(out, color)
+    renderers = {
+        'jsonl': JsonLinesRenderer,
+        'csv': CsvRenderer,
+    }
+    return renderers[output_format](out)
+
+
+def time_as_string(time):
+    if time:
+        return "%02d:%02d" % (time.hour, time.minute)
+    else:
+        return "     "
@@ -17,13 +17,14 @@ You should have received a copy of the GNU General Public License along with
 Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
 Fifth Floor, Boston, MA  02110-1301  USA
 """
+import copy
 import datetime
 import re
-from typing import Optional, List, Dict, Union
+from typing import Optional, Dict, Iterable, Tuple, Union
 
-from did.console_codes import Foreground, Attributes
 from did.day_range import DayRange
-from did.interval import interval_name_denotes_a_break, Interval
+from did.interval import Interval, TaskName
+from did.renderer import ReportRenderer, TextRenderer
 from did.session import WorkSession
 from did.worklog import WorkLog
 
@@ -66,31 +67,6 @@ class ReportTimeHoursMinutes(ReportTimeUnit):
         return time
 
 
-def time_as_string(time):
-    if time:
-        return "%02d:%02d" % (time.hour, time.minute)
-    else:
-        return "     "
-
-
-def get_name_color(is_break, is_assumed):
-    if is_break:
-        return Foreground.black + Attributes.bold
-    elif is_assumed:
-        return Foreground.brown
-    else:
-        return Foreground.brown + Attributes.bold
-
-
-def get_duration_color(is_break, is_assumed):
-    if is_break:
-        return ""
-    elif is_assumed:
-        return Foreground.magenta
-    else:
-        return Foreground.magenta + Attributes.bold
-
-
 class IntervalDurationCounter:
     """Counts total duration from multiple intervals"""
     def __init__(self):
@@ -114,11 +90,18 @@ class IntervalFilter:
         self._regex = None
         if pattern is not None:
             self._regex = re.compile(pattern)
+        # The verdicts for the names checked so far
+        self._accepted_names: Dict[str, bool] = {}
 
     def accepts_interval(self, interval: Interval) -> bool:
         if self._regex is None:
             return True
-        return self._regex.search(interval.name) is not None
+        name = interval.name
+        accepted = self._accepted_names.get(name)
+        if accepted is None:
+            accepted = self._regex.search(name) is not None
+            self._accepted_names[name] = accepted
+        return accepted
 
     def accepts_session(self, session: WorkSession) -> bool:
         if self._regex is None:
@@ -142,11 +125,20 @@ class IntervalFilter:
 
 
 class Display:
-    def __init__(self, worklog, day_range, adjusted, filter: IntervalFilter):
+    """
+    Report of the sessions in a range of days.
+
+    The sessions are read from the work log while the report is displayed,
+    and each of them is passed to append_session() as soon as its stats are
+    computed, so that a subclass can render it right away.
+    """
+    def __init__(self, worklog, day_range, adjusted, filter: IntervalFilter,
+                 renderer: Optional[ReportRenderer] = None):
         self.worklog = worklog
         self.day_range = day_range
         self.adjusted = adjusted
         self.filter = filter
+        self.renderer = renderer if renderer is not None else TextRenderer()
 
         self.overall_stats_unit = ReportTimeHoursMinutes(True)
         self.matched_stats_unit = ReportTimeHoursMinutes(self.adjusted)
@@ -155,102 +147,95 @@ class Display:
         self.total_break_time = datetime.timedelta(0)
         self.total_overtime = datetime.timedelta(0)
         self.matched_duration_counter = IntervalDurationCounter()
-        for session in worklog.sessions():
-            if session.start.date() in self.day_range:
-                self.append_session(session)
-                self.total_work_time += session.stats().time_worked()
-                self.total_break_time += session.stats().time_slacked()
-                self.total_overtime += session.stats().overhours()
-                self.matched_duration_counter.add(
-                    self.filter.session_filtered_duration_counter(session,
-                                                                  adjusted))
-        self.job_unit.set_total_work_time(self.total_work_time)
+
+    def add_session(self, session: WorkSession):
+        # Computing the stats adjusts the durations of the intervals
+        stats = session.stats()
+        self.total_work_time += stats.time_worked()
+        self.total_break_time += stats.time_slacked()
+        self.total_overtime += stats.overhours()
+        matched_counter = None
+        if self.filter.is_active():
+            matched_counter = self.filter.session_filtered_duration_counter(
+                session, self.adjusted)
+            self.matched_duration_counter.add(matched_counter)
+        self.append_session(session, matched_counter)
 
     def set_unit(self, unit):
         self.job_unit = unit
         self.job_unit.set_total_work_time(self.total_work_time)
 
     def display(self):
-        self.print_header()
-        self.print_content()
-        self.print_footer()
+        self.display_sessions(self.worklog.sessions_in_range(self.day_range))
+
+    def display_sessions(self, sessions: Iterable[WorkSession]):
+        """Display the report with the given sessions added to the ones added
+        so far."""
+        try:
+            self.print_header()
+            for session in sessions:
+                self.add_session(session)
+            self.print_content()
+            self.print_footer()
+        finally:
+            self.renderer.finish()
 
     def print_header(self):
         pass
 
     def print_content(self):
-        """This method must be overridden in a subclass"""
-        raise NotImplementedError()
+        """Print what is left after all the sessions are appended"""
+        pass
 
     def print_footer(self):
-        print()
         if self.filter.is_active():
-            print("Matched:  Work %-6s   Break %-6s" % (
-                    self.matched_stats_unit.to_string(
-                        self.matched_duration_counter.work_time),
-                    self.matched_stats_unit.to_string(
-                        self.matched_duration_counter.break_time)))
-        print("Overall:  Worktime %-6s   Slacktime %-6s   Overtime %-6s" % (
-                self.overall_stats_unit.to_string(self.total_work_time),
-                self.overall_stats_unit.to_string(self.total_break_time),
-                self.overall_stats_unit.to_string(self.total_overtime)))
-
-    def append_session(self, session):
-        """This method must be overridden in a subclass"""
+            matched_work_time = self.matched_duration_counter.work_time
+            matched_break_time = self.matched_duration_counter.break_time
+        else:
+            matched_work_time = matched_break_time = None
+        self.renderer.range_totals(
+            self.total_work_time, self.total_break_time, self.total_overtime,
+            self.overall_stats_unit, matched_work_time, matched_break_time,
+            self.matched_stats_unit)
+
+    def append_session(self, session: WorkSession,
+                       matched_counter: Optional[IntervalDurationCounter]):
+        """This method must be overridden in a subclass.  The matched_counter
+        is the duration of the intervals matching the filter, or None if the
+        filter isn't active."""
         raise NotImplementedError()
 
 
 class SessionDisplay(Display):
-    def __init__(self, worklog, day_range, adjusted, filter: IntervalFilter):
-        self.sessions: List[WorkSession] = []
-        Display.__init__(self, worklog, day_range, adjusted, filter)
-
-    def append_session(self, session):
-        self.sessions.append(session)
-
-    def print_content(self):
-        for session in self.sessions:
-            self.print_session(session)
+    """Display of each session separately, printed as soon as it's added"""
 
-    def print_session(self, session):
+    def append_session(self, session, matched_counter):
         if self.filter.accepts_session(session):
             self.job_unit.set_total_work_time(session.stats().time_worked())
             self.print_session_header(session)
             self.print_session_content(session)
-            if self.filter.is_active():
-                self.print_matched_jobs_footer(session)
+            if matched_counter is not None:
+                self.print_matched_jobs_footer(matched_counter)
             self.print_session_footer(session)
+            self.renderer.session_done()
 
     def print_session_header(self, session):
-        print()
-        print(Foreground.green + str(session.start.date()), end=' ')
-        if not session.is_workday():
-            print("  (Out of office)", end=' ')
-        print(Attributes.reset)
+        self.renderer.session_header(session.start.date(),
+                                     session.is_workday())
 
     def print_session_content(self, session):
         """This method must be overridden in a subclass"""
         raise NotImplementedError()
 
-    def print_matched_jobs_footer(self, session):
-        counter = self.filter.session_filtered_duration_counter(session,
-                                                                self.adjusted)
-        print("  Matched: Work %-6s   Break %-6s" % (
-                self.matched_stats_unit.to_string(counter.work_time),
-                self.matched_stats_unit.to_string(counter.break_time)))
+    def print_matched_jobs_footer(self, counter: IntervalDurationCounter):
+        self.renderer.session_matched(counter.work_time, counter.break_time,
+                                      self.matched_stats_unit)
 
     def print_session_footer(self, session):
-        work_time = session.stats().time_worked()
-        break_time = session.stats().time_slacked()
-        overtime = session.stats().overhours()
-
-        print("  Worktime %-6s   Slacktime %-6s   Overtime %-6s "
-              "(running total %s)" % (
-                    self.overall_stats_unit.to_string(work_time),
-                    self.overall_stats_unit.to_string(break_time),
-                    self.overall_stats_unit.to_string(overtime),
-                    self.overall_stats_unit.to_string(
-                        session.total_overtime())))
+        stats = session.stats()
+        self.renderer.session_totals(
+            stats.time_worked(), stats.time_slacked(), stats.overhours(),
+            session.total_overtime(), self.overall_stats_unit)
 
 
 class ChronologicalSessionDisplay(SessionDisplay):
@@ -258,43 +243,20 @@ class ChronologicalSessionDisplay(SessionDisplay):
                  worklog: WorkLog,
                  day_range: DayRange,
                  adjusted: bool,
-                 filter: IntervalFilter):
-        SessionDisplay.__init__(self, worklog, day_range, adjusted, filter)
+                 filter: IntervalFilter,
+                 renderer: Optional[ReportRenderer] = None):
+        SessionDisplay.__init__(self, worklog, day_range, adjusted, filter,
+                                renderer)
 
     def print_session_content(self, session):
         if len(session.intervals()) == 0:
-            self.print_log_line(
-                    "", time_as_string(session.start),
-                    Foreground.red, "arrive", "", "")
+            self.renderer.arrival(session.start)
 
         for interval in session.intervals():
             if self.filter.accepts_interval(interval):
-                self._print_interval(interval)
-
-    def _print_interval(self, interval):
-        name = interval.name
-        if interval.is_assumed:
-            name += " (assumed)"
-
-        self.print_log_line(
-                time_as_string(interval.start),
-                time_as_string(interval.end),
-                get_name_color(interval.is_break, interval.is_assumed),
-                name,
-                get_duration_color(interval.is_break, interval.is_assumed),
-                self.job_unit.to_string(interval.duration(self.adjusted)))
-
-    def print_log_line(
-            self, start, end, name_color, name, duration_color, duration):
-        print("  %5s .. %5s  %s%-30s%s  %s%s%s" % (
-                start,
-                end,
-                name_color,
-                name,
-                Attributes.reset,
-                duration_color,
-                duration,
-                Attributes.reset))
+                self.renderer.interval(interval,
+                                       interval.duration(self.adjusted),
+                                       self.job_unit)
 
 
 AggregateTreeChildType = Union['AggregateTreeNode', datetime.timedelta]
@@ -305,42 +267,66 @@ class AggregateTreeNode:
         self.children: Dict[str, AggregateTreeChildType] = {}
         self.adjusted = adjusted
         self._filter = filter
+        # Sum of the durations of all the intervals in the subtree
+        self._duration = datetime.timedelta(0)
 
     def add_interval(self, name_words, duration, is_assumed):
         if duration == datetime.timedelta(0):
             return
-        if len(name_words) == 0:
-            if is_assumed:
-                name = '(assumed)'
-            else:
-                name = ''
-            if name not in self.children:
-                self.children[name] = datetime.timedelta(0)
-            self.children[name] += duration
+        node = self
+        for word in name_words:
+            node._duration += duration
+            child = node.children.get(word)
+            if child is None:
+                child = AggregateTreeNode(self.adjusted, self._filter)
+                node.children[word] = child
+            node = child
+        node._duration += duration
+        if is_assumed:
+            name = '(assumed)'
         else:
-            if name_words[0] not in self.children:
-                self.children[name_words[0]] = AggregateTreeNode(self.adjusted,
-                                                                 self._filter)
-            self.children[name_words[0]].add_interval(
-                    name_words[1:], duration, is_assumed)
+            name = ''
+        node.children[name] = (node.children.get(name, datetime.timedelta(0))
+                               + duration)
+
+    def copy(self) -> 'AggregateTreeNode':
+        """Return a copy of the tree, which can be changed independently"""
+        node = AggregateTreeNode(self.adjusted, self._filter)
+        node._duration = self._duration
+        for name, child in self.children.items():
+            if isinstance(child, AggregateTreeNode):
+                child = child.copy()
+            node.children[name] = child
+        return node
+
+    def merge(self, other: 'AggregateTreeNode'):
+        """Add the durations of another tree to this one, as if the intervals
+        added to the other tree were added to this one.  The trees must not
+        be simplified."""
+        self._duration += other._duration
+        for name, other_child in other.children.items():
+            child = self.children.get(name)
+            if isinstance(other_child, AggregateTreeNode):
+                if isinstance(child, AggregateTreeNode):
+                    child.merge(other_child)
+                else:
+                    self.children[name] = other_child.copy()
+            elif isinstance(child, datetime.timedelta):
+                self.children[name] = child + other_child
+            else:
+                self.children[name] = other_child
 
     def get_child_duration(self, name):
-        if name in self.children:
-            if isinstance(self.children[name], AggregateTreeNode):
-                return self.children[name].get_duration()
-            else:
-                return self.children[name]
-        else:
+        child = self.children.get(name)
+        if child is None:
             return datetime.timedelta(0)
+        elif isinstance(child, AggregateTreeNode):
+            return child._duration
+        else:
+            return child
 
     def get_duration(self):
-        duration = datetime.timedelta(0)
-        for name in list(self.children.keys()):
-            if isinstance(self.children[name], AggregateTreeNode):
-                duration += self.children[name].get_duration()
-            else:
-                duration += self.children[name]
-        return duration
+        return self._duration
 
     def simplify(self):
         # Merge "a b" with "a c"
@@ -355,63 +341,109 @@ class AggregateTreeNode:
                         name += ' ' + name2
                     self.children[name] = child.children[name2]
 
-    def display(self, unit, indent_level=0):
+    def display(self, renderer: ReportRenderer, unit, indent_level=0,
+                name_prefix=''):
         sorted_names = sorted(
                 self.children,
                 key=self.get_child_duration,
                 reverse=True)
         for name in sorted_names:
-            self._print_aggregated_interval(name, indent_level, unit)
-
-    def _print_aggregated_interval(self, name, indent_level, unit):
-        duration = self.get_child_duration(name)
-        duration_str = unit.to_string(duration)
-        is_break = interval_name_denotes_a_break(name)
-        is_assumed = (name == "(assumed)")
-        indent = "     " * indent_level
-        print("   %s%s%-6s%s  %s%s%s" % (
-                indent,
-                get_duration_color(is_break, is_assumed),
-                duration_str,
-                Attributes.reset,
-                get_name_color(is_break, is_assumed),
-                name,
-                Attributes.reset))
-        if isinstance(self.children[name], AggregateTreeNode):
-            self.children[name].display(unit, indent_level + 1)
+            if name in ('', '(assumed)'):
+                full_name = name_prefix
+            elif name_prefix:
+                full_name = name_prefix + ' ' + name
+            else:
+                full_name = name
+            renderer.aggregate(name, full_name, indent_level,
+                               self.get_child_duration(name), unit)
+            child = self.children[name]
+            if isinstance(child, AggregateTreeNode):
+                child.display(renderer, unit, indent_level + 1, full_name)
 
     def add_session(self, session):
+        # Sum up the intervals of each distinct name first, keeping the order
+        # in which the names appear, so that each name is added only once.
+        durations: Dict[Tuple[TaskName, bool], datetime.timedelta] = {}
+        accepted: Dict[TaskName, bool] = {}
         for interval in session.intervals():
-            if self._filter.accepts_interval(interval):
-                self.add_interval(
-                        interval.name.split(),
-                        interval.duration(self.adjusted),
-                        interval.is_assumed)
+            duration = interval.duration(self.adjusted)
+            if duration == datetime.timedelta(0):
+                continue
+            task_name = interval.task_name
+            if task_name not in accepted:
+                accepted[task_name] = self._filter.accepts_interval(interval)
+            if accepted[task_name]:
+                key = (task_name, interval.is_assumed)
+                durations[key] = durations.get(key, datetime.timedelta(0)) \
+                    + duration
+        for (task_name, is_assumed), duration in durations.items():
+            self.add_interval(task_name.words, duration, is_assumed)
 
 
 class AggregateSessionDisplay(SessionDisplay):
-    def __init__(self, worklog, day_range, adjusted, filter: IntervalFilter):
-        SessionDisplay.__init__(self, worklog, day_range, adjusted, filter)
+    def __init__(self, worklog, day_range, adjusted, filter: IntervalFilter,
+                 renderer: Optional[ReportRenderer] = None):
+        SessionDisplay.__init__(self, worklog, day_range, adjusted, filter,
+                                renderer)
 
     def print_session_content(self, session):
         self.tree = AggregateTreeNode(self.adjusted, self.filter)
         self.tree.add_session(session)
         self.tree.simplify()
-        self.tree.display(self.job_unit)
+        self.tree.display(self.renderer, self.job_unit)
+
+
+AggregatePartial = Tuple[AggregateTreeNode, datetime.timedelta,
+                         datetime.timedelta, datetime.timedelta,
+                         IntervalDurationCounter]
+"""The tree, total work, break and overtime, and the matched durations of the
+sessions added to an AggregateRangeDisplay"""
 
 
 class AggregateRangeDisplay(Display):
+    """Display of the work in a range of days aggregated over the sessions,
+    printed after all the sessions are added to the tree."""
     def __init__(self,
                  worklog: WorkLog,
                  day_range: DayRange,
                  adjusted: bool,
-                 filter: IntervalFilter):
+                 filter: IntervalFilter,
+                 renderer: Optional[ReportRenderer] = None):
         self.tree = AggregateTreeNode(adjusted, filter)
-        Display.__init__(self, worklog, day_range, adjusted, filter)
+        Display.__init__(self, worklog, day_range, adjusted, filter, renderer)
 
-    def append_session(self, session):
+    def append_session(self, session, matched_counter):
         self.tree.add_session(session)
 
+    def partial(self) -> AggregatePartial:
+        """Return what the sessions added so far add up to, to be merged into
+        another display of the same report."""
+        return (self.tree, self.total_work_time, self.total_break_time,
+                self.total_overtime, self.matched_duration_counter)
+
+    def merge(self, partial: AggregatePartial):
+        """Add up the sessions of another display of the same report, as if
+        they were added to this one."""
+        tree, work_time, break_time, overtime, matched_counter = partial
+        self.tree.merge(tree)
+        self.total_work_time += work_time
+        self.total_break_time += break_time
+        self.total_overtime += overtime
+        self.matched_duration_counter.add(matched_counter)
+
+    def copy(self, renderer: ReportRenderer) -> 'AggregateRangeDisplay':
+        """Return a copy of the display with the sessions added so far, which
+        renders the report with the given renderer.  More sessions can be
+        added to the copy without changing this display."""
+        display = copy.copy(self)
+        display.tree = self.tree.copy()
+        display.matched_duration_counter = IntervalDurationCounter()
+        display.matched_duration_counter.add(self.matched_duration_counter)
+        display.job_unit = copy.copy(self.job_unit)
+        display.renderer = renderer
+        return display
+
     def print_content(self):
+        self.job_unit.set_total_work_time(self.total_work_time)
         self.tree.simplify()
-        self.tree.display(self.job_unit)
+        self.tree.display(self.renderer, self.job_unit)
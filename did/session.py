@@ -18,10 +18,10 @@ Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
 Fifth Floor, Boston, MA  02110-1301  USA
 """
 import datetime
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
-from did.interval import Interval
-from did.worktime import Accounting
+from did.interval import Interval, TaskName
+from did.worktime import Accounting, WorkSessionStats
 
 
 class AppendingToClosedSessionError(Exception):
@@ -35,6 +35,9 @@ class WorkSession(object):
     classdocs
     """
 
+    __slots__ = ('_start', '_accounting', '_is_workday', '_intervals',
+                 '_is_closed', '_stats', '_overhours', '_total_overtime')
+
     def __init__(self,
                  start: datetime.datetime,
                  accounting: Accounting,
@@ -51,6 +54,9 @@ class WorkSession(object):
         self._is_workday = is_workday
         self._intervals: List[Interval] = []
         self._is_closed = False
+        self._stats: Optional[WorkSessionStats] = None
+        self._overhours: Optional[datetime.timedelta] = None
+        self._total_overtime: Optional[datetime.timedelta] = None
 
         if events is not None:
             for timestamp, event in events:
@@ -68,17 +74,30 @@ class WorkSession(object):
         return ('WorkSession(start="{}", is_workday={}, intervals={})'
                 .format(self._start, self._is_workday, self._intervals))
 
-    def append_log_event(self, date_time, text):
+    def append_log_event(self, date_time, text: Union[str, TaskName]):
         if self._is_closed:
             raise AppendingToClosedSessionError()
         self._intervals.append(Interval(self.end, date_time, text, False))
+        self._invalidate_stats()
 
     def append_assumed_interval(self, date_time):
         if self._is_closed:
             raise AppendingToClosedSessionError()
         if len(self._intervals) > 0:
-            name = self._intervals[-1].name
+            name = self._intervals[-1].task_name
             self._intervals.append(Interval(self.end, date_time, name, True))
+            self._invalidate_stats()
+
+    def remove_assumed_interval(self):
+        """Remove the assumed interval from the end of the session, if there
+        is one."""
+        if self._intervals and self._intervals[-1].is_assumed:
+            self._intervals.pop()
+            self._invalidate_stats()
+
+    def _invalidate_stats(self):
+        self._stats = None
+        self._overhours = None
 
     def close(self):
         self._is_closed = True
@@ -115,14 +134,30 @@ class WorkSession(object):
                 return interval
         return None
 
-    def set_stats(self, stats):
-        self._stats = stats
-
     def set_total_overtime(self, total_overtime):
         self._total_overtime = total_overtime
 
-    def stats(self):
+    def stats(self) -> WorkSessionStats:
+        """Return the stats of the session, computing them on first access.
+        This adjusts the durations of the intervals."""
+        if self._stats is None:
+            self._stats = WorkSessionStats(self)
         return self._stats
 
+    def overhours(self) -> datetime.timedelta:
+        """Return the overtime of the session.  Unless the stats have already
+        been computed, it's computed without adjusting the intervals."""
+        if self._overhours is None:
+            if self._stats is not None:
+                self._overhours = self._stats.overhours()
+            else:
+                self._overhours = WorkSessionStats(
+                    self, adjust_intervals=False).overhours()
+        return self._overhours
+
+    def set_overhours(self, overhours: datetime.timedelta):
+        """Set the overtime of the session, already known from elsewhere."""
+        self._overhours = overhours
+
     def total_overtime(self):
         return self._total_overtime
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import datetime
+from itertools import repeat
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from did.checkpoints import Checkpoint, CheckpointIndex
+from did.day_range import DayRange
+from did.report import AggregatePartial, AggregateRangeDisplay, Display, \
+    IntervalFilter
+from did.session import WorkSession
+from did.worklog import SessionStream
+
+Shard = Tuple[Checkpoint, Optional[int]]
+"""The checkpoint of the first session of a shard of a job log, and the offset
+where the shard ends, or None if it extends to the end of the file"""
+
+ShardResult = Tuple[datetime.timedelta, List[WorkSession],
+                    Optional[AggregatePartial]]
+"""The overtime of all the sessions of a shard, and either its sessions in the
+range of the report, or what they add up to in an aggregated report"""
+
+
+def plan_shards(index: CheckpointIndex, day_range: DayRange,
+                count: int) -> List[Shard]:
+    """Split the part of the log needed to report the sessions in the range
+    of days into at most count shards with a similar number of sessions,
+    starting at the checkpoints of the index.  Return an empty list if there
+    are too few sessions to split."""
+    checkpoints, end = index.checkpoints_between(day_range.first_day,
+                                                 day_range.last_day)
+    if count < 2 or len(checkpoints) < 2:
+        return []
+    size = -(-len(checkpoints) // count)
+    starts = checkpoints[::size]
+    ends: List[Optional[int]] = [checkpoint.offset
+                                 for checkpoint in starts[1:]]
+    return list(zip(starts, ends + [end]))
+
+
+def map_shard(file_name: str, shard: Shard, day_range: DayRange,
+              aggregate: bool, adjusted: bool, filter: IntervalFilter,
+              assume_until: Optional[datetime.datetime]) -> ShardResult:
+    """Load the sessions of a shard and compute their stats.  This is run in
+    the worker processes.
+
+    The running total of overtime of the returned sessions starts from zero
+    at the beginning of the shard, as the overtime of the preceding shards
+    isn't known yet.
+    """
+    checkpoint, end = shard
+    stream = SessionStream(
+        file_name,
+        checkpoint=Checkpoint(checkpoint.offset, checkpoint.date,
+                              datetime.timedelta(0), checkpoint.accounting,
+                              checkpoint.line_number),
+        assume_until=assume_until if end is None else None,
+        end_offset=end)
+    display = None
+    if aggregate:
+        display = AggregateRangeDisplay(stream, day_range, adjusted, filter)
+    sessions = []
+    overtime = datetime.timedelta(0)
+    for session in stream.iter_sessions():
+        overtime = session.total_overtime()
+        if session.start.date() not in day_range:
+            continue
+        if display is not None:
+            display.add_session(session)
+        else:
+            # The stats are computed here, and sent together with the session
+            session.stats()
+            sessions.append(session)
+    return (overtime, sessions,
+            display.partial() if display is not None else None)
+
+
+def reduce_shards(display: Display, results: Iterable[ShardResult],
+                  initial_overtime: datetime.timedelta
+                  ) -> Iterator[WorkSession]:
+    """Generate the sessions of the shards in order, adding the overtime of
+    all the preceding shards to their running total of overtime.  The partial
+    aggregates are merged into the display instead."""
+    total_overtime = initial_overtime
+    for overtime, sessions, partial in results:
+        for session in sessions:
+            session.set_total_overtime(total_overtime +
+                                       session.total_overtime())
+            yield session
+        if partial is not None:
+            assert isinstance(display, AggregateRangeDisplay)
+            display.merge(partial)
+        total_overtime += overtime
+
+
+def display_sharded(display: Display, file_name: str, index: CheckpointIndex,
+                    jobs: int,
+                    assume_until: Optional[datetime.datetime]) -> bool:
+    """Display the report of the log file computed by up to the given number
+    of worker processes, each loading a shard of the log.  Return False,
+    without displaying anything, if the log can't be split into shards."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    shards = plan_shards(index, display.day_range, jobs)
+    if not shards:
+        return False
+    aggregate = isinstance(display, AggregateRangeDisplay)
+    with ProcessPoolExecutor(len(shards)) as executor:
+        results = executor.map(
+            map_shard, repeat(file_name), shards, repeat(display.day_range),
+            repeat(aggregate), repeat(display.adjusted),
+            repeat(display.filter), repeat(assume_until))
+        display.display_sessions(reduce_shards(
+            display, results, shards[0][0].total_overtime))
+    return True
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import argparse
+import datetime
+import heapq
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from did.checkpoints import Checkpoint
+from did.log_format import is_sqlite_log
+from did.worklog import SessionStream, WorkLog, WorkLogReader
+from did.worklog_file import DeletePaidBreak, Event, JobListWriter, \
+    NumberedAction, ParsedActionType, Parser, SetParam
+from did.worktime import PaidBreakConfig
+
+SQLITE_FORMAT_VERSION = 1
+"""Version of the schema, kept as the user_version of the database"""
+
+_SCHEMA = """
+CREATE TABLE names (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+CREATE TABLE events (
+    line_id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    name_id INTEGER NOT NULL REFERENCES names (id)
+);
+CREATE INDEX events_time ON events (time);
+CREATE TABLE configs (
+    line_id INTEGER PRIMARY KEY REFERENCES lines (id),
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX configs_name ON configs (kind, name);
+CREATE TABLE lines (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    ending TEXT NOT NULL
+);
+"""
+
+_SESSION_START_NAMES = ('arrive', 'arrive ooo')
+
+_LAST_LINE_ID = 2 ** 63 - 1
+
+_IMPORT_BATCH_SIZE = 10000
+
+
+class SqliteFormatError(Exception):
+    def __init__(self, file_name: str, version: int):
+        super().__init__("Unsupported version {} of the job log database "
+                         "\"{}\"".format(version, file_name))
+
+
+def format_time(timestamp: datetime.datetime) -> str:
+    """Format the time of an event like in the text format of the log."""
+    return timestamp.replace(microsecond=0).isoformat(' ')
+
+
+def _config_kind(action: ParsedActionType) -> Optional[Tuple[str, str]]:
+    """Return the kind of the config line and the name of the parameter or
+    paid break that it sets, or None if the action isn't a config change."""
+    if isinstance(action, SetParam):
+        return 'param', action.name
+    if isinstance(action, PaidBreakConfig):
+        return 'paid_break', action.name
+    if isinstance(action, DeletePaidBreak):
+        return 'delete_paid_break', action.name
+    return None
+
+
+def _split_ending(line: str) -> Tuple[str, str]:
+    """Split a line read without translating the newlines into its text and
+    its line ending, which is empty at the end of a file without a newline."""
+    if line.endswith('\r\n'):
+        return line[:-2], '\r\n'
+    if line.endswith('\n') or line.endswith('\r'):
+        return line[:-1], line[-1]
+    return line, ''
+
+
+class SqliteJobLog:
+    """A job log kept in an SQLite database, instead of the text format.
+
+    Each line of the text format is numbered, and the number is the key in
+    the table of the line's kind:
+      events - The events, with their times, indexed, and the ids of their
+          task names.
+      names - The task names, each kept once, indexed.
+      configs - The config lines, with their kind and the name of the
+          parameter or paid break that they set, indexed by both.
+      lines - The text of the lines which can't be restored from the other
+          tables: config lines, comments, blank lines, and events which
+          aren't written like did writes them.
+
+    The database is created if it doesn't exist.
+    """
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        # The transactions are begun explicitly, see _transaction()
+        self._connection = sqlite3.connect(file_name, isolation_level=None)
+        try:
+            self._check_schema()
+        except (sqlite3.Error, SqliteFormatError):
+            self._connection.close()
+            raise
+        self._names: Optional[Dict[int, str]] = None
+
+    def _check_schema(self):
+        version = self._user_version()
+        if version == 0:
+            with self._transaction():
+                # Another process may have created the tables in the meantime
+                if self._user_version() == 0:
+                    for statement in _SCHEMA.split(';'):
+                        if statement.strip():
+                            self._connection.execute(statement)
+                    self._connection.execute("PRAGMA user_version = {}".format(
+                        SQLITE_FORMAT_VERSION))
+        elif version != SQLITE_FORMAT_VERSION:
+            raise SqliteFormatError(self.file_name, version)
+
+    def _user_version(self) -> int:
+        return self._connection.execute("PRAGMA user_version").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self) -> 'SqliteJobLog':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Run the statements in a transaction, which holds the lock for
+        writing from its beginning, so that the line numbers found in it
+        can't be taken by another process."""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _next_line_id(self) -> int:
+        return self._connection.execute(
+            "SELECT max(coalesce((SELECT max(line_id) FROM events), 0), "
+            "coalesce((SELECT max(id) FROM lines), 0)) + 1").fetchone()[0]
+
+    def _task_names(self) -> Dict[int, str]:
+        """Return the task names by their ids."""
+        if self._names is None:
+            self._names = dict(self._connection.execute(
+                "SELECT id, text FROM names"))
+        return self._names
+
+    def _name_ids(self) -> Dict[str, int]:
+        return {name: name_id
+                for name_id, name in self._task_names().items()}
+
+    def import_text(self, text_file_name: str):
+        """Append the lines of a job log in the text format, keeping them
+        exactly, in a single transaction.  The rows are inserted in batches.
+
+        The lines are only parsed, not loaded, so the log isn't checked for
+        errors like the non-chronological order of events.
+        """
+        parser = Parser()
+        with open(text_file_name, newline='') as text_file, \
+                self._transaction():
+            name_ids = self._name_ids()
+            next_name_id = max(name_ids.values(), default=0) + 1
+            first_line_id = self._next_line_id()
+            names: List[Tuple[int, str]] = []
+            events: List[Tuple[int, str, int]] = []
+            configs: List[Tuple[int, str, str]] = []
+            lines: List[Tuple[int, str, str]] = []
+            for line_id, line in enumerate(text_file, start=first_line_id):
+                text, ending = _split_ending(line)
+                try:
+                    action = parser.process_line(
+                        text + '\n' if ending else text)
+                except Exception as error:
+                    print("Error while parsing file \"{}\", line {}:".format(
+                        text_file_name, line_id - first_line_id + 1))
+                    raise error
+                if isinstance(action, Event):
+                    time = format_time(action.timestamp)
+                    name_id = name_ids.get(action.text)
+                    if name_id is None:
+                        name_id = next_name_id
+                        next_name_id += 1
+                        name_ids[action.text] = name_id
+                        names.append((name_id, action.text))
+                    events.append((line_id, time, name_id))
+                    if (text == time + ': ' + action.text and
+                            ending == '\n'):
+                        continue
+                else:
+                    config = _config_kind(action)
+                    if config is not None:
+                        configs.append((line_id,) + config)
+                lines.append((line_id, text, ending))
+                if len(events) + len(lines) >= _IMPORT_BATCH_SIZE:
+                    self._insert_rows(names, events, configs, lines)
+            self._insert_rows(names, events, configs, lines)
+            self._names = None
+
+    def _insert_rows(self, names, events, configs, lines):
+        """Insert the rows in the lists, and empty them."""
+        for table, rows in [("names", names), ("events", events),
+                            ("configs", configs), ("lines", lines)]:
+            if rows:
+                self._connection.executemany(
+                    "INSERT INTO {} VALUES ({})".format(
+                        table, ", ".join("?" * len(rows[0]))),
+                    rows)
+                rows.clear()
+
+    def text_lines(self) -> Iterator[str]:
+        """Generate the lines of the log in the text format, with their line
+        endings."""
+        names = self._task_names()
+        events = ((line_id, 1, "{}: {}\n".format(time, names[name_id]))
+                  for line_id, time, name_id in self._connection.execute(
+                      "SELECT line_id, time, name_id FROM events "
+                      "ORDER BY line_id"))
+        lines = ((line_id, 0, text + ending)
+                 for line_id, text, ending in self._connection.execute(
+                     "SELECT id, text, ending FROM lines ORDER BY id"))
+        last_line_id = None
+        # The text of an event kept in the lines table comes first
+        for line_id, _, text in heapq.merge(lines, events):
+            if line_id != last_line_id:
+                last_line_id = line_id
+                yield text
+
+    def export_text(self, text_file_name: str):
+        """Write the log in the text format to a new file."""
+        with open(text_file_name, 'x', newline='') as text_file:
+            text_file.writelines(self.text_lines())
+
+    def actions(self, start: int = 0, end: Optional[int] = None
+                ) -> Iterator[NumberedAction]:
+        """Generate the actions of the lines from the start line number up to
+        the end one, if given, with their line numbers.  The rows are read
+        only as the actions are consumed."""
+        if end is None:
+            end = _LAST_LINE_ID
+        configs = self._config_actions(start, end)
+        next_config = next(configs, None)
+        names = self._task_names()
+        fromisoformat = datetime.datetime.fromisoformat
+        for line_id, time, name_id in self._connection.execute(
+                "SELECT line_id, time, name_id FROM events "
+                "WHERE line_id >= ? AND line_id < ? ORDER BY line_id",
+                (start, end)):
+            while next_config is not None and next_config[0] < line_id:
+                yield next_config
+                next_config = next(configs, None)
+            yield line_id, Event(fromisoformat(time), names[name_id])
+        if next_config is not None:
+            yield next_config
+            yield from configs
+
+    def _config_actions(self, start: int, end: int
+                        ) -> Iterator[NumberedAction]:
+        """Generate the actions of the config lines from the start line
+        number up to the end one, which are few, so they are read at once."""
+        parser = Parser()
+        rows = self._connection.execute(
+            "SELECT configs.line_id, lines.text FROM configs "
+            "JOIN lines ON lines.id = configs.line_id "
+            "WHERE configs.line_id >= ? AND configs.line_id < ? "
+            "ORDER BY configs.line_id", (start, end)).fetchall()
+        for line_id, text in rows:
+            yield line_id, parser.process_line(text + '\n')
+
+    def session_start(self, day: datetime.date
+                      ) -> Optional[Tuple[int, datetime.date]]:
+        """Return the line number and the date of the first session starting
+        on the given day or later, or of the last session if there is no such
+        session, found with the index of the times of the events.  Return None
+        if there is no session."""
+        row = self._connection.execute(
+            "SELECT line_id, time FROM events "
+            "WHERE time >= ? AND name_id IN "
+            "(SELECT id FROM names WHERE text IN (?, ?)) "
+            "ORDER BY time LIMIT 1",
+            (day.isoformat(),) + _SESSION_START_NAMES).fetchone()
+        if row is None:
+            row = next(self.session_starts_backwards(), None)
+        if row is None:
+            return None
+        return row[0], datetime.date.fromisoformat(row[1][:10])
+
+    def session_starts_backwards(self) -> Iterator[Tuple[int, str, bool]]:
+        """Generate the (line number, time, is_workday) tuples of the events
+        starting sessions, from the last one to the first one."""
+        names = self._task_names()
+        for line_id, time, name_id in self._connection.execute(
+                "SELECT line_id, time, name_id FROM events "
+                "WHERE name_id IN "
+                "(SELECT id FROM names WHERE text IN (?, ?)) "
+                "ORDER BY line_id DESC",
+                _SESSION_START_NAMES):
+            yield line_id, time, names[name_id] == 'arrive'
+
+    def checkpoint(self, line_id: int, date: datetime.date
+                   ) -> Optional[Checkpoint]:
+        """Make the checkpoint of the session starting at the given line.  The
+        accounting is set by the config lines preceding it, but the total
+        overtime of the preceding sessions isn't known, so it's zero.
+
+        Return None if the config lines can't be applied, so that the log
+        needs to be loaded from the beginning to report the error.
+        """
+        # The config lines are applied to a work log which isn't loaded
+        worklog = SessionStream(self.file_name)
+        reader = WorkLogReader(worklog)
+        try:
+            for _, action in self._config_actions(0, line_id):
+                reader.handle(action)
+        except Exception:
+            return None
+        return Checkpoint(line_id, date, datetime.timedelta(0),
+                          worklog.accounting, line_id)
+
+    def append_event(self, timestamp: datetime.datetime, name: str):
+        """Append an event to the log, in a transaction."""
+        with self._transaction():
+            line_id = self._next_line_id()
+            # Keep the last line from being joined with the new one in the
+            # text format
+            self._connection.execute(
+                "UPDATE lines SET ending = '\n' WHERE id = ? AND ending = ''",
+                (line_id - 1,))
+            self._connection.execute(
+                "INSERT OR IGNORE INTO names (text) VALUES (?)", (name,))
+            self._connection.execute(
+                "INSERT INTO events SELECT ?, ?, id FROM names WHERE text = ?",
+                (line_id, format_time(timestamp), name))
+            self._names = None
+
+
+def sqlite_job_reader(file_name: str, offset: int = 0,
+                      end: Optional[int] = None) -> Iterator[NumberedAction]:
+    """Generator of the actions of a job log kept in an SQLite database, with
+    their line numbers, from the line number given as the offset up to the
+    end one, if given."""
+    with SqliteJobLog(file_name) as job_log:
+        yield from job_log.actions(offset, end)
+
+
+def sqlite_checkpoint(file_name: str, day: datetime.date
+                      ) -> Optional[Checkpoint]:
+    """Make a checkpoint of the first session starting on the given day or
+    later, or of the last session if there is no such session, in a job log
+    kept in an SQLite database.  The total overtime of the preceding sessions
+    isn't known, so it's zero.  Return None if there is no session."""
+    with SqliteJobLog(file_name) as job_log:
+        start = job_log.session_start(day)
+        if start is None:
+            return None
+        return job_log.checkpoint(*start)
+
+
+def tail_sqlite_worklog(file_name: str,
+                        day: datetime.date,
+                        is_enough: Optional[Callable[[WorkLog], bool]] = None
+                        ) -> WorkLog:
+    """Load only the sessions at the end of a job log kept in an SQLite
+    database, which are needed to append an event on the given day, like
+    tail_worklog() does for the text format.
+
+    The accounting of the loaded sessions is known from the config lines
+    preceding them, so they can be loaded even if config lines follow.
+    """
+    with SqliteJobLog(file_name) as job_log:
+        starts = job_log.session_starts_backwards()
+        start = None
+        for start in starts:
+            line_id, time, is_workday = start
+            if is_workday or datetime.date.fromisoformat(time[:10]) < day:
+                break
+
+        while start is not None:
+            checkpoint = job_log.checkpoint(
+                start[0], datetime.date.fromisoformat(start[1][:10]))
+            if checkpoint is None:
+                break
+            worklog = WorkLog(file_name, checkpoint=checkpoint)
+            if is_enough is None or is_enough(worklog):
+                return worklog
+            # Load twice as many sessions
+            for _ in worklog.sessions():
+                start = next(starts, None)
+                if start is None:
+                    break
+    return WorkLog(file_name)
+
+
+class SqliteJobListWriter(JobListWriter):
+    """JobListWriter of a job log kept in an SQLite database"""
+
+    def _write_event(self, date, name) -> bool:
+        try:
+            with SqliteJobLog(self.filename) as job_log:
+                job_log.append_event(date, name)
+        except sqlite3.Error as err:
+            print("Error writing to file '{0}': {1}"
+                  .format(self.filename, err))
+            return False
+        return True
+
+
+def main(cmdline_args=None):
+    """Convert a job log between the text format and an SQLite database."""
+    parser = argparse.ArgumentParser(
+        prog="python -m did.sqlite_log",
+        description="Convert a job log from the text format to an SQLite "
+                    "database (import), or back (export), keeping all its "
+                    "lines exactly")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("source", metavar="SOURCE")
+    parser.add_argument("destination", metavar="DESTINATION")
+    args = parser.parse_args(cmdline_args)
+    if not os.path.exists(args.source):
+        parser.error("'{}' doesn't exist".format(args.source))
+    if args.command == "export" and not is_sqlite_log(args.source):
+        parser.error("'{}' isn't a job log database".format(args.source))
+    if os.path.exists(args.destination):
+        parser.error("'{}' already exists".format(args.destination))
+
+    if args.command == "import":
+        try:
+            with SqliteJobLog(args.destination) as job_log:
+                job_log.import_text(args.source)
+        except BaseException:
+            os.remove(args.destination)
+            raise
+    else:
+        with SqliteJobLog(args.source) as job_log:
+            job_log.export_text(args.destination)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
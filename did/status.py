@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import datetime
+import os
+import sys
+
+# The status of the current session, for shell prompts and status bars, is
+# kept in a small text file next to the job log, which is updated each time a
+# task is recorded.  Querying it doesn't need to parse the log, so this module
+# imports as little as possible.
+
+STATUS_SUFFIX = '.didstatus'
+"""Suffix appended to the job log file name to make the status file name"""
+
+STATUS_FORMAT_VERSION = 2
+
+DEFAULT_STATUS_FORMAT = "{task} {work}"
+
+STATUS_FIELDS = ('task', 'start', 'last', 'since', 'work', 'break',
+                 'overtime')
+"""Names of the fields available in a status format string"""
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration like the reports do, e.g. "1h5m"."""
+    text = ''
+    if seconds < 0:
+        text = '-'
+        seconds = -seconds
+    hours = seconds / 3600
+    minutes = (seconds / 60) % 60
+    if 0 < hours:
+        text += "%dh" % hours
+    text += "%dm" % minutes
+    return text
+
+
+def _log_stat(log_file_name: str):
+    stat = os.stat(log_file_name)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class SessionStatus:
+    """The state of the last session in a job log, as of its last event.
+
+    Attributes:
+        log_stat - (size, modification time) of the log this status is for,
+            or None if it isn't saved.
+        start - When the session started.
+        time - The time of the last event.
+        task - The name of the last task.
+        is_break - True if the last task is a break, None if there's no task
+            yet.
+        work_seconds, break_seconds - Work and break time of the session,
+            with the paid breaks counted as work.
+        expected_seconds - The work time expected in the session.
+        accounting_data - The Accounting of the session, as plain data in
+            JSON.  It's decoded only when needed, so that the status can be
+            read without importing json and the modules defining the
+            Accounting.
+    """
+    def __init__(self, log_stat, start, time, task, is_break, work_seconds,
+                 break_seconds, expected_seconds, accounting_data):
+        self.log_stat = log_stat
+        self.start = start
+        self.time = time
+        self.task = task
+        self.is_break = is_break
+        self.work_seconds = work_seconds
+        self.break_seconds = break_seconds
+        self.expected_seconds = expected_seconds
+        self.accounting_data = accounting_data
+
+    @classmethod
+    def from_session(cls, session, log_stat=None) -> 'SessionStatus':
+        import json
+        stats = session.stats()
+        last_interval = (session.intervals()[-1] if session.intervals()
+                         else None)
+        return cls(log_stat,
+                   session.start,
+                   session.end,
+                   last_interval.name if last_interval else "arrive",
+                   last_interval.is_break if last_interval else None,
+                   stats.time_worked().total_seconds(),
+                   stats.time_slacked().total_seconds(),
+                   stats.expected_work_time().total_seconds(),
+                   json.dumps(session.accounting().to_data(),
+                              separators=(',', ':')))
+
+    def to_text(self) -> str:
+        return "\n".join([
+            "did-status {}".format(STATUS_FORMAT_VERSION),
+            str(self.log_stat[0]),
+            str(self.log_stat[1]),
+            self.start.isoformat(),
+            self.time.isoformat(),
+            repr(self.is_break),
+            repr(self.work_seconds),
+            repr(self.break_seconds),
+            repr(self.expected_seconds),
+            self.accounting_data,
+            self.task]) + "\n"
+
+    @classmethod
+    def from_text(cls, text: str) -> 'SessionStatus':
+        """Parse the status saved by to_text().  Raise ValueError if it's
+        invalid."""
+        lines = text.split("\n")
+        if (len(lines) != 12 or lines[11] != '' or
+                lines[0] != "did-status {}".format(STATUS_FORMAT_VERSION)):
+            raise ValueError("Invalid status file")
+        is_break = {'True': True, 'False': False, 'None': None}[lines[5]]
+        return cls((int(lines[1]), int(lines[2])),
+                   datetime.datetime.fromisoformat(lines[3]),
+                   datetime.datetime.fromisoformat(lines[4]),
+                   lines[10],
+                   is_break,
+                   float(lines[6]),
+                   float(lines[7]),
+                   float(lines[8]),
+                   lines[9])
+
+    def accounting(self):
+        """Return the Accounting of the session, or None if its data is
+        invalid."""
+        import json
+        from did.worktime import Accounting
+        try:
+            return Accounting.from_data(json.loads(self.accounting_data))
+        except (RecursionError, ValueError):
+            return None
+
+    def fields(self, now: datetime.datetime) -> dict:
+        """Return the values available in a status format string.
+
+        The time since the last event is assumed to continue the last task,
+        as in the reports, but it's added without applying the paid breaks.
+        """
+        since = max(0.0, (now - self.time).total_seconds())
+        work_seconds = self.work_seconds
+        break_seconds = self.break_seconds
+        if self.is_break:
+            break_seconds += since
+        elif self.is_break is not None:
+            work_seconds += since
+        return {
+            'task': self.task,
+            'start': self.start.strftime("%H:%M"),
+            'last': self.time.strftime("%H:%M"),
+            'since': format_duration(since),
+            'work': format_duration(work_seconds),
+            'break': format_duration(break_seconds),
+            'overtime': format_duration(work_seconds - self.expected_seconds),
+        }
+
+
+def format_status(status_format: str, status, now: datetime.datetime) -> str:
+    """Format the status of the session, or the status with no session today
+    if the status is None or of a session started on another day.
+
+    Raise KeyError, IndexError or ValueError if the format is invalid, e.g.
+    it has a field not in STATUS_FIELDS.
+    """
+    if status is not None and status.start.date() == now.date():
+        fields = status.fields(now)
+    else:
+        fields = {'task': '', 'start': '', 'last': '', 'since': '',
+                  'work': format_duration(0), 'break': format_duration(0),
+                  'overtime': format_duration(0)}
+    return status_format.format(**fields)
+
+
+def save_status(status_file_name: str, log_file_name: str, session):
+    """Save the status of the given session, which must be the last one in
+    the log.  Failures are ignored, because the status can be rebuilt."""
+    # Imported here, so that reading the status doesn't need it
+    from did.atomic_file import write_file_atomically
+    try:
+        status = SessionStatus.from_session(session,
+                                            _log_stat(log_file_name))
+    except OSError:
+        return
+    data = status.to_text().encode()
+    write_file_atomically(status_file_name, lambda f: f.write(data))
+
+
+def load_status(status_file_name: str, log_file_name: str):
+    """Return the SessionStatus of the log, or None if it's missing or out of
+    date."""
+    try:
+        with open(status_file_name, 'rb') as status_file:
+            status = SessionStatus.from_text(status_file.read().decode())
+        log_stat = _log_stat(log_file_name)
+    except (OSError, KeyError, ValueError):
+        return None
+    if status.log_stat != log_stat:
+        return None
+    return status
+
+
+def parse_status_args(args):
+    """Parse the arguments of a status query: "--status[=FORMAT]", and
+    optionally "-f FILE" or "--log-file FILE".
+
+    Return a (format, log file name) pair, with None as the log file name if
+    it isn't given.  Return None if the arguments aren't a status query, or
+    contain anything else.
+    """
+    status_format = None
+    log_file_name = None
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        if arg == '--status':
+            status_format = DEFAULT_STATUS_FORMAT
+        elif arg.startswith('--status='):
+            status_format = arg[len('--status='):]
+        elif arg in ('-f', '--log-file') and index + 1 < len(args):
+            index += 1
+            log_file_name = args[index]
+        elif arg.startswith('--log-file='):
+            log_file_name = arg[len('--log-file='):]
+        else:
+            return None
+        index += 1
+    if status_format is None:
+        return None
+    return status_format, log_file_name
+
+
+def config_dir() -> str:
+    """Return the directory of the default job log."""
+    if 'HOME' in os.environ:
+        return os.environ['HOME'] + "/.config/did"
+    return "."
+
+
+def default_log_file_name() -> str:
+    return config_dir() + "/joblog"
+
+
+def print_status(args, now=None) -> bool:
+    """Print the status if the arguments are a status query, and the status
+    file is up to date.  Return False if it wasn't possible."""
+    parsed_args = parse_status_args(args)
+    if parsed_args is None:
+        return False
+    status_format, log_file_name = parsed_args
+    if log_file_name is None:
+        log_file_name = default_log_file_name()
+    status = load_status(log_file_name + STATUS_SUFFIX, log_file_name)
+    if status is None:
+        return False
+    if now is None:
+        now = datetime.datetime.now()
+    try:
+        text = format_status(status_format, status, now)
+    except (KeyError, IndexError, ValueError):
+        # Left for the command line parser to report
+        return False
+    sys.stdout.write(text + "\n")
+    return True
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import datetime
+import os
+from typing import List, Optional
+
+from did.day_range import DayRange
+from did.report import AggregatePartial, AggregateRangeDisplay, \
+    IntervalFilter
+
+
+def aggregate_log(file_name: str, day_range: DayRange, adjusted: bool,
+                  filter: IntervalFilter, use_cache: bool,
+                  now: datetime.datetime) -> AggregatePartial:
+    """Add up the sessions of a log file in the range of days, as
+    AggregateRangeDisplay does.  This is run in the worker processes.
+
+    The cache files next to the log, which may be written by someone else,
+    aren't used, so the first day of the range is sought in the log itself,
+    unless use_cache is False.
+    """
+    from did.did import open_worklog
+
+    worklog, _ = open_worklog(file_name, day_range.first_day, False,
+                              stream=True, assume_until=now, seek=use_cache)
+    display = AggregateRangeDisplay(worklog, day_range, adjusted, filter)
+    for session in worklog.sessions_in_range(day_range):
+        display.add_session(session)
+    return display.partial()
+
+
+def aggregate_logs(display: AggregateRangeDisplay, file_names: List[str],
+                   use_cache: bool, now: datetime.datetime,
+                   max_workers: Optional[int] = None):
+    """Add up the sessions of several log files into the display.  Each file
+    is read in a separate worker process, and their partial results are
+    merged in the order of the files."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = [(file_name, display.day_range, display.adjusted, display.filter,
+             use_cache, now) for file_name in file_names]
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+    if max_workers <= 1:
+        partials = [aggregate_log(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers) as executor:
+            partials = list(executor.map(aggregate_log, *zip(*jobs)))
+    for partial in partials:
+        display.merge(partial)
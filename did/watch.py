@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (C) 2020 Michał Czuczman
+
+This file is part of Did.
+
+Did is free software; you can redistribute it and/or modify it under the
+terms of the GNU General Public License as published by the Free Software
+Foundation; either version 2 of the License, or (at your option) any later
+version.
+
+Did is distributed in the hope that it will be useful, but WITHOUT ANY
+WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
+Fifth Floor, Boston, MA  02110-1301  USA
+"""
+import datetime
+import io
+import os
+from typing import Callable, Optional, Tuple
+
+from did.worklog import WorkLog, WorkLogReader
+from did.worklog_file import Parser
+
+FileState = Tuple[int, int, int]
+"""The (inode, size, modification time) of a file"""
+
+
+def file_state(file_name: str) -> Optional[FileState]:
+    """Return the state of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class LogWatcher:
+    """
+    Keeps a WorkLog up to date with its job log file, which is polled for
+    changes.
+
+    Only the lines appended to the file since the last check are parsed and
+    added to the WorkLog.  The file is loaded again only if it was truncated,
+    replaced, or modified before the appended lines.
+    """
+
+    TAIL_SIZE = 4096
+    """Number of bytes before the end of the parsed part of the file, which
+    must stay unchanged for the appended lines to be parsed incrementally"""
+
+    def __init__(self, file_name: str, load: Callable[[], WorkLog]):
+        """
+        Constructor.
+
+        load - Function loading the WorkLog from the file.
+        """
+        self.file_name = file_name
+        self._load = load
+        # Number of times the file was loaded
+        self.reload_count = 0
+        self.reload()
+
+    def reload(self):
+        """Load the WorkLog from the file again."""
+        while True:
+            state = file_state(self.file_name)
+            self.worklog = self._load()
+            self.reload_count += 1
+            # The lines appended while loading could be parsed twice
+            if file_state(self.file_name) == state:
+                break
+        self._state = state
+        self._offset = 0
+        self._tail = b''
+        self._ends_with_line = True
+        if state is not None and state[1] > 0:
+            size = state[1]
+            with open(self.file_name, 'rb') as log_file:
+                log_file.seek(max(0, size - self.TAIL_SIZE))
+                data = log_file.read(self.TAIL_SIZE)
+            self._offset = size
+            self._tail = data
+            self._ends_with_line = data.endswith(b'\n')
+        # The index of the first session without the running total computed
+        self._stale_since = 0
+
+    def refresh(self, now: datetime.datetime):
+        """Bring the WorkLog up to date with the file, and extend its last
+        session until now with an assumed interval, if the session ends
+        today."""
+        sessions = self.worklog.sessions()
+        self._stale_since = min(self._stale_since, max(len(sessions) - 1, 0))
+        self.worklog.remove_assumed_interval()
+
+        state = file_state(self.file_name)
+        if state != self._state and not self._read_appended_lines(state):
+            self.reload()
+
+        end = self.worklog.end()
+        if end is not None and end.date() == now.date() and end <= now:
+            self.worklog.append_assumed_interval(now)
+        self.worklog.compute_stats(self._stale_since)
+        self._stale_since = len(self.worklog.sessions())
+
+    def _read_appended_lines(self, state: Optional[FileState]) -> bool:
+        """Parse the complete lines appended to the file and add them to the
+        WorkLog.  Return False if the file needs to be loaded again."""
+        if (state is None or self._state is None or
+                state[0] != self._state[0] or state[1] <= self._state[1] or
+                not self._ends_with_line):
+            return False
+        start = self._offset - len(self._tail)
+        with open(self.file_name, 'rb') as log_file:
+            log_file.seek(start)
+            data = log_file.read(state[1] - start)
+        if not data.startswith(self._tail):
+            return False
+        appended = data[len(self._tail):]
+        lines = appended[:appended.rfind(b'\n') + 1]
+
+        reader = WorkLogReader(self.worklog)
+        parser = Parser()
+        try:
+            with io.TextIOWrapper(io.BytesIO(lines)) as text:
+                for line in text:
+                    action = parser.process_line(line)
+                    if action is not None:
+                        reader.handle(action)
+        except Exception:
+            # Reloading shows where the error is, if it's still there
+            return False
+
+        self._state = state
+        self._offset += len(lines)
+        self._tail = (self._tail + lines)[-self.TAIL_SIZE:]
+        return True
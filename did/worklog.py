@@ -18,14 +18,21 @@ Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
 Fifth Floor, Boston, MA  02110-1301  USA
 """
 
+import bisect
 import datetime
+from typing import Iterable, Iterator, List, Optional
 
+from did.checkpoints import Checkpoint
+from did.day_range import DayRange
 from did.dispatchers import TypeBasedDispatcher
+from did.interval import TaskNameTable
+from did.log_cache import cached_job_reader
+from did.log_format import is_sqlite_log
 from did.session import AppendingToClosedSessionError, WorkSession
 from did.worklog_file import parse_timedelta, Event, SetParam, \
-    DeletePaidBreak, job_reader
-from did.worktime import make_preset_accounting, WorkSessionStats, \
-    PaidBreakConfig
+    DeletePaidBreak, NumberedAction, ParsedActionType, action_line_number, \
+    job_reader
+from did.worktime import make_preset_accounting, PaidBreakConfig
 
 
 class FirstJobNotArriveError(Exception):
@@ -77,21 +84,46 @@ class WorkLog:
     It consists of WorkSession's.
     """
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, cache_file_name: Optional[str] = None,
+                 checkpoint: Optional[Checkpoint] = None, jobs: int = 1):
         """
         Constructor
+
+        cache_file_name - Optional file keeping the already parsed contents of
+            the log, so that only the lines appended since the last run need to
+            be parsed.
+
+        checkpoint - If provided, the log is loaded starting from the session
+            at this checkpoint, skipping all the preceding sessions.
+
+        jobs - Number of worker processes parsing the parts of the log, when
+            it's not read from the cache.
         """
-        self.sessions_ = []
-        self.last_work_session_start_date = None
+        self._jobs = jobs
+        self.sessions_: List[WorkSession] = []
+        self._session_dates: List[datetime.date] = []
+        self.last_work_session_start_date: Optional[datetime.date] = None
+        self.task_names = TaskNameTable()
         self.file_name = file_name
-        self.accounting = make_preset_accounting('PL-computer')
         self.max_session_length = datetime.timedelta(days=1)
 
-        self._load_from_file(file_name)
-
-    def _load_from_file(self, file_name):
+        if checkpoint is None:
+            self.accounting = make_preset_accounting('PL-computer')
+            self.initial_overtime = datetime.timedelta(0)
+            self.start_offset = 0
+            self._load_from_file(file_name, cache_file_name)
+        else:
+            self.accounting = checkpoint.accounting
+            self.initial_overtime = checkpoint.total_overtime
+            self.start_offset = checkpoint.offset
+            self._load_from_file(file_name, None, checkpoint.offset,
+                                 checkpoint.line_number)
+
+    def _load_from_file(self, file_name, cache_file_name, offset=0,
+                        line_number=1):
         reader = WorkLogReader(self)
-        reader.load(file_name)
+        reader.load(file_name, cache_file_name, offset, jobs=self._jobs,
+                    line_number=line_number)
 
     def _check_chronology(self, date_time: datetime.datetime):
         end = self.end()
@@ -108,12 +140,12 @@ class WorkLog:
                     raise MultipleSessionsInOneDayError(
                         self.last_work_session_start_date)
             self.last_work_session_start_date = date_time.date()
-            self.sessions_.append(
-                WorkSession(date_time, self.accounting.clone(), True))
+            self._append_session(
+                WorkSession(date_time, self.accounting, True))
         elif text == "arrive ooo":
             self._close_last_session()
-            self.sessions_.append(
-                WorkSession(date_time, self.accounting.clone(), False))
+            self._append_session(
+                WorkSession(date_time, self.accounting, False))
         else:
             if not self.sessions_:
                 raise FirstJobNotArriveError()
@@ -121,22 +153,28 @@ class WorkLog:
             if session.start + self.max_session_length < date_time:
                 raise TooLongSessionError(session.start.date(),
                                           self.max_session_length)
-            session.append_log_event(date_time, text)
+            session.append_log_event(date_time,
+                                     self.task_names.intern(text))
+
+    def _append_session(self, session: WorkSession):
+        self.sessions_.append(session)
+        self._session_dates.append(session.start.date())
 
     def set_parameter(self, name, value):
         self._close_last_session()
         if name == 'daily_work_time':
-            self.accounting.daily_work_time = parse_timedelta(value)
+            self.accounting = self.accounting.with_daily_work_time(
+                parse_timedelta(value))
         else:
             raise InvalidParameter(name)
 
     def set_break(self, break_config: PaidBreakConfig):
         self._close_last_session()
-        self.accounting.set_break(break_config)
+        self.accounting = self.accounting.with_break(break_config)
 
     def delete_break(self, name: str):
         self._close_last_session()
-        self.accounting.delete_break(name)
+        self.accounting = self.accounting.without_break(name)
 
     def _close_last_session(self):
         if self.sessions_:
@@ -148,6 +186,10 @@ class WorkLog:
         if self.sessions_:
             self.sessions_[-1].append_assumed_interval(date_time)
 
+    def remove_assumed_interval(self):
+        if self.sessions_:
+            self.sessions_[-1].remove_assumed_interval()
+
     def end(self):
         if self.sessions_:
             return self.sessions_[-1].end
@@ -156,6 +198,13 @@ class WorkLog:
     def sessions(self):
         return self.sessions_
 
+    def sessions_in_range(self, day_range: DayRange
+                          ) -> Iterable[WorkSession]:
+        """Return the sessions starting on the days within the given range."""
+        first = bisect.bisect_left(self._session_dates, day_range.first_day)
+        last = bisect.bisect_right(self._session_dates, day_range.last_day)
+        return self.sessions_[first:last]
+
     def last_break_interval(self):
         for session in reversed(self.sessions_):
             last_break = session.last_break_interval()
@@ -170,30 +219,172 @@ class WorkLog:
                 return last_work
         return None
 
-    def compute_stats(self):
-        total_overtime = datetime.timedelta(0)
-        for session in self.sessions_:
-            stats = WorkSessionStats(session)
-            total_overtime += stats.overhours()
-            session.set_stats(stats)
+    def compute_stats(self, since: int = 0):
+        """Compute the running total of overtime of the sessions, starting
+        from the session with the given index.  The preceding sessions must
+        already have it computed.
+
+        The complete stats of a session are computed lazily on the first call
+        to its stats() method, so only the sessions that are reported need to
+        adjust their intervals.
+        """
+        if since > 0:
+            total_overtime = self.sessions_[since - 1].total_overtime()
+        else:
+            total_overtime = self.initial_overtime
+        for session in self.sessions_[since:]:
+            total_overtime += session.overhours()
             session.set_total_overtime(total_overtime)
 
 
+class SessionStream(WorkLog):
+    """
+    A WorkLog which generates its sessions one by one while reading the file,
+    instead of keeping all of them.  Only the session being read is kept, so
+    the memory used doesn't grow with the length of the log.
+    """
+
+    def __init__(self, file_name, cache_file_name: Optional[str] = None,
+                 checkpoint: Optional[Checkpoint] = None,
+                 assume_until: Optional[datetime.datetime] = None,
+                 end_offset: Optional[int] = None, jobs: int = 1):
+        """
+        Constructor.  The file is read only while iterating over the sessions.
+
+        assume_until - If provided, the last session is extended with an
+            assumed interval until that time, if it ends on the same day.
+
+        end_offset - If provided, the file is read only up to this offset,
+            which must be the beginning of a line.
+        """
+        self._closed_sessions: List[WorkSession] = []
+        self._assume_until = assume_until
+        self._end_offset = end_offset
+        super().__init__(file_name, cache_file_name, checkpoint, jobs)
+
+    def _load_from_file(self, file_name, cache_file_name, offset=0,
+                        line_number=1):
+        self._source = (file_name, cache_file_name, offset, self._end_offset,
+                        self._jobs, line_number)
+
+    def _append_session(self, session: WorkSession):
+        if self.sessions_:
+            self._closed_sessions.append(self.sessions_[-1])
+        self.sessions_ = [session]
+        self._session_dates = [session.start.date()]
+
+    def iter_sessions(self) -> Iterator[WorkSession]:
+        """Read the file, generating each session once it's complete, with its
+        running total of overtime set.  This can be done only once."""
+        total_overtime = self.initial_overtime
+        reader = WorkLogReader(self)
+        for _ in reader.read(*self._source):
+            while self._closed_sessions:
+                session = self._closed_sessions.pop(0)
+                total_overtime += session.overhours()
+                session.set_total_overtime(total_overtime)
+                yield session
+        if self.sessions_:
+            session = self.sessions_.pop()
+            if (self._assume_until is not None and
+                    session.end.date() == self._assume_until.date()):
+                session.append_assumed_interval(self._assume_until)
+            total_overtime += session.overhours()
+            session.set_total_overtime(total_overtime)
+            yield session
+
+    def sessions_in_range(self, day_range: DayRange
+                          ) -> Iterator[WorkSession]:
+        """Generate the sessions starting on the days within the given range,
+        reading the file only up to the end of the range."""
+        for session in self.iter_sessions():
+            day = session.start.date()
+            if day > day_range.last_day:
+                break
+            if day >= day_range.first_day:
+                yield session
+
+
 class WorkLogReader:
     _action_handler = TypeBasedDispatcher()
 
     def __init__(self, worklog: WorkLog):
         self._worklog = worklog
 
-    def load(self, file_name: str):
-        for line_number, parsed_line in enumerate(job_reader(file_name),
-                                                  start=1):
+    def load(self, file_name: str, cache_file_name: Optional[str] = None,
+             offset: int = 0, jobs: int = 1,
+             line_number: Optional[int] = 1):
+        for _ in self.read(file_name, cache_file_name, offset, jobs=jobs,
+                           line_number=line_number):
+            pass
+
+    def read(self, file_name: str, cache_file_name: Optional[str] = None,
+             offset: int = 0, end: Optional[int] = None,
+             jobs: int = 1,
+             line_number: Optional[int] = 1) -> Iterator[None]:
+        """Apply the actions from the file to the WorkLog one by one, yielding
+        after each of them.  The file is read from the offset up to the end
+        offset, if given.  Unless the actions are read from the cache, the
+        file is parsed in up to the given number of worker processes.
+
+        The line at the offset has the given number, used to report errors,
+        or None if it isn't known.
+
+        If the log is kept in an SQLite database, the offsets are the numbers
+        of the lines, and neither the cache nor the workers are used."""
+        if is_sqlite_log(file_name):
+            from did.sqlite_log import sqlite_job_reader
+            return self.apply_numbered(
+                sqlite_job_reader(file_name, offset, end), file_name)
+        if cache_file_name is None or offset != 0 or end is not None:
+            if jobs > 1 and end is None:
+                from did.parallel_reader import parallel_job_reader
+                return self.apply_numbered(
+                    parallel_job_reader(file_name, jobs, offset,
+                                        line_number), file_name)
+            actions = job_reader(file_name, offset, end)
+        else:
+            actions = cached_job_reader(file_name, cache_file_name)
+        return self.apply(actions, file_name, offset, line_number)
+
+    def apply(self, actions: Iterable[ParsedActionType], file_name: str,
+              offset: int = 0,
+              line_number: Optional[int] = 1) -> Iterator[None]:
+        """Apply the given actions, read from the file starting at the
+        offset, to the WorkLog one by one, yielding after each of them.
+
+        If reading or applying an action fails, the number of its line is
+        found with action_line_number(), counting from the given number of
+        the line at the offset."""
+        count = 0
+        try:
+            for action in actions:
+                self.handle(action)
+                count += 1
+                yield
+        except Exception:
+            print("Error while parsing file \"{}\", line {}:"
+                  .format(file_name, action_line_number(
+                      file_name, offset, count, line_number)))
+            raise
+
+    def apply_numbered(self, numbered_actions: Iterable[NumberedAction],
+                       file_name: str) -> Iterator[None]:
+        """Apply the given actions, read from the file together with the
+        numbers of their lines, to the WorkLog one by one, yielding after each
+        of them."""
+        for line_number, parsed_line in numbered_actions:
             try:
-                self._action_handler.handle(self, parsed_line)
+                self.handle(parsed_line)
             except Exception as error:
                 print("Error while parsing file \"{}\", line {}:"
                       .format(file_name, line_number))
                 raise error
+            yield
+
+    def handle(self, action: ParsedActionType):
+        """Apply a single action to the WorkLog."""
+        self._action_handler.handle(self, action)
 
     @_action_handler.register(Event)
     def handle_event(self, event: Event):
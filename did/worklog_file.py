@@ -1,14 +1,18 @@
 import datetime
+import io
+import locale
 import re
 import shlex
-from typing import Generator, List, Optional, Union
-
-from pytimeparse.timeparse import timeparse
+from typing import Any, BinaryIO, Dict, Generator, List, Optional, Tuple, \
+    Union
 
+from did.status import save_status
 from did.worktime import PaidBreakConfig
 
 
 def parse_timedelta(time_expression: str) -> datetime.timedelta:
+    # Imported here, as it's needed only by the rare config lines
+    from pytimeparse.timeparse import timeparse
     seconds: Optional[Union[int, float]] = timeparse(time_expression)
     if seconds is None:
         raise ValueError("Invalid time interval expression: {}"
@@ -66,8 +70,18 @@ class LineParserRegistry:
 ParsedActionType = Optional[
     Union[Event, SetParam, PaidBreakConfig, DeletePaidBreak]]
 
+NumberedAction = Tuple[int, ParsedActionType]
+"""An action parsed from a job log, with the number of its line"""
+
 
 class Parser:
+    """Parser of the lines of a job log file.
+
+    The common "YYYY-MM-DD HH:MM:SS: text" event lines are recognized by a
+    fast path that checks the fixed positions of the separators directly.
+    All other lines are handled by the regex-based line parsers registered
+    below.
+    """
     line_parsers = LineParserRegistry()
 
     @line_parsers.register(
@@ -101,15 +115,15 @@ class Parser:
         if len(args) == 0:
             raise PaidBreakParseError("No arguments")
 
-        paid_break = PaidBreakConfig(name=args.pop(0))
+        name = args.pop(0)
+        settings: Dict[str, Any] = {}
 
         def set_uniquely(attr, new_value):
-            if getattr(paid_break, attr) is not None:
+            if settings.get(attr) is not None:
                 raise PaidBreakParseError(
                     "Repeated setting of {} (to {} and {})"
-                    .format(attr, repr(getattr(paid_break, attr)),
-                            repr(new_value)))
-            setattr(paid_break, attr, new_value)
+                    .format(attr, repr(settings[attr]), repr(new_value)))
+            settings[attr] = new_value
 
         if len(args) == 0:
             raise PaidBreakParseError("Too little arguments")
@@ -117,7 +131,7 @@ class Parser:
         if args[0] == 'delete':
             if len(args) > 1:
                 raise PaidBreakParseError("Extra arguments")
-            return DeletePaidBreak(paid_break.name)
+            return DeletePaidBreak(name)
 
         for arg in args:
             if arg == 'daily':
@@ -144,14 +158,43 @@ class Parser:
                     raise PaidBreakParseError("Not recognized argument \"{}\""
                                               .format(arg))
 
-        if paid_break.duration is None:
+        if settings.get("duration") is None:
             raise PaidBreakParseError("Missing setting of duration")
-        if paid_break.splittable is None:
+        if settings.get("splittable") is None:
             raise PaidBreakParseError("Missing setting of \"splittable\" or "
                                       "\"one_chunk\"")
-        return paid_break
+        return PaidBreakConfig(name=name, **settings)
 
     def process_line(self, line) -> ParsedActionType:
+        event = self._fast_event_line(line)
+        if event is not None:
+            return event
+        return self._process_line_with_registry(line)
+
+    @staticmethod
+    def _fast_event_line(line) -> Optional[Event]:
+        """Parse an event line with a full "YYYY-MM-DD HH:MM:SS" timestamp.
+
+        Return None if the line doesn't have this exact layout, so that it
+        will be handled by the regex-based line parsers.
+        """
+        if (len(line) < 22 or line[4] != '-' or line[7] != '-' or
+                line[10] != ' ' or line[13] != ':' or line[16] != ':' or
+                line[19] != ':' or line[20] != ' '):
+            return None
+        if line[-1] == '\n':
+            text = line[21:-1]
+        else:
+            text = line[21:]
+        if text == '' or '\n' in text:
+            return None
+        try:
+            timestamp = datetime.datetime.fromisoformat(line[:19])
+        except ValueError:
+            return None
+        return Event(timestamp, text)
+
+    def _process_line_with_registry(self, line) -> ParsedActionType:
         for line_parser in self.line_parsers.line_parsers:
             match = line_parser.match(line)
             if match:
@@ -159,29 +202,173 @@ class Parser:
         raise InvalidLine("Invalid line: {}".format(line))
 
 
-def job_reader(path) -> Generator[ParsedActionType, None, None]:
+_DIGITS_TO_ZERO = bytes.maketrans(b'0123456789', b'0000000000')
+_EVENT_PREFIX = b'0000-00-00 00:00:00: '
+"""The beginning of an event line with all its digits changed to zeros"""
+
+
+class BytesParser:
+    """Parser of the lines of a job log read as bytes.
+
+    The common "YYYY-MM-DD HH:MM:SS: text" event lines are parsed straight
+    from the bytes, and only their task names are decoded, each distinct one
+    just once.  All other lines are decoded and passed to a Parser, so the
+    results are the same as when reading the file in text mode.
+    """
+    def __init__(self, encoding: Optional[str] = None):
+        # The encoding of files opened in text mode by default
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self._parser = Parser()
+        self._names: Dict[bytes, str] = {}
+
+    def process_block(self, block: bytes
+                      ) -> Generator[ParsedActionType, None, None]:
+        """Parse the lines in a block of bytes.  Only the last block of a file
+        may end with an incomplete line."""
+        parser = self._parser
+        if b'\r' in block:
+            # Let the text mode translate all kinds of line endings
+            for text_line in io.TextIOWrapper(io.BytesIO(block),
+                                              self.encoding):
+                result = parser.process_line(text_line)
+                if result is not None:
+                    yield result
+            return
+
+        encoding = self.encoding
+        names = self._names
+        from_string = datetime.datetime.fromisoformat
+        lines = block.split(b'\n')
+        last_line = lines.pop()
+        for line in lines:
+            if (len(line) > 21 and
+                    line[:21].translate(_DIGITS_TO_ZERO) == _EVENT_PREFIX):
+                try:
+                    timestamp = from_string(line[:19].decode('ascii'))
+                except ValueError:
+                    timestamp = None
+                if timestamp is not None:
+                    name = line[21:]
+                    text = names.get(name)
+                    if text is None:
+                        text = names[name] = name.decode(encoding)
+                    yield Event(timestamp, text)
+                    continue
+            result = parser.process_line(line.decode(encoding) + '\n')
+            if result is not None:
+                yield result
+        if last_line:
+            result = parser.process_line(last_line.decode(encoding))
+            if result is not None:
+                yield result
+
+
+READ_BLOCK_SIZE = 1 << 20
+
+
+def read_blocks(f: BinaryIO, size: Optional[int] = None
+                ) -> Generator[bytes, None, None]:
+    """Generate blocks of bytes read from a binary file, of the given size
+    at most, each ending with a complete line, except the last one."""
+    pending = b''
+    while size is None or size > 0:
+        if size is None:
+            data = f.read(READ_BLOCK_SIZE)
+        else:
+            data = f.read(min(READ_BLOCK_SIZE, size))
+            size -= len(data)
+        if not data:
+            break
+        data = pending + data
+        complete_size = data.rfind(b'\n') + 1
+        pending = data[complete_size:]
+        if complete_size > 0:
+            yield data[:complete_size]
+    if pending:
+        yield pending
+
+
+def job_reader(path, offset: int = 0, end: Optional[int] = None
+               ) -> Generator[ParsedActionType, None, None]:
     """
     Generator reading lines from a work log file.
 
     In each iteration the generator returns a (datetime, text) tuple.
+
+    Reading starts at the given byte offset, which must be the beginning of a
+    line, and stops at the end offset, if given, which must be the beginning
+    of a line too.  The file is read in blocks of bytes, parsed by a
+    BytesParser.
     """
     try:
-        with open(path, "r") as f:
-            parser = Parser()
-            for line in f:
-                result = parser.process_line(line)
-                if result is not None:
-                    yield result
+        with open(path, "rb") as binary_file:
+            binary_file.seek(offset)
+            parser = BytesParser()
+            size = None if end is None else end - offset
+            for block in read_blocks(binary_file, size):
+                yield from parser.process_block(block)
     except IOError as err:
         print("Error opening/reading from file '{0}': {1}"
               .format(err.filename, err.strerror))
 
 
+def count_lines(f: BinaryIO, size: int) -> int:
+    """Return the number of line ends in the next "size" bytes of a file."""
+    return sum(block.count(b'\n') for block in read_blocks(f, size))
+
+
+def action_line_number(path, offset: int, index: int,
+                       line_number: Optional[int] = None) -> Optional[int]:
+    """Return the number of the line of an action read by job_reader() from
+    the given offset, with the given index among the actions read, or of the
+    line where reading fails before that action.  The line at the offset has
+    the given number, which is counted if it's None.
+
+    The numbers of the lines aren't tracked while reading the file, which
+    would slow it down, but they are found this way only to report an error.
+    Return None if the line can't be found.
+    """
+    try:
+        with open(path, "rb") as binary_file:
+            if line_number is None:
+                line_number = 1 + count_lines(binary_file, offset)
+            binary_file.seek(offset)
+            parser = Parser()
+            with io.TextIOWrapper(binary_file) as f:
+                for line_number, line in enumerate(f, start=line_number):
+                    try:
+                        action = parser.process_line(line)
+                    except Exception:
+                        return line_number
+                    if action is not None:
+                        if index == 0:
+                            return line_number
+                        index -= 1
+    except (IOError, ValueError):
+        pass
+    return None
+
+
 class JobListWriter:
-    def __init__(self, filename):
+    def __init__(self, filename, status_file_name: Optional[str] = None):
+        """
+        status_file_name - Optional file keeping the status of the last
+            session, which is updated after each appended line.
+        """
         self.filename = filename
-
-    def append(self, date, name):
+        self.status_file_name = status_file_name
+
+    def append(self, date, name, session=None):
+        """Append an event to the log.  The session, if given, must be the last
+        session in the log, with the event already appended, to save its
+        status."""
+        if not self._write_event(date, name):
+            return
+        if self.status_file_name is not None and session is not None:
+            save_status(self.status_file_name, self.filename, session)
+
+    def _write_event(self, date, name) -> bool:
+        """Write the event line to the log.  Return False if it failed."""
         try:
             with open(self.filename, "a") as f:
                 f.write("%d-%02d-%02d %02d:%02d:%02d: %s\n" %
@@ -190,3 +377,5 @@ class JobListWriter:
         except IOError as err:
             print("Error opening/writing to file '{0}': {1}"
                   .format(err.filename, err.strerror))
+            return False
+        return True
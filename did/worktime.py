@@ -17,15 +17,39 @@ You should have received a copy of the GNU General Public License along with
 Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
 Fifth Floor, Boston, MA  02110-1301  USA
 """
-import copy
 import datetime
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, Tuple
 
 
 class UnsupportedBreakConfig(Exception):
     pass
 
 
+def duration_to_data(duration: datetime.timedelta) -> int:
+    """Return the duration as a number of microseconds, to be saved as plain
+    data, e.g. in JSON."""
+    return duration // datetime.timedelta(microseconds=1)
+
+
+def duration_from_data(data) -> datetime.timedelta:
+    """Return the duration saved by duration_to_data().  Raise ValueError if
+    the data is invalid."""
+    if type(data) is not int:
+        raise ValueError("Invalid duration: {!r}".format(data))
+    try:
+        return datetime.timedelta(microseconds=data)
+    except OverflowError:
+        raise ValueError("Invalid duration: {!r}".format(data))
+
+
+def _optional_duration_to_data(duration: Optional[datetime.timedelta]):
+    return None if duration is None else duration_to_data(duration)
+
+
+def _optional_duration_from_data(data) -> Optional[datetime.timedelta]:
+    return None if data is None else duration_from_data(data)
+
+
 class PaidBreakConfig:
     def __init__(self,
                  name: str,
@@ -48,9 +72,11 @@ class PaidBreakConfig:
         :param min_day_total_work_time: Minimum total length of all work time
            in a given day to be able to earn the break in a day.
 
-        None is allowed for "name", "duration" and "splittable" only to simplify
-        parsing, but actually they are required to be non-None, so they must be
-        later set to proper values.
+        None is allowed for "duration" and "splittable" only to simplify
+        parsing, but actually they are required to be non-None.
+
+        The config is shared by Accounting snapshots, so it must not be
+        modified after it's created.
         """
         self.name = name
         self.duration = duration
@@ -59,16 +85,115 @@ class PaidBreakConfig:
         self.earned_after_preceding_work_time = earned_after_preceding_work_time
         self.min_day_total_work_time = min_day_total_work_time
 
+    def _key(self) -> tuple:
+        return (self.name, self.duration, self.max_occurrences_per_day,
+                self.splittable, self.earned_after_preceding_work_time,
+                self.min_day_total_work_time)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PaidBreakConfig):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self):
+        return 'PaidBreakConfig{}'.format(self._key())
+
+    def to_data(self) -> list:
+        """Return the config as plain data, which can be saved e.g. in JSON.
+        """
+        return [self.name,
+                _optional_duration_to_data(self.duration),
+                self.max_occurrences_per_day,
+                self.splittable,
+                _optional_duration_to_data(
+                    self.earned_after_preceding_work_time),
+                _optional_duration_to_data(self.min_day_total_work_time)]
+
+    @classmethod
+    def from_data(cls, data) -> 'PaidBreakConfig':
+        """Return the config saved by to_data().  Raise ValueError if the
+        data is invalid."""
+        if not isinstance(data, list) or len(data) != 6:
+            raise ValueError("Invalid paid break config: {!r}".format(data))
+        name, duration, max_occurrences, splittable, earned, min_day = data
+        if (not isinstance(name, str) or
+                (max_occurrences is not None and
+                 type(max_occurrences) is not int) or
+                splittable not in (None, True, False)):
+            raise ValueError("Invalid paid break config: {!r}".format(data))
+        return cls(name,
+                   _optional_duration_from_data(duration),
+                   max_occurrences,
+                   splittable,
+                   _optional_duration_from_data(earned),
+                   _optional_duration_from_data(min_day))
+
 
 class Accounting:
+    """
+    Immutable snapshot of the accounting configuration.
+
+    All the sessions using the same configuration share one snapshot.  The
+    methods changing the configuration return a new snapshot, which is
+    interned, so that going back to a previously used configuration doesn't
+    create another copy of it.
+    """
+
+    _snapshots: Dict['Accounting', 'Accounting'] = {}
+
     def __init__(self,
                  daily_work_time: datetime.timedelta,
-                 break_configs: List[PaidBreakConfig]):
+                 break_configs: Iterable[PaidBreakConfig]):
         self.daily_work_time = daily_work_time
-        self.break_configs = break_configs
+        self.break_configs: Tuple[PaidBreakConfig, ...] = tuple(break_configs)
+        self._hash = hash((self.daily_work_time, self.break_configs))
 
-    def clone(self):
-        return copy.deepcopy(self)
+    @classmethod
+    def interned(cls,
+                 daily_work_time: datetime.timedelta,
+                 break_configs: Iterable[PaidBreakConfig]) -> 'Accounting':
+        """Return the shared snapshot with the given configuration."""
+        accounting = cls(daily_work_time, break_configs)
+        return cls._snapshots.setdefault(accounting, accounting)
+
+    def __reduce__(self):
+        return Accounting.interned, (self.daily_work_time, self.break_configs)
+
+    def to_data(self) -> list:
+        """Return the configuration as plain data, which can be saved e.g. in
+        JSON."""
+        return [duration_to_data(self.daily_work_time),
+                [break_config.to_data()
+                 for break_config in self.break_configs]]
+
+    @classmethod
+    def from_data(cls, data) -> 'Accounting':
+        """Return the shared snapshot with the configuration saved by
+        to_data().  Raise ValueError if the data is invalid."""
+        if (not isinstance(data, list) or len(data) != 2 or
+                not isinstance(data[1], list)):
+            raise ValueError("Invalid accounting: {!r}".format(data))
+        return cls.interned(duration_from_data(data[0]),
+                            [PaidBreakConfig.from_data(break_data)
+                             for break_data in data[1]])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Accounting):
+            return NotImplemented
+        return (self is other or
+                (self._hash == other._hash and
+                 self.daily_work_time == other.daily_work_time and
+                 self.break_configs == other.break_configs))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self):
+        return 'Accounting(daily_work_time={!r}, break_configs={!r})'.format(
+            self.daily_work_time, list(self.break_configs))
 
     def _find_break(self, name: str) -> Optional[int]:
         for index, break_config in enumerate(self.break_configs):
@@ -76,18 +201,26 @@ class Accounting:
                 return index
         return None
 
-    def delete_break(self, name: str):
+    def with_daily_work_time(self, daily_work_time: datetime.timedelta
+                             ) -> 'Accounting':
+        return Accounting.interned(daily_work_time, self.break_configs)
+
+    def without_break(self, name: str) -> 'Accounting':
         index = self._find_break(name)
         if index is None:
             raise ValueError("Break \"{}\" doesn't exist".format(name))
-        del self.break_configs[index]
+        return Accounting.interned(
+            self.daily_work_time,
+            self.break_configs[:index] + self.break_configs[index + 1:])
 
-    def set_break(self, break_config: PaidBreakConfig):
+    def with_break(self, break_config: PaidBreakConfig) -> 'Accounting':
         index = self._find_break(break_config.name)
         if index is None:
-            self.break_configs.append(break_config)
+            break_configs = self.break_configs + (break_config,)
         else:
-            self.break_configs[index] = break_config
+            break_configs = (self.break_configs[:index] + (break_config,) +
+                             self.break_configs[index + 1:])
+        return Accounting.interned(self.daily_work_time, break_configs)
 
 
 class Preset:
@@ -100,7 +233,7 @@ class Preset:
 PRESETS = {preset.name: preset for preset in [
     Preset('default',
            "8 hours work per day, no paid breaks",
-           Accounting(
+           Accounting.interned(
                daily_work_time=datetime.timedelta(hours=8),
                break_configs=[])
            ),
@@ -114,7 +247,7 @@ PRESETS = {preset.name: preset for preset in [
                minutes.
              * One 15 minutes break per day ("breakfast break"), if the day
                has at least 6 work hours.""",
-           Accounting(
+           Accounting.interned(
                daily_work_time=datetime.timedelta(hours=8),
                break_configs=[
                    PaidBreakConfig(
@@ -137,7 +270,7 @@ PRESETS = {preset.name: preset for preset in [
 
 
 def make_preset_accounting(name: str) -> Accounting:
-    return PRESETS[name].accounting.clone()
+    return PRESETS[name].accounting
 
 
 class WorkSessionStats(object):
@@ -147,11 +280,14 @@ class WorkSessionStats(object):
 
     The "adjusted duration" of breaks is decreased to exclude the time that
     is treated as work time.  In return, the "adjusted duration" of work jobs
-    is extended proportionally for all work tasks in a session.
+    is extended proportionally for all work tasks in a session.  The adjusting
+    is skipped if "adjust_intervals" is False, which is enough to get the
+    totals.
     """
 
-    def __init__(self, session):
+    def __init__(self, session, adjust_intervals: bool = True):
         self._session = session
+        self._adjust_intervals = adjust_intervals
         self.daily_break = None  # type: Optional[PaidBreakConfig]
         self.computer_break = None  # type: Optional[PaidBreakConfig]
         self._time_worked = datetime.timedelta(0)
@@ -162,7 +298,7 @@ class WorkSessionStats(object):
 
         self._assign_breaks(self._session.accounting().break_configs)
         if self.daily_break is not None and self._session.is_workday():
-            self.usable_daily_break_seconds = (
+            self.usable_daily_break_seconds: float = (
                     self.daily_break.duration.total_seconds() *
                     self.daily_break.max_occurrences_per_day)
         else:
@@ -170,6 +306,10 @@ class WorkSessionStats(object):
 
         real_work_seconds = 0
 
+        if adjust_intervals:
+            for interval in self._session.intervals():
+                interval.reset_accounted_duration()
+
         for interval in self._session.intervals():
             if interval.is_break:
                 self._analyze_break(interval)
@@ -178,6 +318,9 @@ class WorkSessionStats(object):
                 self._analyze_work(duration.total_seconds())
                 real_work_seconds += duration.total_seconds()
 
+        if not adjust_intervals:
+            return
+
         for interval in self._session.intervals():
             if not interval.is_break:
                 interval.account_break_duration(
@@ -225,7 +368,8 @@ class WorkSessionStats(object):
             used_computer_break_seconds = min(self._legal_break_seconds(),
                                               duration_seconds)
             duration_seconds -= used_computer_break_seconds
-            interval.account_work_duration(used_computer_break_seconds)
+            if self._adjust_intervals:
+                interval.account_work_duration(used_computer_break_seconds)
             self.add_work_seconds(used_computer_break_seconds)
             self.break_seconds_counted_as_work += used_computer_break_seconds
             self.recent_work_seconds -= (
@@ -236,7 +380,8 @@ class WorkSessionStats(object):
                                            duration_seconds)
             self.usable_daily_break_seconds -= used_daily_break_seconds
             duration_seconds -= used_daily_break_seconds
-            interval.account_work_duration(used_daily_break_seconds)
+            if self._adjust_intervals:
+                interval.account_work_duration(used_daily_break_seconds)
             self.add_work_seconds(used_daily_break_seconds)
             self.break_seconds_counted_as_work += used_daily_break_seconds
 
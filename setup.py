@@ -9,6 +9,6 @@ setup(
    packages=['did'],
    install_requires=['pytest', 'pytimeparse'],
    entry_points={
-        'console_scripts': ['did=did.did:main'],
+        'console_scripts': ['did=did.__main__:main'],
    },
 )
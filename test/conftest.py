@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.fixture
+def make_log(tmp_path):
+    """Return a function writing a job log with the given contents to a
+    temporary directory, and returning its path."""
+    def write(contents, name='job_log'):
+        path = tmp_path / name
+        with open(path, 'w', newline='') as log_file:
+            log_file.write(contents)
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def log_path(request, make_log):
+    """Path of a job log with the LOG_CONTENTS of the test module"""
+    return make_log(request.module.LOG_CONTENTS)
@@ -0,0 +1,166 @@
+import json
+import os
+import pickle
+from datetime import date
+
+import pytest
+
+from did.checkpoints import INDEX_SUFFIX, CheckpointIndex, arrive_line_offsets
+from did.worklog import WorkLog
+
+LOG_CONTENTS = ("config daily_work_time = 6h\n"
+                "2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 17:00:00: foo\n"
+                "2019-02-21 09:00:00: arrive\n"
+                "2019-02-21 12:00:00: foo\n"
+                "config daily_work_time = 4h\n"
+                "2019-02-23 09:00:00: arrive ooo\n"
+                "2019-02-23 10:00:00: bar\n"
+                "2019-02-25 09:00:00: arrive\n"
+                "2019-02-25 14:00:00: foo\n")
+
+
+def load_full(log_path):
+    worklog = WorkLog(log_path)
+    worklog.compute_stats()
+    return worklog
+
+
+def build_index(log_path):
+    index = CheckpointIndex(log_path + INDEX_SUFFIX)
+    index.load(log_path)
+    index.update(log_path, load_full(log_path))
+    index = CheckpointIndex(log_path + INDEX_SUFFIX)
+    assert index.load(log_path)
+    return index
+
+
+def test_arrive_line_offsets():
+    data = LOG_CONTENTS.encode()
+    assert arrive_line_offsets(data) == [
+        data.index(b"2019-02-20 09"), data.index(b"2019-02-21 09"),
+        data.index(b"2019-02-23 09"), data.index(b"2019-02-25 09")]
+
+
+@pytest.mark.parametrize(
+    "first_day,expected_start_day",
+    [(date(2019, 2, 19), None),
+     (date(2019, 2, 20), None),
+     (date(2019, 2, 21), date(2019, 2, 21)),
+     (date(2019, 2, 22), date(2019, 2, 23)),
+     (date(2019, 2, 25), date(2019, 2, 25)),
+     (date(2019, 3, 1), date(2019, 2, 25)),
+     ])
+def test_loading_from_checkpoint(log_path, first_day, expected_start_day):
+    index = build_index(log_path)
+    checkpoint = index.checkpoint_for(first_day)
+    if expected_start_day is None:
+        assert checkpoint is None
+        return
+    assert checkpoint.date == expected_start_day
+
+    full = load_full(log_path)
+    partial = WorkLog(log_path, checkpoint=checkpoint)
+    partial.compute_stats()
+    skipped = len(full.sessions()) - len(partial.sessions())
+    assert partial.sessions() == full.sessions()[skipped:]
+    for partial_session, session in zip(partial.sessions(),
+                                        full.sessions()[skipped:]):
+        assert partial_session.total_overtime() == session.total_overtime()
+        assert (partial_session.accounting().daily_work_time ==
+                session.accounting().daily_work_time)
+
+
+def test_index_is_extended_after_append(log_path):
+    index = build_index(log_path)
+    with open(log_path, 'a') as log_file:
+        log_file.write("2019-02-26 09:00:00: arrive\n"
+                       "2019-02-26 15:00:00: foo\n")
+    assert index.load(log_path)
+    checkpoint = index.checkpoint_for(date(2019, 2, 25))
+    worklog = WorkLog(log_path, checkpoint=checkpoint)
+    worklog.compute_stats()
+    index.update(log_path, worklog)
+
+    index = CheckpointIndex(log_path + INDEX_SUFFIX)
+    assert index.load(log_path)
+    assert len(index.checkpoints) == 5
+    assert index.checkpoints[-1].date == date(2019, 2, 26)
+    assert (index.checkpoints[-1].total_overtime ==
+            load_full(log_path).sessions()[-1].total_overtime() -
+            load_full(log_path).sessions()[-1].stats().overhours())
+
+
+def test_index_is_invalid_after_modification(log_path):
+    build_index(log_path)
+    with open(log_path, 'w') as log_file:
+        log_file.write(LOG_CONTENTS.replace("17:00:00", "16:00:00"))
+    assert not CheckpointIndex(log_path + INDEX_SUFFIX).load(log_path)
+
+
+@pytest.mark.parametrize("appended_line", [
+    "invalid line\n", "2019-02-25 13:00:00: earlier\n"])
+@pytest.mark.parametrize("first_day", [None, date(2019, 2, 21),
+                                       date(2019, 2, 25)])
+def test_error_line_number_after_checkpoint(log_path, capsys, appended_line,
+                                            first_day):
+    index = build_index(log_path)
+    with open(log_path, 'a') as log_file:
+        log_file.write("\n# a comment\n2019-02-25 15:00:00: bar\n" +
+                       appended_line)
+    checkpoint = None if first_day is None else index.checkpoint_for(first_day)
+    with pytest.raises(Exception):
+        WorkLog(log_path, checkpoint=checkpoint)
+    # The line numbers are counted from the beginning of the file
+    assert capsys.readouterr().out.endswith(", line 14:\n")
+
+
+class _CreateFile:
+    """Object which creates a file when it's unpickled"""
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return open, (self.path, 'w')
+
+
+def test_pickled_index_is_not_unpickled(log_path):
+    marker_path = log_path + ".unpickled"
+    with open(log_path + INDEX_SUFFIX, 'wb') as index_file:
+        pickle.dump(_CreateFile(marker_path), index_file)
+    assert not CheckpointIndex(log_path + INDEX_SUFFIX).load(log_path)
+    assert not os.path.exists(marker_path)
+
+
+def test_index_round_trip(log_path):
+    index = build_index(log_path)
+    full = load_full(log_path)
+    assert ([checkpoint.accounting for checkpoint in index.checkpoints] ==
+            [session.accounting() for session in full.sessions()])
+    assert ([checkpoint.offset for checkpoint in index.checkpoints] ==
+            [LOG_CONTENTS.index("2019-02-{}".format(day))
+             for day in (20, 21, 23, 25)])
+    assert ([checkpoint.line_number for checkpoint in index.checkpoints] ==
+            [2, 4, 7, 9])
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda contents: contents.update(version=1),
+    lambda contents: contents.update(prefix=[0, "", [1]]),
+    lambda contents: contents["checkpoints"][1].__setitem__(0, "1"),
+    lambda contents: contents["checkpoints"][1].__setitem__(1, 1),
+    lambda contents: contents["checkpoints"][1].__setitem__(2, "Feb 21"),
+    lambda contents: contents["checkpoints"][1].__setitem__(3, 1.5),
+    lambda contents: contents["checkpoints"][1].__setitem__(4, 9),
+    lambda contents: contents["checkpoints"].reverse(),
+    lambda contents: contents["accountings"][0].__setitem__(0, None),
+    lambda contents: contents["accountings"][0][1].append(["x"]),
+])
+def test_invalid_index_is_ignored(log_path, corrupt):
+    build_index(log_path)
+    with open(log_path + INDEX_SUFFIX) as index_file:
+        contents = json.load(index_file)
+    corrupt(contents)
+    with open(log_path + INDEX_SUFFIX, 'w') as index_file:
+        json.dump(contents, index_file)
+    assert not CheckpointIndex(log_path + INDEX_SUFFIX).load(log_path)
@@ -1,3 +1,4 @@
+import json
 import tempfile
 from contextlib import ExitStack as does_not_raise
 from datetime import datetime
@@ -7,7 +8,7 @@ from typing import List, Tuple, Union, Iterable
 import pytest
 
 from did import did, day_range
-from did.worklog import FirstJobNotArriveError
+from did.worklog import FirstJobNotArriveError, MultipleSessionsInOneDayError
 
 
 def run_did(job_log_file_path: Path,
@@ -106,3 +107,123 @@ def test_range_report_negative_days():
         # This used to cause exit(2) with the following message:
         # "error: argument -r/--range: expected one argument"
         run_did(job_log_file_path, ["-r", "-30.."], "2019-02-16 08:50:00")
+
+
+@pytest.mark.parametrize("args", [["-r", "2019-02-16"],
+                                  ["-r", "2019-02-16.."],
+                                  ["-d", "-r", "-1"],
+                                  ["-a", "-r", "w-0"]])
+def test_report_from_checkpoint_matches_full_report(capsys, args):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        job_log_file_path = Path(temp_dir, 'job_log')
+        for time_str, task in [("2019-02-15 09:00:00", "arrive"),
+                               ("2019-02-15 18:00:00", "foo"),
+                               ("2019-02-16 09:00:00", "arrive"),
+                               ("2019-02-16 12:00:00", "bar"),
+                               ("2019-02-16 12:30:00", ".lunch"),
+                               ("2019-02-16 15:00:00", "foo")]:
+            run_did(job_log_file_path, [task], time_str)
+        capsys.readouterr()
+
+        run_did(job_log_file_path, ["--no-cache", *args], "2019-02-16 16:00:00")
+        expected = capsys.readouterr().out
+        run_did(job_log_file_path, args, "2019-02-16 16:00:00")
+        assert capsys.readouterr().out == expected
+        assert Path(temp_dir, 'job_log.didindex').exists()
+
+
+def test_streamed_report_does_not_use_cache(capsys):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        job_log_file_path = Path(temp_dir, 'job_log')
+        with open(job_log_file_path, 'w') as job_log_file:
+            job_log_file.write("2019-02-15 09:00:00: arrive\n"
+                               "2019-02-15 10:00:00: foo\n")
+        run_did(job_log_file_path, ["-a", "-r", ".."], "2019-02-16 10:00:00")
+        assert "foo" in capsys.readouterr().out
+        assert not Path(temp_dir, 'job_log.didcache').exists()
+
+
+def test_quiet_append(capsys):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        job_log_file_path = Path(temp_dir, 'job_log')
+        run_did(job_log_file_path, ["-q", "arrive"], "2019-02-15 09:00:00")
+        run_did(job_log_file_path, ["-q", "foo"], "2019-02-15 10:00:00")
+        assert capsys.readouterr().out == ""
+        with open(job_log_file_path) as job_log_file:
+            assert job_log_file.read() == ("2019-02-15 09:00:00: arrive\n"
+                                           "2019-02-15 10:00:00: foo\n")
+
+
+def test_shortcuts_use_earlier_sessions():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        job_log_file_path = Path(temp_dir, 'job_log')
+        for time_str, task in [("2019-02-15 09:00:00", "arrive"),
+                               ("2019-02-15 12:00:00", ".lunch"),
+                               ("2019-02-15 18:00:00", "foo"),
+                               ("2019-02-16 09:00:00", "arrive"),
+                               ("2019-02-16 10:00:00", "."),
+                               ("2019-02-17 09:00:00", "arrive ooo"),
+                               ("2019-02-17 10:00:00", ",")]:
+            run_did(job_log_file_path, ["-q", task], time_str)
+        with open(job_log_file_path) as job_log_file:
+            lines = job_log_file.readlines()
+        assert lines[4] == "2019-02-16 10:00:00: .lunch\n"
+        assert lines[6] == "2019-02-17 10:00:00: foo\n"
+
+
+def test_invalid_event_is_not_appended():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        job_log_file_path = Path(temp_dir, 'job_log')
+        run_did(job_log_file_path, ["-q", "arrive"], "2019-02-15 09:00:00")
+        with pytest.raises(MultipleSessionsInOneDayError):
+            run_did(job_log_file_path, ["-q", "arrive"], "2019-02-15 10:00:00")
+        with open(job_log_file_path) as job_log_file:
+            assert job_log_file.read() == "2019-02-15 09:00:00: arrive\n"
+
+
+def test_json_lines_format(capsys):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        job_log_file_path = Path(temp_dir, 'job_log')
+        with open(job_log_file_path, 'w') as job_log_file:
+            job_log_file.write("2019-02-20 09:00:00: arrive\n"
+                               "2019-02-20 10:00:00: foo\n")
+        run_did(job_log_file_path, ['--format=jsonl', '-a', '-r', '..'],
+                '2019-02-21 10:00:00')
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == ('{"type": "aggregate", "name": "foo", '
+                            '"depth": 0, "is_break": false, '
+                            '"is_assumed": false, "duration": 3600}')
+        assert lines[-1].startswith('{"type": "totals"')
+
+
+def aggregated_durations(report):
+    records = [json.loads(line) for line in report.splitlines()]
+    return {record['name']: record['duration'] for record in records
+            if record['type'] == 'aggregate' and record['depth'] == 0}
+
+
+def test_report_of_several_log_files(capsys):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, task in [('ann', 'foo'), ('bob', 'bar'), ('cid', 'foo')]:
+            with open(Path(temp_dir, name + '.log'), 'w') as job_log_file:
+                job_log_file.write("2019-02-20 09:00:00: arrive\n"
+                                   "2019-02-20 10:00:00: {}\n".format(task))
+        run_did(Path(temp_dir, 'ann.log'),
+                ['-f', str(Path(temp_dir, 'bob.log')),
+                 '--format=jsonl', '-ar', '-1'],
+                '2019-02-21 08:00:00')
+        assert aggregated_durations(capsys.readouterr().out) == {
+            'foo': 3600, 'bar': 3600}
+        run_did(Path(temp_dir, '*.log'), ['--format=jsonl', '-ar', '-1'],
+                '2019-02-21 08:00:00')
+        assert aggregated_durations(capsys.readouterr().out) == {
+            'foo': 7200, 'bar': 3600}
+
+
+@pytest.mark.parametrize("args", [[], ["-a", "foo"], ["-a", "--status"]])
+def test_several_log_files_only_in_aggregated_report(args):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name in ['ann.log', 'bob.log']:
+            Path(temp_dir, name).touch()
+        with pytest.raises(SystemExit):
+            run_did(Path(temp_dir, '*.log'), args)
@@ -0,0 +1,148 @@
+import io
+import os
+import socket
+import threading
+from datetime import datetime
+
+import pytest
+
+from did import daemon as daemon_module, did
+from did.daemon import DaemonRunningError, DidDaemon, query_daemon, \
+    report_log_file_name
+from did.worklog import WorkLog
+
+LOG_CONTENTS = ("2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 17:00:00: foo bar\n"
+                "2019-02-21 09:00:00: arrive\n"
+                "2019-02-21 12:00:00: foo baz\n")
+
+
+@pytest.fixture
+def daemon(log_path):
+    app = did.DidApplication(['-f', log_path, '-r', '2019-02-21'])
+    app.parse_options()
+
+    def load():
+        app.load_worklog(None)
+        return app.worklog
+
+    daemon = DidDaemon(log_path, load)
+    daemon.bind()
+    yield daemon
+    daemon.close()
+
+
+def query(daemon, args):
+    """Return what the daemon answers, or None"""
+    thread = threading.Thread(target=daemon.handle_request)
+    thread.start()
+    out = io.BytesIO()
+    answered = query_daemon(['-f', daemon.log_file_name, *args], out)
+    thread.join()
+    return out.getvalue().decode() if answered else None
+
+
+def local_report(path, args, capsys):
+    did.main(cmdline_args=['-f', path, '--no-cache', *args],
+             now=datetime.now())
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "args,expected_log_file_name",
+    [(['-f', 'log'], 'log'),
+     (['--log-file=log', '-a', '-r', '..', '-g', 'foo'], 'log'),
+     (['-f', 'log', '-ap', '--format', 'csv', '--color=never'], 'log'),
+     (['-f', 'log', 'foo'], None),
+     (['-f', 'log', '-e'], None),
+     (['-f', 'log', '--status'], None),
+     (['-f', 'log', '-r'], None),
+     (['-f', 'log', '-f', 'other', '-a'], None),
+     (['-f', 'logs/*', '-a'], None),
+     (['-f', 'log', '--no-cache'], None),
+     ])
+def test_report_log_file_name(args, expected_log_file_name):
+    assert report_log_file_name(args) == expected_log_file_name
+
+
+@pytest.mark.parametrize(
+    "args",
+    [['-r', '..'], ['-a', '-r', '..'], ['-d', '-p', '-r', '2019-02'],
+     ['-g', 'baz', '-r', '2019-02-21'], ['--format=jsonl', '-r', '..']])
+def test_report_is_the_same_as_local(daemon, args, capsys):
+    assert query(daemon, args) == local_report(daemon.log_file_name, args,
+                                               capsys)
+
+
+def test_appended_lines_are_reported(daemon):
+    assert "qux" not in query(daemon, ['-r', '..'])
+    with open(daemon.log_file_name, 'a') as log_file:
+        log_file.write("2019-02-21 13:00:00: qux\n")
+    assert "qux" in query(daemon, ['-r', '..'])
+    assert daemon._watcher.reload_count == 1
+
+
+def test_past_reports_are_kept(daemon):
+    report = query(daemon, ['-r', '2019-02-20'])
+    assert query(daemon, ['-r', '2019-02-20']) == report
+    assert len(daemon._reports) == 1
+    query(daemon, ['-r', '..'])
+    assert len(daemon._reports) == 1
+
+
+def test_invalid_query_is_not_answered(daemon):
+    assert query(daemon, ['--format=xml']) is None
+
+
+def test_report_of_other_log_is_not_answered(daemon):
+    other = os.path.join(os.path.dirname(daemon.log_file_name), 'other')
+    with open(other, 'w') as log_file:
+        log_file.write(LOG_CONTENTS)
+    assert daemon.report(False, ['-f', other, '-a', '-r', '..']) is None
+    assert daemon.report(False, ['-f', daemon.log_file_name, '-r', '..'])
+
+
+def test_busy_daemon_is_not_waited_for(daemon, monkeypatch):
+    monkeypatch.setattr(daemon_module, 'QUERY_TIMEOUT', 0.1)
+    out = io.BytesIO()
+    # The daemon doesn't accept the connection
+    assert not query_daemon(['-f', daemon.log_file_name], out)
+    assert out.getvalue() == b''
+
+
+def test_silent_client_is_dropped(daemon, monkeypatch, capsys):
+    monkeypatch.setattr(daemon_module, 'QUERY_TIMEOUT', 0.1)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(daemon.socket_name)
+        thread = threading.Thread(target=daemon.handle_request)
+        thread.start()
+        # The client never sends its query
+        thread.join(5)
+        assert not thread.is_alive()
+        assert client.recv(1) == b''
+    args = ['-r', '2019-02-21']
+    assert query(daemon, args) == local_report(daemon.log_file_name, args,
+                                               capsys)
+
+
+def test_second_daemon_is_refused(daemon):
+    with pytest.raises(DaemonRunningError):
+        DidDaemon(daemon.log_file_name,
+                  lambda: WorkLog(daemon.log_file_name)).bind()
+
+
+def test_no_daemon(tmp_path):
+    assert not query_daemon(['-f', str(tmp_path / 'job_log')], io.BytesIO())
+
+
+def test_aggregate_of_appended_sessions(daemon, capsys):
+    args = ['-a', '-r', '..']
+    for lines in ["", "2019-02-21 13:00:00: foo bar\n",
+                  "2019-02-22 09:00:00: arrive\n2019-02-22 10:00:00: qux\n",
+                  "2019-02-22 11:00:00: foo baz\n"]:
+        with open(daemon.log_file_name, 'a') as log_file:
+            log_file.write(lines)
+        assert query(daemon, args) == local_report(daemon.log_file_name,
+                                                   args, capsys)
+    assert daemon._watcher.reload_count == 1
+    assert len(daemon._aggregates) == 1
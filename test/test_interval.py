@@ -2,7 +2,7 @@ from datetime import datetime
 
 import pytest
 
-from did.interval import Interval
+from did.interval import Interval, TaskName, TaskNameTable
 
 
 @pytest.mark.parametrize(
@@ -39,3 +39,26 @@ from did.interval import Interval
 )
 def test_interval_equals(interval1, interval2, expectation):
     assert expectation == (interval1 == interval2)
+
+
+def test_task_names_are_interned():
+    table = TaskNameTable()
+    foo = table.intern("coding  foo")
+    assert table.intern("coding  foo") is foo
+    assert foo.words == ("coding", "foo")
+    assert not foo.is_break
+    assert table.intern(".lunch").is_break
+    assert len(table) == 2
+
+
+def test_interval_with_task_name():
+    task_name = TaskName("walk **")
+    interval = Interval(start=datetime(2019, 2, 17, 9, 7, 23),
+                        end=datetime(2019, 2, 17, 10, 20, 55),
+                        name=task_name)
+    assert interval.task_name is task_name
+    assert interval.name == "walk **"
+    assert interval.is_break
+    assert interval == Interval(start=datetime(2019, 2, 17, 9, 7, 23),
+                                end=datetime(2019, 2, 17, 10, 20, 55),
+                                name="walk **")
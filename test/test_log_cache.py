@@ -0,0 +1,163 @@
+import json
+import os
+import pickle
+from datetime import datetime
+
+import pytest
+
+from did.log_cache import CACHE_SUFFIX, ParsedLogCache, cached_job_reader
+from did.worklog import WorkLog
+from did.worklog_file import Event, job_reader
+
+LOG_CONTENTS = ("config daily_work_time = 6h\n"
+                "2019-02-20 09:02:03: arrive\n"
+                "# a comment\n"
+                "2019-02-20 10:00:00: foo\n"
+                "2019-02-20 10:20:55: .bar\n")
+
+
+def read_actions(log_path):
+    return [vars(action)
+            for action in cached_job_reader(log_path, log_path + CACHE_SUFFIX)]
+
+
+def plain_actions(log_path):
+    return [vars(action) for action in job_reader(log_path)]
+
+
+def cached_prefix_size(log_path):
+    cache = ParsedLogCache(log_path + CACHE_SUFFIX)
+    cache.load()
+    return cache.prefix.size
+
+
+def append(log_path, text):
+    with open(log_path, 'a') as log_file:
+        log_file.write(text)
+
+
+def test_cache_is_created(log_path):
+    assert read_actions(log_path) == plain_actions(log_path)
+    assert cached_prefix_size(log_path) == len(LOG_CONTENTS)
+    assert read_actions(log_path) == plain_actions(log_path)
+
+
+def test_appended_lines_are_read(log_path):
+    read_actions(log_path)
+    append(log_path, "2019-02-20 11:00:00: baz\n")
+    actions = read_actions(log_path)
+    assert actions == plain_actions(log_path)
+    assert actions[-1] == vars(Event(datetime(2019, 2, 20, 11), "baz"))
+    assert cached_prefix_size(log_path) == os.path.getsize(log_path)
+
+
+def test_incomplete_last_line_is_not_cached(log_path):
+    read_actions(log_path)
+    append(log_path, "2019-02-20 11:00:00: ba")
+    assert read_actions(log_path)[-1]['text'] == "ba"
+    assert cached_prefix_size(log_path) == len(LOG_CONTENTS)
+    append(log_path, "z\n")
+    assert read_actions(log_path)[-1]['text'] == "baz"
+
+
+def test_modified_prefix_is_parsed_again(log_path):
+    read_actions(log_path)
+    with open(log_path, 'w') as log_file:
+        log_file.write(LOG_CONTENTS.replace("foo", "qux") +
+                       "2019-02-20 11:00:00: baz\n")
+    actions = read_actions(log_path)
+    assert actions == plain_actions(log_path)
+    assert actions[2]['text'] == "qux"
+
+
+def test_cache_chunks_are_compacted(log_path):
+    read_actions(log_path)
+    for second in range(ParsedLogCache.MAX_CHUNKS + 2):
+        append(log_path, "2019-02-20 11:{:02}:{:02}: baz\n"
+               .format(*divmod(second, 60)))
+        assert read_actions(log_path) == plain_actions(log_path)
+    cache = ParsedLogCache(log_path + CACHE_SUFFIX)
+    cache.load()
+    assert cache._chunk_count < ParsedLogCache.MAX_CHUNKS
+    assert cache.prefix.size == os.path.getsize(log_path)
+
+
+def test_truncated_cache_chunk_is_ignored(log_path):
+    read_actions(log_path)
+    append(log_path, "2019-02-20 11:00:00: baz\n")
+    read_actions(log_path)
+    with open(log_path + CACHE_SUFFIX, 'r+b') as cache_file:
+        cache_file.truncate(os.path.getsize(log_path + CACHE_SUFFIX) - 5)
+    assert cached_prefix_size(log_path) == len(LOG_CONTENTS)
+    append(log_path, "2019-02-20 11:30:00: qux\n")
+    assert read_actions(log_path) == plain_actions(log_path)
+    assert cached_prefix_size(log_path) == os.path.getsize(log_path)
+
+
+def test_corrupted_cache_is_ignored(log_path):
+    with open(log_path + CACHE_SUFFIX, 'wb') as cache_file:
+        cache_file.write(b"garbage")
+    assert read_actions(log_path) == plain_actions(log_path)
+    assert cached_prefix_size(log_path) == len(LOG_CONTENTS)
+
+
+def test_work_log_with_cache(log_path):
+    expected = WorkLog(log_path).sessions()
+    cache_file_name = log_path + CACHE_SUFFIX
+    assert WorkLog(log_path, cache_file_name).sessions() == expected
+    assert os.path.exists(cache_file_name)
+    assert WorkLog(log_path, cache_file_name).sessions() == expected
+
+
+def test_config_actions_are_cached(log_path):
+    append(log_path, "config paid_break \"lunch\" 15m daily splittable\n"
+                     "config paid_break \"breakfast\" delete\n")
+    read_actions(log_path)
+    assert cached_prefix_size(log_path) == os.path.getsize(log_path)
+    assert read_actions(log_path) == plain_actions(log_path)
+
+
+class _CreateFile:
+    """Object which creates a file when it's unpickled"""
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return open, (self.path, 'w')
+
+
+def test_pickled_cache_is_not_unpickled(log_path):
+    marker_path = log_path + ".unpickled"
+    with open(log_path + CACHE_SUFFIX, 'wb') as cache_file:
+        pickle.dump(_CreateFile(marker_path), cache_file)
+    assert read_actions(log_path) == plain_actions(log_path)
+    assert not os.path.exists(marker_path)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda chunk: chunk.update(version=1),
+    lambda chunk: chunk.update(start=1),
+    lambda chunk: chunk.update(prefix=None),
+    lambda chunk: chunk.update(timestamps=chunk['timestamps'][1:]),
+    lambda chunk: chunk.update(timestamps=chunk['timestamps'].replace(
+        "2019-02-20 10", "2019-02-20 99")),
+    lambda chunk: chunk['name_ids'].__setitem__(0, 9),
+    lambda chunk: chunk['name_ids'].__setitem__(0, -1),
+    lambda chunk: chunk['names'].__setitem__(0, 1),
+    lambda chunk: chunk['others'].reverse(),
+    lambda chunk: chunk['others'][0].__setitem__(1, {'set': ["x"]}),
+    lambda chunk: chunk['others'][1].__setitem__(1, {'break': ["x"]}),
+    lambda chunk: chunk['others'][2].__setitem__(1, {'eval': "x"}),
+])
+def test_invalid_cache_chunk_is_ignored(log_path, corrupt):
+    append(log_path, "config paid_break \"lunch\" 15m daily splittable\n"
+                     "config paid_break \"breakfast\" delete\n")
+    read_actions(log_path)
+    with open(log_path + CACHE_SUFFIX) as cache_file:
+        chunk = json.loads(cache_file.read())
+    corrupt(chunk)
+    with open(log_path + CACHE_SUFFIX, 'w') as cache_file:
+        cache_file.write(json.dumps(chunk) + "\n")
+    assert cached_prefix_size(log_path) == 0
+    assert read_actions(log_path) == plain_actions(log_path)
+    assert cached_prefix_size(log_path) == os.path.getsize(log_path)
@@ -0,0 +1,89 @@
+import os
+from datetime import date, datetime
+
+import pytest
+
+from did import did, worklog_file
+from did.checkpoints import INDEX_SUFFIX
+from did.day_range import DayRange
+from did.log_seek import seek_checkpoint, seek_date, seek_session_start
+from did.worklog import WorkLog
+
+LOG_CONTENTS = ("# A job log\n"
+                "config daily_work_time = 6h\n"
+                "2019-02-18 09:00:00: arrive\n"
+                "2019-02-18 17:00:00: coding foo\n"
+                "config paid_break breakfast delete\n"
+                "config paid_break lunch 20m splittable daily\n"
+                "2019-02-19 20:00:00: arrive ooo\n"
+                "2019-02-20 01:00:00: support\n"
+                "# a comment\n"
+                "2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 12:00:00: coding bar\n"
+                "2019-02-20 12:30:00: .lunch\n"
+                "2019-02-20 16:00:00: coding foo\n"
+                "config daily_work_time = 4h\n"
+                "2019-02-23 10:00: arrive\n"
+                "2019-02-23 11:00: review foo\n"
+                "2019-02-25 08:00:00: arrive\n"
+                "2019-02-25 13:00:00: coding bar\n")
+
+
+def seek(function, log_path, day):
+    with open(log_path, 'rb') as log_file:
+        return function(log_file, os.path.getsize(log_path), day)
+
+
+@pytest.mark.parametrize("day,line", [(date(2019, 2, 1), "2019-02-18 09"),
+                                      (date(2019, 2, 18), "2019-02-18 09"),
+                                      (date(2019, 2, 20), "2019-02-20 01"),
+                                      (date(2019, 2, 21), "2019-02-23 10"),
+                                      (date(2019, 2, 25), "2019-02-25 08"),
+                                      (date(2019, 3, 1), None)])
+def test_seek_date(log_path, day, line):
+    expected = len(LOG_CONTENTS) if line is None else LOG_CONTENTS.index(line)
+    assert seek(seek_date, log_path, day) == expected
+
+
+@pytest.mark.parametrize("day,line", [(date(2019, 2, 19), "2019-02-19 20"),
+                                      (date(2019, 2, 20), "2019-02-20 09"),
+                                      (date(2019, 2, 22), "2019-02-23 10"),
+                                      (date(2019, 2, 26), None)])
+def test_seek_session_start(log_path, day, line):
+    expected = None
+    if line is not None:
+        expected = (LOG_CONTENTS.index(line),
+                    date.fromisoformat(line[:len("YYYY-MM-DD")]))
+    assert seek(seek_session_start, log_path, day) == expected
+
+
+@pytest.mark.parametrize("block_size", [16, 1 << 20])
+@pytest.mark.parametrize("day", [date(2019, 2, 19), date(2019, 2, 20),
+                                 date(2019, 2, 23), date(2019, 2, 25)])
+def test_seek_checkpoint_accounting(log_path, monkeypatch, day, block_size):
+    monkeypatch.setattr(worklog_file, 'READ_BLOCK_SIZE', block_size)
+    checkpoint = seek_checkpoint(log_path, day)
+    session = WorkLog(log_path).sessions_in_range(
+        DayRange(day.isoformat()))[0]
+    assert checkpoint.date == session.start.date() == day
+    assert checkpoint.offset == LOG_CONTENTS.index(str(session.start)[:16])
+    assert checkpoint.accounting is session.accounting()
+    offset = checkpoint.offset
+    assert checkpoint.line_number == LOG_CONTENTS[:offset].count("\n") + 1
+
+
+def test_seek_checkpoint_after_last_session(log_path):
+    assert seek_checkpoint(log_path, date(2019, 2, 26)) is None
+
+
+@pytest.mark.parametrize("args", [["-a", "-r", "2019-02-20.."],
+                                  ["-a", "-r", "2019-02-23"],
+                                  ["-a", "-s", "-g", "foo", "-r", "2019-02"],
+                                  ["-a", "-r", "2019-03-01.."]])
+def test_aggregated_report_without_index(log_path, capsys, args):
+    now = datetime(2019, 2, 25, 14)
+    did.main(cmdline_args=['-f', log_path, '--no-cache', *args], now=now)
+    expected = capsys.readouterr().out
+    did.main(cmdline_args=['-f', log_path, *args], now=now)
+    assert capsys.readouterr().out == expected
+    assert not os.path.exists(log_path + INDEX_SUFFIX)
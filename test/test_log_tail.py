@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+import pytest
+
+from did import log_tail
+from did.log_tail import session_starts_backwards, tail_worklog
+from did.worklog import MultipleSessionsInOneDayError, \
+    NonChronologicalOrderError, WorkLog
+
+LOG_CONTENTS = ("config daily_work_time = 6h\n"
+                "2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 12:00:00: .lunch\n"
+                "2019-02-20 17:00:00: foo\n"
+                "2019-02-21 09:00:00: arrive\n"
+                "2019-02-21 12:00:00: foo\n"
+                "2019-02-21 13:00:00: arrive ooo\n"
+                "2019-02-21 14:00:00: bar\n")
+
+
+@pytest.mark.parametrize("block_size", [16, 30, 64 * 1024])
+def test_session_starts_backwards(monkeypatch, log_path, block_size):
+    monkeypatch.setattr(log_tail, '_BLOCK_SIZE', block_size)
+    data = LOG_CONTENTS.encode()
+    with open(log_path, 'rb') as log_file:
+        starts = list(session_starts_backwards(log_file, len(data)))
+    assert starts == [
+        (data.index(b"2019-02-21 13"), date(2019, 2, 21), False),
+        (data.index(b"2019-02-21 09"), date(2019, 2, 21), True),
+        (data.index(b"2019-02-20 09"), date(2019, 2, 20), True)]
+
+
+def test_only_last_session_is_loaded(log_path):
+    worklog = tail_worklog(log_path, date(2019, 2, 22))
+    assert [session.start for session in worklog.sessions()] == [
+        datetime(2019, 2, 21, 13)]
+    with pytest.raises(NonChronologicalOrderError):
+        worklog.append_log_event(datetime(2019, 2, 21, 13, 30), "foo")
+
+
+def test_sessions_of_the_day_are_loaded(log_path):
+    worklog = tail_worklog(log_path, date(2019, 2, 21))
+    assert len(worklog.sessions()) == 2
+    with pytest.raises(MultipleSessionsInOneDayError):
+        worklog.append_log_event(datetime(2019, 2, 21, 15), "arrive")
+
+
+def test_sessions_are_loaded_until_enough(log_path):
+    worklog = tail_worklog(
+        log_path, date(2019, 2, 22),
+        lambda worklog: worklog.last_break_interval() is not None)
+    assert worklog.last_break_interval().name == ".lunch"
+    assert worklog.sessions() == WorkLog(log_path).sessions()
+
+
+def test_config_lines_make_whole_log_loaded(log_path):
+    with open(log_path, 'a') as log_file:
+        log_file.write("config daily_work_time = 4h\n")
+    worklog = tail_worklog(log_path, date(2019, 2, 22))
+    assert worklog.sessions() == WorkLog(log_path).sessions()
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+
+from did import did, parallel_reader
+from did.parallel_reader import chunk_offsets, parallel_job_reader
+from did.worklog import WorkLog
+from did.worklog_file import InvalidLine, PaidBreakParseError, job_reader
+
+LOG_CONTENTS = ("# A job log\n"
+                "config daily_work_time = 6h\n"
+                "2019-02-20 09:02:03: arrive\n"
+                "\n"
+                "2019-02-20 10:00: foo\n"
+                "2019-02-20 10:20:55: .bar\n"
+                "config paid_break lunch 15m one_chunk daily\n"
+                "2019-02-21 09:00:00: arrive\n"
+                "# another comment\n"
+                "2019-02-21 12:00:00: foo\n"
+                "2019-02-21 12:30:00: .lunch\n"
+                "2019-02-21 14:00:00: foo baz\n")
+
+
+@pytest.fixture
+def log_path(monkeypatch, log_path):
+    monkeypatch.setattr(parallel_reader, 'MIN_CHUNK_SIZE', 64)
+    return log_path
+
+
+def write(path, contents):
+    with open(path, 'w') as log_file:
+        log_file.write(contents)
+
+
+def test_chunks_end_with_complete_lines(log_path):
+    offsets = chunk_offsets(log_path, 4)
+    assert len(offsets) == 5
+    assert offsets[0] == 0 and offsets[-1] == len(LOG_CONTENTS)
+    for offset in offsets[1:-1]:
+        assert LOG_CONTENTS[offset - 1] == "\n"
+    many_offsets = chunk_offsets(log_path, 100)
+    assert many_offsets == sorted(set(many_offsets))
+    assert len(many_offsets) == len(LOG_CONTENTS) // 64 + 1
+
+
+@pytest.mark.parametrize("jobs", [1, 2, 5])
+def test_actions_match_job_reader(log_path, jobs):
+    numbered_actions = list(parallel_job_reader(log_path, jobs))
+    assert ([vars(action) for _, action in numbered_actions] ==
+            [vars(action) for action in job_reader(log_path)])
+    lines = LOG_CONTENTS.splitlines()
+    for line_number, action in numbered_actions:
+        assert lines[line_number - 1].endswith(getattr(action, 'text', ''))
+    assert [line_number for line_number, _ in numbered_actions] == [
+        2, 3, 5, 6, 7, 8, 10, 11, 12]
+
+
+@pytest.mark.parametrize("invalid_line,error", [
+    ("garbage\n", InvalidLine),
+    ("config paid_break lunch\n", PaidBreakParseError)])
+def test_error_has_exact_line_number(log_path, capsys, invalid_line, error):
+    lines = LOG_CONTENTS.splitlines(keepends=True)
+    write(log_path, "".join(lines[:9] + [invalid_line] + lines[9:]))
+    actions = []
+    with pytest.raises(error):
+        for _, action in parallel_job_reader(log_path, 3):
+            actions.append(vars(action))
+    assert len(actions) == 6
+    assert capsys.readouterr().out.endswith(", line 10:\n")
+
+
+def test_error_line_number_after_checkpoint(make_log, monkeypatch, capsys):
+    monkeypatch.setattr(parallel_reader, 'MIN_CHUNK_SIZE', 64)
+    lines = ["2019-02-{:02} 09:00:00: arrive\n"
+             "# a comment\n"
+             "2019-02-{:02} 17:00:00: foo\n".format(day, day)
+             for day in range(18, 23)]
+    path = make_log("".join(lines))
+    # Build the index
+    did.main(['-q', '-f', path, '-r', '..'], now=datetime(2019, 2, 22, 18))
+    with open(path, 'a') as log_file:
+        log_file.write("2019-02-22 18:00:00: bar\n"
+                       "\n" +
+                       "".join("2019-02-22 18:{}0:00: baz\n".format(minute)
+                               for minute in range(1, 5)) +
+                       "garbage\n"
+                       "2019-02-22 19:00:00: baz\n")
+    capsys.readouterr()
+    with pytest.raises(InvalidLine):
+        did.main(['-j', '2', '-f', path, '-r', '2019-02-22'],
+                 now=datetime(2019, 2, 22, 20))
+    assert capsys.readouterr().out.endswith(", line 22:\n")
+
+
+def test_work_log_parsed_in_parallel(log_path):
+    worklog = WorkLog(log_path, jobs=3)
+    assert worklog.sessions() == WorkLog(log_path).sessions()
+    assert (worklog.accounting.daily_work_time ==
+            WorkLog(log_path).accounting.daily_work_time)
@@ -0,0 +1,125 @@
+import io
+from datetime import datetime
+
+import pytest
+
+from did import worklog_file
+from did.worklog_file import BytesParser, Event, InvalidLine, Parser, \
+    SetParam, read_blocks
+
+
+@pytest.mark.parametrize(
+    "line,timestamp,text",
+    [("2019-02-20 09:02:03: arrive\n", datetime(2019, 2, 20, 9, 2, 3),
+      "arrive"),
+     ("2019-02-20 09:02:03: arrive", datetime(2019, 2, 20, 9, 2, 3),
+      "arrive"),
+     ("2019-02-20 23:59:59: coding project-foo\n",
+      datetime(2019, 2, 20, 23, 59, 59), "coding project-foo"),
+     ("2019-02-20 09:02: .lunch\n", datetime(2019, 2, 20, 9, 2, 0),
+      ".lunch"),
+     ("2019-02-20 09:02:03:  leading space\n",
+      datetime(2019, 2, 20, 9, 2, 3), " leading space"),
+     ])
+def test_event_line(line, timestamp, text):
+    result = Parser().process_line(line)
+    assert isinstance(result, Event)
+    assert result.timestamp == timestamp
+    assert result.text == text
+
+
+@pytest.mark.parametrize(
+    "line",
+    ["2019-02-20 09:02:03: arrive\n",
+     "2019-02-20 09:02:03: a\n",
+     "2019-12-31 00:00:00: .break **\n",
+     ])
+def test_fast_path_matches_regex_parsers(line):
+    parser = Parser()
+    fast = parser._fast_event_line(line)
+    slow = parser._process_line_with_registry(line)
+    assert fast is not None
+    assert (fast.timestamp, fast.text) == (slow.timestamp, slow.text)
+
+
+@pytest.mark.parametrize(
+    "line,expectation",
+    [("# 2019-02-20 09:02:03: comment\n", None),
+     ("\n", None),
+     ("config daily_work_time = 6h\n", SetParam),
+     ("2019-02-20 09:02:03: \n", InvalidLine),
+     ("2019-02-20 9:02:03: arrive\n", InvalidLine),
+     ("2019-02-30 09:02:03: arrive\n", ValueError),
+     ])
+def test_lines_not_on_fast_path(line, expectation):
+    assert Parser._fast_event_line(line) is None
+    if expectation is None:
+        assert Parser().process_line(line) is None
+    elif issubclass(expectation, Exception):
+        with pytest.raises(expectation):
+            Parser().process_line(line)
+    else:
+        assert isinstance(Parser().process_line(line), expectation)
+
+
+def parse_text(contents):
+    parser = Parser()
+    return [vars(result)
+            for result in map(parser.process_line,
+                              io.TextIOWrapper(io.BytesIO(contents), 'utf-8'))
+            if result is not None]
+
+
+def parse_bytes(contents):
+    parser = BytesParser('utf-8')
+    return [vars(result)
+            for block in read_blocks(io.BytesIO(contents))
+            for result in parser.process_block(block)]
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [b"config daily_work_time = 6h\n"
+     b"# a comment\n"
+     b"\n"
+     b"  \n"
+     b"2019-02-20 09:02:03: arrive\n"
+     b"2019-02-20 09:30: short timestamp\n"
+     b"2019-02-20 10:00:00: caf\xc3\xa9\n"
+     b"2019-02-20 10:20:55:  leading space\n"
+     b"2019-02-20 11:00:00: .lunch",
+     b"2019-02-20 09:02:03: arrive\r\n"
+     b"2019-02-20 10:00:00: foo\r"
+     b"2019-02-20 11:00:00: bar\r\n",
+     b"",
+     ])
+@pytest.mark.parametrize("block_size", [7, 64, 1 << 20])
+def test_bytes_parser_matches_text_mode(monkeypatch, contents, block_size):
+    monkeypatch.setattr(worklog_file, 'READ_BLOCK_SIZE', block_size)
+    assert parse_bytes(contents) == parse_text(contents)
+
+
+@pytest.mark.parametrize(
+    "contents,expectation",
+    [(b"2019-02-20 09:02:03: arrive\n2019-02-20 09:02:03: \n", InvalidLine),
+     (b"2019-02-30 09:02:03: arrive\n", ValueError),
+     (b"2019-02-20 09:02:03: \xff\n", UnicodeDecodeError),
+     ])
+def test_bytes_parser_errors(contents, expectation):
+    with pytest.raises(expectation) as text_error:
+        parse_text(contents)
+    with pytest.raises(expectation) as bytes_error:
+        parse_bytes(contents)
+    if expectation is not UnicodeDecodeError:
+        # The position of the undecodable byte is in a different buffer
+        assert str(bytes_error.value) == str(text_error.value)
+
+
+def test_read_blocks_end_with_complete_lines(monkeypatch):
+    monkeypatch.setattr(worklog_file, 'READ_BLOCK_SIZE', 10)
+    contents = b"first line\nsecond, longer line\n\nlast"
+    blocks = list(read_blocks(io.BytesIO(contents)))
+    assert b"".join(blocks) == contents
+    assert all(block.endswith(b"\n") for block in blocks[:-1])
+    assert b"".join(read_blocks(io.BytesIO(contents), 31)) == (
+        b"first line\nsecond, longer line\n")
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import re
+
+import pytest
+
+from did.day_range import DayRange
+from did.renderer import BlockWriter, TextRenderer, make_renderer
+from did.report import AggregateRangeDisplay, ChronologicalSessionDisplay, \
+    IntervalFilter
+from did.worklog import WorkLog
+
+LOG_CONTENTS = ("2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 10:00:00: coding foo\n"
+                "2019-02-20 10:30:00: .coffee\n"
+                "2019-02-20 12:00:00: coding bar\n"
+                "2019-02-21 09:00:00: arrive ooo\n")
+
+
+@pytest.fixture
+def worklog(log_path):
+    worklog = WorkLog(log_path)
+    worklog.compute_stats()
+    return worklog
+
+
+def render(worklog, display_class, output_format, pattern=None):
+    out = io.StringIO()
+    display = display_class(worklog, DayRange(".."), False,
+                            IntervalFilter(pattern),
+                            make_renderer(output_format, out))
+    display.display()
+    return out.getvalue()
+
+
+def test_chronological_json_lines(worklog):
+    records = [json.loads(line) for line in
+               render(worklog, ChronologicalSessionDisplay, 'jsonl')
+               .splitlines()]
+    assert [record['type'] for record in records] == [
+        'session', 'interval', 'interval', 'interval', 'session_totals',
+        'session', 'arrival', 'session_totals', 'totals']
+    assert records[0] == {'type': 'session', 'date': '2019-02-20',
+                          'is_workday': True}
+    assert records[2] == {'type': 'interval', 'date': '2019-02-20',
+                          'start': '2019-02-20T10:00:00',
+                          'end': '2019-02-20T10:30:00', 'name': '.coffee',
+                          'is_break': True, 'is_assumed': False,
+                          'duration': 1800}
+    assert records[5]['is_workday'] is False
+    assert records[6]['start'] == '2019-02-21T09:00:00'
+    assert 'date' not in records[-1]
+    assert records[-1]['work_time'] == records[4]['work_time']
+
+
+def test_aggregate_json_lines(worklog):
+    records = [json.loads(line) for line in
+               render(worklog, AggregateRangeDisplay, 'jsonl', 'coding')
+               .splitlines()]
+    assert [(record['type'], record.get('name'), record.get('depth'),
+             record.get('duration')) for record in records[:3]] == [
+        ('aggregate', 'coding', 0, 9000),
+        ('aggregate', 'coding bar', 1, 5400),
+        ('aggregate', 'coding foo', 1, 3600)]
+    assert records[3] == {'type': 'matched', 'work_time': 9000,
+                          'break_time': 0}
+    assert records[4]['type'] == 'totals'
+
+
+def test_csv_has_the_same_records(worklog):
+    rows = list(csv.DictReader(io.StringIO(
+        render(worklog, ChronologicalSessionDisplay, 'csv'))))
+    records = [json.loads(line) for line in
+               render(worklog, ChronologicalSessionDisplay, 'jsonl')
+               .splitlines()]
+    assert len(rows) == len(records)
+    for row, record in zip(rows, records):
+        assert {name: value for name, value in row.items() if value} == \
+            {name: str(value) for name, value in record.items()}
+
+
+def test_text_is_the_default(worklog, capsys):
+    ChronologicalSessionDisplay(worklog, DayRange(".."), False,
+                                IntervalFilter()).display()
+    assert render(worklog, ChronologicalSessionDisplay, 'text') == \
+        capsys.readouterr().out
+
+
+def test_text_is_colored_only_on_request(worklog):
+    plain = render(worklog, ChronologicalSessionDisplay, 'text')
+    assert '\x1b[' not in plain
+    out = io.StringIO()
+    ChronologicalSessionDisplay(worklog, DayRange(".."), False,
+                                IntervalFilter(),
+                                TextRenderer(out, color=True)).display()
+    colored = out.getvalue()
+    assert '\x1b[' in colored
+    assert re.sub('\x1b\\[[0-9]*m', '', colored) == plain
+
+
+def test_block_writer():
+    out = io.StringIO()
+    writer = BlockWriter(out)
+    line = "x" * 1023 + "\n"
+    for _ in range(BlockWriter.BLOCK_SIZE // len(line) - 1):
+        writer.write(line)
+    assert out.getvalue() == ""
+    writer.write(line)
+    assert len(out.getvalue()) == BlockWriter.BLOCK_SIZE
+    writer.write("end\n")
+    writer.flush()
+    assert out.getvalue().endswith(line + "end\n")
+
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_sessions_are_rendered_as_they_come(worklog):
+    out = Terminal()
+    rendered_before = []
+
+    class WatchedWorkLog:
+        def sessions_in_range(self, day_range):
+            for session in worklog.sessions_in_range(day_range):
+                rendered_before.append(out.getvalue())
+                yield session
+
+    ChronologicalSessionDisplay(WatchedWorkLog(), DayRange(".."), False,
+                                IntervalFilter(), TextRenderer(out)).display()
+    assert rendered_before[0] == ""
+    assert "coding bar" in rendered_before[1]
+    assert "Overall" not in rendered_before[1]
+    assert "Overall" in out.getvalue()
@@ -20,6 +20,8 @@ Fifth Floor, Boston, MA  02110-1301  USA
 
 import unittest
 import datetime
+import re
+from did.interval import Interval
 from did.report import AggregateTreeNode, IntervalFilter
 
 
@@ -141,5 +143,83 @@ class TestNameSimplification(unittest.TestCase):
                                           "x": None}})
 
 
+class TestAggregateDurations(unittest.TestCase):
+    def test_subtree_durations(self):
+        minute = datetime.timedelta(minutes=1)
+        tree = AggregateTreeNode(adjusted=False, filter=IntervalFilter())
+        tree.add_interval(("a", "b", "c"), minute, False)
+        tree.add_interval(("a", "b"), 2 * minute, True)
+        tree.add_interval(("a", "x"), 4 * minute, False)
+        tree.add_interval(("y",), 8 * minute, False)
+        tree.add_interval(("y",), datetime.timedelta(0), False)
+        self.assertEqual(tree.get_duration(), 15 * minute)
+        self.assertEqual(tree.get_child_duration("a"), 7 * minute)
+        self.assertEqual(tree.get_child_duration("z"), datetime.timedelta(0))
+        self.assertEqual(tree.children["a"].get_child_duration("b"),
+                         3 * minute)
+        self.assertEqual(tree.children["a"].children["b"]
+                         .get_child_duration("(assumed)"), 2 * minute)
+        tree.simplify()
+        self.assertEqual(tree.get_child_duration("a"), 7 * minute)
+        self.assertEqual(tree.get_child_duration("y"), 8 * minute)
+
+    def test_merged_durations(self):
+        minute = datetime.timedelta(minutes=1)
+        intervals = [(("a", "b", "c"), minute, False),
+                     (("a", "b"), 2 * minute, True),
+                     (("y",), 8 * minute, False),
+                     (("a", "b"), 16 * minute, False),
+                     (("a", "x"), 4 * minute, False),
+                     (("a", "b"), 32 * minute, True)]
+        trees = [AggregateTreeNode(adjusted=False, filter=IntervalFilter())
+                 for _ in range(3)]
+        for index, (words, duration, is_assumed) in enumerate(intervals):
+            trees[0].add_interval(words, duration, is_assumed)
+            trees[1 + index // 3].add_interval(words, duration, is_assumed)
+        trees[1].merge(trees[2])
+        self.assertEqual(trees[1].get_duration(), 63 * minute)
+        merged_b = trees[1].children["a"].children["b"]
+        expected_b = trees[0].children["a"].children["b"]
+        for name in ["", "(assumed)", "c"]:
+            self.assertEqual(merged_b.get_child_duration(name),
+                             expected_b.get_child_duration(name))
+        self.assertEqual(list(trees[1].children), list(trees[0].children))
+        trees[2].add_interval(("z",), minute, False)
+        self.assertNotIn("z", trees[1].children)
+
+
+class TestIntervalFilter(unittest.TestCase):
+    class CountingRegex:
+        def __init__(self, pattern):
+            self._regex = re.compile(pattern)
+            self.searches = 0
+
+        def search(self, text):
+            self.searches += 1
+            return self._regex.search(text)
+
+    def make_interval(self, name, hour):
+        return Interval(datetime.datetime(2019, 2, 20, hour),
+                        datetime.datetime(2019, 2, 20, hour + 1), name)
+
+    def test_verdict_is_cached_per_name(self):
+        interval_filter = IntervalFilter("foo")
+        regex = self.CountingRegex("foo")
+        interval_filter._regex = regex
+        intervals = [self.make_interval(name, hour) for hour, name
+                     in enumerate(["foo", "bar", "foo", "bar", "foo baz"])]
+        self.assertEqual(
+            [interval_filter.accepts_interval(interval)
+             for interval in intervals + intervals],
+            [True, False, True, False, True] * 2)
+        self.assertEqual(regex.searches, 3)
+
+    def test_inactive_filter_accepts_all(self):
+        interval_filter = IntervalFilter()
+        self.assertFalse(interval_filter.is_active())
+        self.assertTrue(
+            interval_filter.accepts_interval(self.make_interval("foo", 9)))
+
+
 if __name__ == "__main__":
     unittest.main()
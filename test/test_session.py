@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest import TestCase
 
 from did.session import WorkSession
@@ -22,3 +22,36 @@ class TestWorkSession(TestCase):
             WorkSession(start=datetime(2019, 2, 20, 9, 2, 6),
                         accounting=self.default_accounting)
         )
+
+    def test_stats_are_computed_lazily(self):
+        session = WorkSession(
+            start=datetime(2019, 2, 20, 9, 0, 0),
+            accounting=self.default_accounting,
+            events=[(datetime(2019, 2, 20, 11, 0, 0), "foo"),
+                    (datetime(2019, 2, 20, 11, 10, 0), ".bar")])
+        work, pause = session.intervals()
+
+        self.assertEqual(session.overhours(), timedelta(hours=-5, minutes=-50))
+        self.assertEqual(work.adjusted_duration(), timedelta(hours=2))
+        self.assertEqual(pause.adjusted_duration(), timedelta(minutes=10))
+
+        self.assertEqual(session.stats().time_worked(),
+                         timedelta(hours=2, minutes=10))
+        self.assertEqual(work.adjusted_duration(),
+                         timedelta(hours=2, minutes=10))
+        self.assertEqual(pause.adjusted_duration(), timedelta(0))
+
+    def test_stats_are_recomputed_after_append(self):
+        session = WorkSession(start=datetime(2019, 2, 20, 9, 0, 0),
+                              accounting=self.default_accounting)
+        session.append_log_event(datetime(2019, 2, 20, 11, 0, 0), "foo")
+        session.append_log_event(datetime(2019, 2, 20, 11, 10, 0), ".bar")
+        self.assertEqual(session.stats().time_worked(),
+                         timedelta(hours=2, minutes=10))
+
+        session.append_log_event(datetime(2019, 2, 20, 12, 10, 0), "foo")
+        self.assertEqual(session.overhours(), timedelta(hours=-4, minutes=-50))
+        self.assertEqual(session.stats().time_worked(),
+                         timedelta(hours=3, minutes=10))
+        self.assertEqual(session.intervals()[1].adjusted_duration(),
+                         timedelta(0))
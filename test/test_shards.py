@@ -0,0 +1,63 @@
+from datetime import date, datetime
+
+import pytest
+
+from did import did
+from did.checkpoints import INDEX_SUFFIX, CheckpointIndex
+from did.day_range import DayRange
+from did.shards import plan_shards
+
+LOG_CONTENTS = ("config daily_work_time = 6h\n"
+                "2019-02-18 09:00:00: arrive\n"
+                "2019-02-18 17:00:00: coding foo\n"
+                "2019-02-19 09:00:00: arrive\n"
+                "2019-02-19 12:00:00: coding bar\n"
+                "2019-02-19 12:30:00: .lunch\n"
+                "2019-02-19 15:00:00: review foo\n"
+                "config daily_work_time = 4h\n"
+                "2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 16:00:00: coding foo\n"
+                "2019-02-23 10:00:00: arrive ooo\n"
+                "2019-02-23 11:00:00: support\n"
+                "config daily_work_time = 8h\n"
+                "2019-02-25 08:00:00: arrive\n"
+                "2019-02-25 12:00:00: coding bar\n"
+                "2019-02-25 13:00:00: .lunch\n"
+                "2019-02-25 18:00:00: coding foo\n"
+                "2019-02-26 09:00:00: arrive\n"
+                "2019-02-26 10:00:00: review bar\n")
+NOW = datetime(2019, 2, 26, 11)
+
+
+@pytest.fixture
+def log_path(log_path):
+    """The log with its checkpoint index"""
+    did.main(cmdline_args=['-q', '-f', log_path, '-r', '..'], now=NOW)
+    return log_path
+
+
+def test_plan_shards(log_path):
+    index = CheckpointIndex(log_path + INDEX_SUFFIX)
+    assert index.load(log_path)
+    shards = plan_shards(index, DayRange('2019-02-19..2019-02-25'), 2)
+    assert [(checkpoint.date, end) for checkpoint, end in shards] == [
+        (date(2019, 2, 19), index.checkpoints[3].offset),
+        (date(2019, 2, 23), index.checkpoints[5].offset)]
+    assert plan_shards(index, DayRange('2019-02-19..'), 1) == []
+    assert plan_shards(index, DayRange('2019-02-26'), 4) == []
+
+
+@pytest.mark.parametrize("args", [["-r", ".."],
+                                  ["-r", "2019-02-19..2019-02-23"],
+                                  ["-s", "-r", "2019-02-20.."],
+                                  ["-d", "-g", "foo", "-r", ".."],
+                                  ["-a", "-r", ".."],
+                                  ["-a", "-p", "-r", "2019-02-20.."],
+                                  ["-a", "-g", "coding", "-r", ".."],
+                                  ["--format=csv", "-d", "-r", ".."]])
+@pytest.mark.parametrize("jobs", ["2", "3"])
+def test_sharded_report_matches_serial_report(log_path, capsys, args, jobs):
+    did.main(cmdline_args=['-f', log_path, *args], now=NOW)
+    expected = capsys.readouterr().out
+    did.main(cmdline_args=['-f', log_path, '-j', jobs, *args], now=NOW)
+    assert capsys.readouterr().out == expected
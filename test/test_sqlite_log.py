@@ -0,0 +1,185 @@
+import subprocess
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from did import did
+from did.log_format import is_sqlite_log
+from did.sqlite_log import SqliteJobLog, main, sqlite_checkpoint, \
+    tail_sqlite_worklog
+from did.worklog import WorkLog
+from did.worklog_file import job_reader
+
+LOG_CONTENTS = ("# A job log\n"
+                "config daily_work_time = 6h\n"
+                "config paid_break \"breakfast\" delete\n"
+                "2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 17:00:00: foo\n"
+                "\n"
+                "2019-02-21 09:00: arrive\r\n"
+                "2019-02-21 12:00:00: bar\n"
+                "config daily_work_time = 4h\n"
+                "config paid_break \"lunch\" 15m daily splittable\n"
+                "2019-02-23 09:00:00: arrive ooo\n"
+                "2019-02-23 10:00:00: .lunch\n"
+                "2019-02-25 09:00:00: arrive\n"
+                "2019-02-25 14:00:00: foo")
+
+
+@pytest.fixture
+def log_paths(log_path):
+    db_path = log_path + '.db'
+    with SqliteJobLog(db_path) as job_log:
+        job_log.import_text(log_path)
+    return log_path, db_path
+
+
+def exported(db_path):
+    with SqliteJobLog(db_path) as job_log:
+        return "".join(job_log.text_lines())
+
+
+def test_round_trip_is_lossless(log_paths):
+    text_path, db_path = log_paths
+    assert is_sqlite_log(db_path)
+    assert not is_sqlite_log(text_path)
+    assert exported(db_path) == LOG_CONTENTS
+
+
+def test_actions_match_text_format(log_paths):
+    text_path, db_path = log_paths
+    with SqliteJobLog(db_path) as job_log:
+        actions = list(job_log.actions())
+    assert ([vars(action) for _, action in actions] ==
+            [vars(action) for action in job_reader(text_path)])
+    # The lines are numbered like in the text format
+    assert [line_number for line_number, _ in actions] == [
+        2, 3, 4, 5, 7, 8, 9, 10, 11, 12, 13, 14]
+
+
+def test_work_log_from_database(log_paths):
+    text_path, db_path = log_paths
+    expected = WorkLog(text_path)
+    expected.compute_stats()
+    worklog = WorkLog(db_path)
+    worklog.compute_stats()
+    assert worklog.sessions() == expected.sessions()
+    assert (worklog.sessions()[-1].total_overtime() ==
+            expected.sessions()[-1].total_overtime())
+
+
+@pytest.mark.parametrize(
+    "first_day,expected_start_day",
+    [(date(2019, 2, 19), date(2019, 2, 20)),
+     (date(2019, 2, 22), date(2019, 2, 23)),
+     (date(2019, 2, 25), date(2019, 2, 25)),
+     (date(2019, 3, 1), date(2019, 2, 25)),
+     ])
+def test_loading_from_checkpoint(log_paths, first_day, expected_start_day):
+    text_path, db_path = log_paths
+    checkpoint = sqlite_checkpoint(db_path, first_day)
+    assert checkpoint.date == expected_start_day
+
+    full = WorkLog(text_path)
+    partial = WorkLog(db_path, checkpoint=checkpoint)
+    skipped = len(full.sessions()) - len(partial.sessions())
+    assert partial.sessions() == full.sessions()[skipped:]
+    for partial_session, session in zip(partial.sessions(),
+                                        full.sessions()[skipped:]):
+        assert partial_session.accounting() == session.accounting()
+
+
+def test_append_event(log_paths):
+    _, db_path = log_paths
+    with SqliteJobLog(db_path) as job_log:
+        job_log.append_event(datetime(2019, 2, 25, 15, 0, 0, 123), "bar")
+        job_log.append_event(datetime(2019, 2, 25, 16), "baz")
+    assert exported(db_path) == (LOG_CONTENTS + "\n"
+                                 "2019-02-25 15:00:00: bar\n"
+                                 "2019-02-25 16:00:00: baz\n")
+    assert WorkLog(db_path).sessions()[-1].intervals()[-1].name == "baz"
+
+
+@pytest.mark.parametrize("is_enough,expected_start_days", [
+    (None, [date(2019, 2, 25), date(2019, 2, 26)]),
+    (lambda worklog: len(worklog.sessions()) >= 3,
+     [date(2019, 2, 21), date(2019, 2, 23), date(2019, 2, 25),
+      date(2019, 2, 26)]),
+])
+def test_tail_worklog(log_paths, is_enough, expected_start_days):
+    _, db_path = log_paths
+    with SqliteJobLog(db_path) as job_log:
+        job_log.append_event(datetime(2019, 2, 26, 9), "arrive ooo")
+    # The sessions since the last workday session are loaded
+    worklog = tail_sqlite_worklog(db_path, date(2019, 2, 26), is_enough)
+    assert [session.start.date()
+            for session in worklog.sessions()] == expected_start_days
+
+
+def test_invalid_line_is_reported(log_paths, capsys):
+    text_path, db_path = log_paths
+    with open(text_path, 'a') as log_file:
+        log_file.write("\ninvalid line\n")
+    with pytest.raises(Exception):
+        with SqliteJobLog(db_path) as job_log:
+            job_log.import_text(text_path)
+    assert "line 15" in capsys.readouterr().out
+    # The lines imported before the error are rolled back
+    assert exported(db_path) == LOG_CONTENTS
+
+
+def test_converter(log_paths):
+    text_path, db_path = log_paths
+    copy_path = text_path + ".copy"
+    main(["export", db_path, copy_path])
+    with open(copy_path, newline='') as copy_file:
+        assert copy_file.read() == LOG_CONTENTS
+    with pytest.raises(SystemExit):
+        main(["export", text_path, copy_path + "2"])
+    with pytest.raises(SystemExit):
+        main(["import", text_path, db_path])
+
+
+@pytest.mark.parametrize("args", [["-r", ".."],
+                                  ["-d", "-r", "2019-02-21.."],
+                                  ["-a", "-r", "2019-02-22.."],
+                                  ["-a", "-g", "fo", "-r", ".."]])
+def test_report_matches_text_format(log_paths, capsys, args):
+    text_path, db_path = log_paths
+    did.main(['-f', text_path, *args], now=datetime(2019, 2, 26, 9))
+    expected = capsys.readouterr().out
+    did.main(['-f', db_path, *args], now=datetime(2019, 2, 26, 9))
+    assert capsys.readouterr().out == expected
+
+
+def test_append_from_command_line(log_paths):
+    _, db_path = log_paths
+    for time, task in [(datetime(2019, 2, 26, 9), "arrive"),
+                       (datetime(2019, 2, 26, 10), "foo"),
+                       (datetime(2019, 2, 26, 11), "."),
+                       (datetime(2019, 2, 26, 12), ",")]:
+        did.main(['-f', db_path, '-q', task], now=time)
+    assert exported(db_path).endswith("2019-02-26 11:00:00: .lunch\n"
+                                      "2019-02-26 12:00:00: foo\n")
+    assert Path(db_path + ".didstatus").exists()
+
+
+@pytest.mark.parametrize("args", [["-e"], ["--watch"], ["--daemon"]])
+def test_text_format_only_options(log_paths, args):
+    _, db_path = log_paths
+    with pytest.raises(SystemExit):
+        did.main(['-f', db_path, *args])
+
+
+def test_text_format_check_imports(log_paths):
+    # The format of the log must be checked without importing the parser
+    text_path, _ = log_paths
+    script = ("import sys\n"
+              "from did.did import DidApplication\n"
+              "application = DidApplication(['-f', sys.argv[1], '--daemon'])\n"
+              "application.parse_options()\n"
+              "for name in ['did.worklog', 'did.worklog_file']:\n"
+              "    assert name not in sys.modules, name\n")
+    subprocess.run([sys.executable, '-c', script, text_path], check=True)
@@ -0,0 +1,138 @@
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+from did import did
+from did.status import STATUS_SUFFIX, default_log_file_name, \
+    format_duration, load_status, parse_status_args, print_status
+from did.worklog import WorkLog
+
+
+@pytest.mark.parametrize("seconds,expected",
+                         [(0, "0m"), (59, "0h0m"), (300, "0h5m"),
+                          (3900, "1h5m"), (-3900, "-1h5m")])
+def test_format_duration(seconds, expected):
+    assert format_duration(seconds) == expected
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [(["--status"], ("{task} {work}", None)),
+     (["--status={work}"], ("{work}", None)),
+     (["-f", "log", "--status"], ("{task} {work}", "log")),
+     (["--status", "--log-file=log"], ("{task} {work}", "log")),
+     (["-f", "log"], None),
+     (["--status", "-a"], None),
+     (["foo"], None),
+     ])
+def test_parse_status_args(args, expected):
+    assert parse_status_args(args) == expected
+
+
+def run_did(log_path, args, time_str):
+    did.main(cmdline_args=['--log-file', log_path, *args],
+             now=datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S'))
+
+
+STATUS_FORMAT = "{task}|{start}|{last}|{since}|{work}|{break}|{overtime}"
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = str(tmp_path / 'job_log')
+    for time_str, task in [("2019-02-15 09:00:00", "arrive"),
+                           ("2019-02-15 11:00:00", "foo"),
+                           ("2019-02-15 12:00:00", ".lunch"),
+                           ("2019-02-15 14:00:00", "bar")]:
+        run_did(path, ["-q", task], time_str)
+    return path
+
+
+def test_status_is_saved_on_append(capsys, log_path):
+    assert print_status(["-f", log_path, "--status=" + STATUS_FORMAT],
+                        now=datetime(2019, 2, 15, 14, 30))
+    # The computer and breakfast breaks are paid
+    assert capsys.readouterr().out == \
+        "bar|09:00|14:00|0h30m|4h50m|0h40m|-3h10m\n"
+
+
+def test_status_matches_computed_status(capsys, log_path):
+    print_status(["-f", log_path, "--status=" + STATUS_FORMAT],
+                 now=datetime(2019, 2, 15, 14, 30))
+    quick = capsys.readouterr().out
+    os.remove(log_path + STATUS_SUFFIX)
+    assert not print_status(["-f", log_path, "--status"])
+    run_did(log_path, ["--status=" + STATUS_FORMAT], "2019-02-15 14:30:00")
+    assert capsys.readouterr().out == quick
+    assert load_status(log_path + STATUS_SUFFIX, log_path) is not None
+
+
+def test_status_of_another_day(capsys, log_path):
+    print_status(["-f", log_path, "--status=" + STATUS_FORMAT],
+                 now=datetime(2019, 2, 16, 9, 0))
+    assert capsys.readouterr().out == "||||0m|0m|0m\n"
+
+
+@pytest.mark.parametrize("status_format", ["{task} {foo}", "{0}", "{task"])
+def test_invalid_status_format(capsys, log_path, status_format):
+    args = ["-f", log_path, "--status=" + status_format]
+    assert not print_status(args, now=datetime(2019, 2, 15, 14, 30))
+    with pytest.raises(SystemExit):
+        run_did(log_path, args[2:], "2019-02-15 14:30:00")
+    assert "{overtime}" in capsys.readouterr().err
+
+
+def test_default_log_file_name(monkeypatch):
+    monkeypatch.setenv('HOME', '/home/user')
+    assert default_log_file_name() == "/home/user/.config/did/joblog"
+    assert did.DidApplication([]).get_config_dir() == "/home/user/.config/did"
+    monkeypatch.delenv('HOME')
+    assert default_log_file_name() == "./joblog"
+
+
+def test_status_accounting(log_path):
+    status = load_status(log_path + STATUS_SUFFIX, log_path)
+    worklog = WorkLog(log_path)
+    assert status.accounting() is worklog.sessions()[-1].accounting()
+
+
+@pytest.mark.parametrize("accounting_data", [
+    "", "[", "[28800000000]", "[28800000000,[[1]]]",
+    # The hexadecimal pickles of the previous format
+    "80049541000000000000008c0b6469642e776f726b74696d65948c"])
+def test_invalid_status_accounting(log_path, accounting_data):
+    status_path = log_path + STATUS_SUFFIX
+    status = load_status(status_path, log_path)
+    status.accounting_data = accounting_data
+    with open(status_path, 'w') as status_file:
+        status_file.write(status.to_text())
+    status = load_status(status_path, log_path)
+    assert status.accounting() is None
+    # The accounting is taken from the log instead
+    run_did(log_path, ["-q", "baz"], "2019-02-15 15:00:00")
+    assert WorkLog(log_path).sessions()[-1].intervals()[-1].name == "baz"
+    assert load_status(status_path, log_path).accounting() is not None
+
+
+def test_status_is_out_of_date_after_modification(log_path):
+    with open(log_path, 'a') as log_file:
+        log_file.write("2019-02-15 15:00:00: baz\n")
+    assert load_status(log_path + STATUS_SUFFIX, log_path) is None
+    assert not print_status(["-f", log_path, "--status"])
+
+
+def test_status_query_imports(log_path):
+    # The status must be printed without importing the rest of Did
+    script = ("import sys\n"
+              "import did.__main__\n"
+              "sys.argv = ['did', '-f', sys.argv[1], '--status']\n"
+              "did.__main__.main()\n"
+              "for name in ['argparse', 'did.report', 'did.worklog', "
+              "'pytimeparse']:\n"
+              "    assert name not in sys.modules, name\n")
+    result = subprocess.run([sys.executable, '-c', script, log_path],
+                            stdout=subprocess.PIPE, check=True)
+    assert result.stdout == b" 0m\n"
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from did import did
+from did.checkpoints import INDEX_SUFFIX
+from did.day_range import DayRange
+from did.log_cache import CACHE_SUFFIX
+from did.renderer import JsonLinesRenderer
+from did.report import AggregateRangeDisplay, IntervalFilter
+from did.team import aggregate_logs
+from did.worklog import WorkLog
+
+LOG_CONTENTS = [("config daily_work_time = 6h\n"
+                 "2019-02-20 09:00:00: arrive\n"
+                 "2019-02-20 12:00:00: coding foo\n"
+                 "2019-02-20 12:30:00: .lunch\n"
+                 "2019-02-20 17:00:00: review bar\n"
+                 "2019-02-21 09:00:00: arrive\n"
+                 "2019-02-21 10:00:00: coding bar\n"),
+                ("2019-02-19 08:00:00: arrive\n"
+                 "2019-02-19 16:00:00: coding foo\n"
+                 "2019-02-20 08:00:00: arrive\n"
+                 "2019-02-20 11:00:00: support\n"
+                 "2019-02-20 12:00:00: coding foo\n"),
+                ("2019-02-21 07:00:00: arrive\n"
+                 "2019-02-21 09:00:00: review foo\n")]
+NOW = datetime(2019, 2, 21, 11)
+
+
+@pytest.fixture
+def log_paths(make_log):
+    return [make_log(contents, 'job_log_{}'.format(index))
+            for index, contents in enumerate(LOG_CONTENTS)]
+
+
+def make_display(pattern=None):
+    out = io.StringIO()
+    display = AggregateRangeDisplay(None, DayRange('2019-02-20..'), False,
+                                    IntervalFilter(pattern),
+                                    JsonLinesRenderer(out))
+    return display, out
+
+
+def expected_report(log_paths, pattern=None):
+    expected, expected_out = make_display(pattern)
+    for path in log_paths:
+        worklog = WorkLog(path)
+        if worklog.end().date() == NOW.date():
+            worklog.append_assumed_interval(NOW)
+        worklog.compute_stats()
+        for session in worklog.sessions_in_range(expected.day_range):
+            expected.add_session(session)
+    expected.display_sessions([])
+    return expected_out.getvalue()
+
+
+@pytest.mark.parametrize("pattern", [None, "foo"])
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_merged_report_adds_up_sessions_of_all_logs(log_paths, pattern,
+                                                    max_workers):
+    display, out = make_display(pattern)
+    aggregate_logs(display, log_paths, False, NOW, max_workers)
+    display.display_sessions([])
+    assert out.getvalue() == expected_report(log_paths, pattern)
+    assert '"type": "aggregate"' in out.getvalue()
+
+
+def test_cache_files_of_the_logs_are_not_used(log_paths):
+    # An index pointing in the middle of a session, which would fail
+    did.main(['-q', '-f', log_paths[1], '-r', '..'], now=NOW)
+    with open(log_paths[1] + INDEX_SUFFIX) as index_file:
+        index = json.load(index_file)
+    index['checkpoints'][1][0] = LOG_CONTENTS[1].index("2019-02-20 11")
+    with open(log_paths[1] + INDEX_SUFFIX, 'w') as index_file:
+        json.dump(index, index_file)
+    display, out = make_display()
+    aggregate_logs(display, log_paths, True, NOW, 1)
+    display.display_sessions([])
+    assert out.getvalue() == expected_report(log_paths)
+    # Nor are they written
+    for path in [log_paths[0], log_paths[2]]:
+        assert not os.path.exists(path + INDEX_SUFFIX)
+        assert not os.path.exists(path + CACHE_SUFFIX)
@@ -0,0 +1,106 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from did.watch import LogWatcher
+from did.worklog import WorkLog
+
+LOG_CONTENTS = ("2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 17:00:00: foo\n"
+                "2019-02-21 09:00:00: arrive\n"
+                "2019-02-21 10:00:00: foo\n")
+
+NOW = datetime(2019, 2, 21, 12)
+
+
+class CountingLoader:
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        return WorkLog(self.path)
+
+
+def append(path, text):
+    with open(path, 'a') as log_file:
+        log_file.write(text)
+
+
+def expected_worklog(path, now):
+    worklog = WorkLog(path)
+    if worklog.end().date() == now.date():
+        worklog.append_assumed_interval(now)
+    worklog.compute_stats()
+    return worklog
+
+
+def assert_up_to_date(watcher, path, now):
+    expected = expected_worklog(path, now)
+    assert watcher.worklog.sessions() == expected.sessions()
+    assert ([session.total_overtime()
+             for session in watcher.worklog.sessions()] ==
+            [session.total_overtime() for session in expected.sessions()])
+
+
+def test_assumed_interval_is_refreshed(log_path):
+    loader = CountingLoader(log_path)
+    watcher = LogWatcher(log_path, loader)
+    watcher.refresh(NOW)
+    assert_up_to_date(watcher, log_path, NOW)
+    later = datetime(2019, 2, 21, 13)
+    watcher.refresh(later)
+    assert_up_to_date(watcher, log_path, later)
+    assert watcher.worklog.sessions()[-1].intervals()[-1].end == later
+    assert loader.count == 1
+
+
+def test_appended_lines_are_parsed_incrementally(log_path):
+    loader = CountingLoader(log_path)
+    watcher = LogWatcher(log_path, loader)
+    watcher.refresh(NOW)
+    append(log_path, "2019-02-21 12:30:00: bar\n")
+    now = datetime(2019, 2, 21, 13)
+    watcher.refresh(now)
+    assert_up_to_date(watcher, log_path, now)
+    append(log_path, "config daily_work_time = 6h\n"
+                     "2019-02-22 09:00:00: arrive\n"
+                     "2019-02-22 11:00:00: baz\n")
+    now = datetime(2019, 2, 22, 12)
+    watcher.refresh(now)
+    assert_up_to_date(watcher, log_path, now)
+    assert loader.count == 1
+
+
+def test_incomplete_line_waits_for_its_end(log_path):
+    loader = CountingLoader(log_path)
+    watcher = LogWatcher(log_path, loader)
+    watcher.refresh(NOW)
+    append(log_path, "2019-02-21 11:00:00: ba")
+    watcher.refresh(NOW)
+    assert watcher.worklog.sessions()[-1].intervals()[-1].name == "foo"
+    append(log_path, "r\n")
+    watcher.refresh(NOW)
+    assert_up_to_date(watcher, log_path, NOW)
+    assert loader.count == 1
+
+
+@pytest.mark.parametrize(
+    "new_contents",
+    [LOG_CONTENTS[:-len("2019-02-21 10:00:00: foo\n")],
+     LOG_CONTENTS.replace("17:00:00: foo", "17:00:00: qux"),
+     LOG_CONTENTS.replace("17:00:00: foo", "17:00:00: qux") +
+     "2019-02-21 11:00:00: bar\n",
+     ])
+def test_rewritten_file_is_reloaded(log_path, new_contents):
+    loader = CountingLoader(log_path)
+    watcher = LogWatcher(log_path, loader)
+    watcher.refresh(NOW)
+    with open(log_path + '.new', 'w') as log_file:
+        log_file.write(new_contents)
+    os.replace(log_path + '.new', log_path)
+    watcher.refresh(NOW)
+    assert_up_to_date(watcher, log_path, NOW)
+    assert loader.count == 2
@@ -6,8 +6,9 @@ from typing import List, Optional
 
 import pytest
 
+from did.day_range import DayRange
 from did.session import WorkSession
-from did.worklog import WorkLog, FirstJobNotArriveError, \
+from did.worklog import WorkLog, SessionStream, FirstJobNotArriveError, \
     NonChronologicalOrderError, ConfigChangeDuringSessionError, \
     InvalidParameter, MultipleSessionsInOneDayError, TooLongSessionError
 from did.worklog_file import InvalidLine, PaidBreakParseError
@@ -19,13 +20,13 @@ default_accounting = make_preset_accounting('PL-computer')
 def custom_accounting(hours: Optional[int] = None,
                       set_breaks: List[PaidBreakConfig] = [],
                       delete_breaks: List[str] = []) -> Accounting:
-    accounting = default_accounting.clone()
+    accounting = default_accounting
     if hours is not None:
-        accounting.daily_work_time = hours
+        accounting = accounting.with_daily_work_time(hours)
     for break_name in delete_breaks:
-        accounting.delete_break(break_name)
+        accounting = accounting.without_break(break_name)
     for break_config in set_breaks:
-        accounting.set_break(break_config)
+        accounting = accounting.with_break(break_config)
     return accounting
 
 
@@ -190,3 +191,87 @@ def test_only_one_arrive_per_day(file_contents, expectation):
      ])
 def test_max_session_length(file_contents, expectation):
     verify_reading(file_contents, expectation)
+
+
+@pytest.mark.parametrize(
+    "range_spec,expected_days",
+    [("2019-02-19", []),
+     ("2019-02-20", [20, 20]),
+     ("2019-02-21", []),
+     ("2019-02-22", [22]),
+     ("2019-02-20..2019-02-25", [20, 20, 22, 25]),
+     ("2019-02-21..2019-02-24", [22]),
+     ("2019-02-23..", [25]),
+     ("..2019-02-22", [20, 20, 22]),
+     ("2019-03", []),
+     ])
+def test_sessions_in_range(range_spec, expected_days):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file_path = os.path.join(temp_dir, 'job_log')
+        with open(log_file_path, 'w') as log_file:
+            log_file.write("2019-02-20 07:00:00: arrive ooo\n"
+                           "2019-02-20 09:00:00: arrive\n"
+                           "2019-02-22 09:00:00: arrive\n"
+                           "2019-02-25 09:00:00: arrive\n")
+        work_log = WorkLog(log_file_path)
+        sessions = work_log.sessions_in_range(DayRange(range_spec))
+        assert [session.start.day for session in sessions] == expected_days
+
+
+def test_sessions_share_accounting_snapshots():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file_path = os.path.join(temp_dir, 'job_log')
+        with open(log_file_path, 'w') as log_file:
+            log_file.write("2019-02-20 09:00:00: arrive\n"
+                           "2019-02-21 09:00:00: arrive\n"
+                           "config daily_work_time = 6h\n"
+                           "2019-02-22 09:00:00: arrive\n"
+                           "config daily_work_time = 8h\n"
+                           "2019-02-25 09:00:00: arrive\n")
+        sessions = WorkLog(log_file_path).sessions()
+        assert sessions[0].accounting() is default_accounting
+        assert sessions[1].accounting() is default_accounting
+        assert sessions[2].accounting().daily_work_time == timedelta(hours=6)
+        assert sessions[3].accounting() is default_accounting
+
+
+STREAMED_LOG = ("2019-02-20 09:00:00: arrive\n"
+                "2019-02-20 17:30:00: foo\n"
+                "config daily_work_time = 6h\n"
+                "2019-02-21 09:00:00: arrive\n"
+                "2019-02-21 14:00:00: foo\n"
+                "2019-02-23 10:00:00: arrive ooo\n"
+                "2019-02-23 11:00:00: bar\n"
+                "2019-02-25 09:00:00: arrive\n"
+                "2019-02-25 12:00:00: foo\n")
+
+
+@pytest.mark.parametrize(
+    "range_spec,assume_until",
+    [("..", None),
+     ("..", datetime(2019, 2, 25, 16)),
+     ("..", datetime(2019, 2, 26, 16)),
+     ("2019-02-21..2019-02-23", None),
+     ])
+def test_session_stream(range_spec, assume_until):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_file_path = os.path.join(temp_dir, 'job_log')
+        with open(log_file_path, 'w') as log_file:
+            log_file.write(STREAMED_LOG)
+        work_log = WorkLog(log_file_path)
+        if assume_until is not None and \
+                work_log.end().date() == assume_until.date():
+            work_log.append_assumed_interval(assume_until)
+        work_log.compute_stats()
+        day_range = DayRange(range_spec)
+        expected = list(work_log.sessions_in_range(day_range))
+
+        stream = SessionStream(log_file_path, assume_until=assume_until)
+        assert stream.sessions() == []
+        sessions = []
+        for session in stream.sessions_in_range(day_range):
+            assert len(stream.sessions()) <= 1
+            sessions.append(session)
+        assert sessions == expected
+        assert ([session.total_overtime() for session in sessions] ==
+                [session.total_overtime() for session in expected])
@@ -18,8 +18,10 @@ Foobar; if not, write to the Free Software Foundation, Inc., 51 Franklin St,
 Fifth Floor, Boston, MA  02110-1301  USA
 """
 
-import unittest
 import datetime
+import json
+import pickle
+import unittest
 from did.worktime import WorkSessionStats, make_preset_accounting, Accounting
 from did.interval import Interval
 
@@ -141,5 +143,48 @@ class TestBasicSession(unittest.TestCase):
         self.verify_ooo([-60 * 60, 60 * 60], 60 * 60, 60 * 60)
 
 
+class AccountingTest(unittest.TestCase):
+    def test_changes_return_interned_snapshots(self):
+        accounting = make_preset_accounting('PL-computer')
+        shorter = accounting.with_daily_work_time(datetime.timedelta(hours=6))
+        self.assertEqual(accounting.daily_work_time,
+                         datetime.timedelta(hours=8))
+        self.assertIs(shorter, accounting.with_daily_work_time(
+            datetime.timedelta(hours=6)))
+        self.assertIs(accounting, shorter.with_daily_work_time(
+            datetime.timedelta(hours=8)))
+
+    def test_break_changes(self):
+        accounting = make_preset_accounting('PL-computer')
+        without = accounting.without_break("computer")
+        self.assertEqual([config.name for config in without.break_configs],
+                         ["breakfast"])
+        self.assertEqual(len(accounting.break_configs), 2)
+        self.assertIs(accounting,
+                      without.with_break(accounting.break_configs[1]))
+        with self.assertRaises(ValueError):
+            without.without_break("computer")
+
+    def test_unpickled_snapshot_is_shared(self):
+        accounting = make_preset_accounting('PL-computer')
+        self.assertIs(pickle.loads(pickle.dumps(accounting)), accounting)
+
+    def test_data_round_trip(self):
+        accounting = make_preset_accounting('PL-computer')
+        data = json.loads(json.dumps(accounting.to_data()))
+        self.assertIs(Accounting.from_data(data), accounting)
+
+    def test_invalid_data(self):
+        data = make_preset_accounting('PL-computer').to_data()
+        for invalid in [None, data[:1], [1.5, data[1]], [data[0], [[]]],
+                        [data[0], [["breakfast", "15m", 1, True, None,
+                                    None]]],
+                        [data[0], [[1, 900000000, 1, True, None, None]]],
+                        [data[0], [["x", 900000000, 1, "yes", None, None]]],
+                        [10 ** 30, []]]:
+            with self.assertRaises(ValueError):
+                Accounting.from_data(invalid)
+
+
 if __name__ == "__main__":
     unittest.main()